@@ -15,6 +15,8 @@ import urllib.request
 import urllib.error
 from datetime import datetime, timezone
 
+from spotify_token_cache import TokenRejected, cached_access_token, invalidate_token
+
 CLIENT_ID = os.environ.get("SPOTIFY_CLIENT_ID", "").strip()
 CLIENT_SECRET = os.environ.get("SPOTIFY_CLIENT_SECRET", "").strip()
 REFRESH_TOKEN = os.environ.get("SPOTIFY_REFRESH_TOKEN", "").strip()
@@ -53,10 +55,14 @@ def http_json(url: str, headers=None, data: bytes | None = None, timeout: int =
     except Exception as e:
         raise RuntimeError(f"HTTP failure: {e}")
 
-def get_access_token() -> str:
+def get_access_token(force_refresh: bool = False) -> str:
     if not (CLIENT_ID and CLIENT_SECRET and REFRESH_TOKEN):
         raise RuntimeError("Missing Spotify secrets: SPOTIFY_CLIENT_ID / SPOTIFY_CLIENT_SECRET / SPOTIFY_REFRESH_TOKEN")
 
+    token, _ = cached_access_token(CLIENT_ID, REFRESH_TOKEN, request_access_token, force_refresh=force_refresh)
+    return token
+
+def request_access_token():
     auth = base64.b64encode(f"{CLIENT_ID}:{CLIENT_SECRET}".encode()).decode()
     body = urllib.parse.urlencode({
         "grant_type": "refresh_token",
@@ -79,7 +85,7 @@ def get_access_token() -> str:
     token = (payload or {}).get("access_token")
     if not token:
         raise RuntimeError(f"No access_token in response: {payload}")
-    return token
+    return token, payload.get("scope") or "", payload.get("expires_in")
 
 def get_player(access_token: str):
     # 204 => no active device / idle
@@ -109,6 +115,8 @@ def get_recent(access_token: str):
         headers={"Authorization": f"Bearer {access_token}"},
         timeout=25,
     )
+    if code == 401:
+        raise TokenRejected(f"Recently-played rejected the access token: {payload}")
     if code >= 400:
         raise RuntimeError(f"Recently-played failed (HTTP {code}): {payload}")
 
@@ -298,6 +306,18 @@ def replace_block(readme: str, cli_text: str) -> str:
     )
     return pattern.sub(block, readme)
 
+def fetch_feed(token: str):
+    # Player can fail soft (we still can render from recent)
+    try:
+        p_status, p_data = get_player(token)
+    except Exception:
+        p_status, p_data = 0, None  # unknown
+    if p_status == 401:
+        raise TokenRejected("Player rejected the access token")
+
+    recent = get_recent(token)  # hard requirement for stable output
+    return p_status, p_data, recent
+
 def main():
     # Fail-safe philosophy:
     # - If token refresh fails => exit nonzero; DO NOT modify README/state.
@@ -307,13 +327,13 @@ def main():
 
     prev = load_state()
 
-    # Player can fail soft (we still can render from recent)
     try:
-        p_status, p_data = get_player(token)
-    except Exception:
-        p_status, p_data = 0, None  # unknown
-
-    recent = get_recent(token)  # hard requirement for stable output
+        p_status, p_data, recent = fetch_feed(token)
+    except TokenRejected:
+        # A cached token was revoked or expired early: refresh once and retry.
+        invalidate_token()
+        token = get_access_token(force_refresh=True)
+        p_status, p_data, recent = fetch_feed(token)
     if not recent:
         raise RuntimeError("Spotify returned no recently played items (items empty).")
 
@@ -8,6 +8,9 @@ import urllib.request
 import urllib.error
 from datetime import datetime, timezone
 
+from spotify_poll_scheduler import load_poll_schedule, poll_due
+from spotify_token_cache import cached_access_token, invalidate_token
+
 AUTH_URL = "https://accounts.spotify.com/api/token"
 CURRENTLY_PLAYING_URL = "https://api.spotify.com/v1/me/player/currently-playing"
 PLAYER_URL = "https://api.spotify.com/v1/me/player"
@@ -36,7 +39,17 @@ def http_json(url, headers=None, data=None, method=None, timeout=20):
     except Exception:
         return -1, None
 
-def refresh_access_token(cid, csec, rt):
+def refresh_access_token(cid, csec, rt, force_refresh=False):
+    def exchange():
+        payload = request_access_token(cid, csec, rt)
+        if not payload:
+            return None, "", None
+        return payload.get("access_token"), payload.get("scope") or "", payload.get("expires_in")
+
+    token, _ = cached_access_token(cid, rt, exchange, force_refresh=force_refresh)
+    return token
+
+def request_access_token(cid, csec, rt):
     auth = base64.b64encode(f"{cid}:{csec}".encode()).decode()
     body = urllib.parse.urlencode({
         "grant_type": "refresh_token",
@@ -55,7 +68,7 @@ def refresh_access_token(cid, csec, rt):
     )
     if code != 200 or not isinstance(payload, dict):
         return None
-    return payload.get("access_token")
+    return payload
 
 def detect_playing(token):
     """
@@ -99,10 +112,24 @@ def main():
     enable = (os.getenv("ENABLE_FAST_POLL", "false") or "false").strip().lower()
     mode = (os.getenv("FAST_POLL_MODE", "PLAYING_ONLY") or "PLAYING_ONLY").strip().upper()
     latch_file = (os.getenv("LATCH_FILE") or ".github/state/spotify_fastpoll_latch.json").strip()
+    adaptive = (os.getenv("ADAPTIVE_POLL", "false") or "false").strip().lower() == "true"
+
+    # ------------------------------------------------------------
+    # Adaptive schedule (spotify_poll_schedule.json, written by the
+    # telemetry run): once due, run without touching the API.
+    # ------------------------------------------------------------
+    if adaptive:
+        schedule = load_poll_schedule()
+        print(f"next_run_utc={(schedule or {}).get('next_run_utc') or 'none'}")
+        if poll_due(schedule):
+            print("should_run=true")
+            print(f"reason=schedule_due_{(schedule or {}).get('reason') or 'no_schedule'}")
+            print("changed_latch=false")
+            return 0
 
     if enable != "true":
         print("should_run=false")
-        print("reason=fast_poll_disabled")
+        print("reason=schedule_not_due" if adaptive else "reason=fast_poll_disabled")
         print("changed_latch=false")
         return 0
 
@@ -123,6 +150,16 @@ def main():
         return 0
 
     playing, source = detect_playing(tok)
+    if source.endswith("_http_401"):
+        # A cached token was revoked or expired early: refresh once and retry.
+        invalidate_token()
+        tok = refresh_access_token(cid, csec, rt, force_refresh=True)
+        if not tok:
+            print("should_run=false")
+            print("reason=token_refresh_failed")
+            print("changed_latch=false")
+            return 0
+        playing, source = detect_playing(tok)
 
     # Optional: ANY_SESSION means "device exists" (session) even if not currently playing
     if mode == "ANY_SESSION" and not playing:
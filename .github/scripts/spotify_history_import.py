@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+# .github/scripts/spotify_history_import.py
+# Bulk backfill of the listening journal from Spotify's extended streaming
+# history export (account privacy data: Streaming_History_Audio_*.json).
+#
+# Each export file is one large JSON array. It is streamed element by element
+# (never loaded whole), rows are normalized into the telemetry event schema,
+# and events are appended to the segmented journal in batches, deduplicated
+# on history_event_key(). After every batch the byte offset reached in the
+# file is checkpointed, so an interrupted import resumes where it stopped.
+# Plays older than HISTORY_RETENTION_DAYS go only into the daily rollups; each
+# rollup day records the keys it imported, so re-importing them (--restart, a
+# re-exported file, a crash before the checkpoint) never counts them twice.
+#
+#   python3 .github/scripts/spotify_history_import.py ~/Downloads/my_spotify_data/
+#   python3 .github/scripts/spotify_history_import.py Streaming_History_Audio_2019-2021_0.json --dry-run
+
+import argparse
+import codecs
+import glob
+import json
+import os
+import sys
+import time
+
+import spotify_telemetry as st
+
+CHECKPOINT_FILE = os.path.join(st.STATE_DIR, "spotify_import_checkpoint.json")
+EXPORT_GLOB = "Streaming_History_Audio_*.json"
+
+IMPORT_BATCH_EVENTS  = 20000     # events buffered before a journal append + checkpoint
+IMPORT_MIN_MS_PLAYED = 30000     # shorter plays are not counted as plays
+READ_CHUNK_BYTES     = 1 << 20
+PROGRESS_SECONDS     = 2.0
+
+
+# =============================================================================
+# Streaming JSON array reader
+# =============================================================================
+
+def iter_json_array(path: str, start_offset: int = 0):
+    """Yield (element, end_byte_offset) for each element of a top-level array.
+
+    Memory is bounded by the read chunk plus one element. start_offset must be
+    an offset previously yielded by this function (just after an element).
+    """
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    with open(path, "rb") as f:
+        f.seek(start_offset)
+        buf = ""
+        pos = 0
+        offset = start_offset    # byte offset of buf[pos]
+        state = "open" if start_offset == 0 else "separator"
+        eof = False
+
+        while True:
+            # Skip whitespace; refill when the buffer runs dry.
+            while True:
+                while pos < len(buf) and buf[pos] in " \t\r\n":
+                    offset += 1
+                    pos += 1
+                if pos < len(buf) or eof:
+                    break
+                chunk = f.read(READ_CHUNK_BYTES)
+                eof = not chunk
+                buf = buf[pos:] + utf8.decode(chunk, final=eof)
+                pos = 0
+            if pos >= len(buf):
+                if state in ("open", "first", "item"):
+                    raise ValueError(f"{path}: unexpected end of file")
+                return
+
+            ch = buf[pos]
+            if state == "open":
+                if ch != "[":
+                    raise ValueError(f"{path}: expected a JSON array")
+                state, pos, offset = "first", pos + 1, offset + 1
+                continue
+            if state in ("first", "separator") and ch == "]":
+                return
+            if state == "separator":
+                if ch != ",":
+                    raise ValueError(f"{path}: expected ',' at byte {offset}")
+                state, pos, offset = "item", pos + 1, offset + 1
+                continue
+
+            try:
+                element, end = decoder.raw_decode(buf, pos)
+            except ValueError:
+                if eof:
+                    raise
+                # Element continues past the buffered text: read more.
+                chunk = f.read(READ_CHUNK_BYTES)
+                eof = not chunk
+                buf = buf[pos:] + utf8.decode(chunk, final=eof)
+                pos = 0
+                continue
+            offset += len(buf[pos:end].encode("utf-8"))
+            pos = end
+            state = "separator"
+            yield element, offset
+
+
+# =============================================================================
+# Row normalization
+# =============================================================================
+
+def export_row_to_event(row: dict, min_ms_played: int = IMPORT_MIN_MS_PLAYED):
+    """Telemetry event for one export row, or None for non-track rows and
+    plays shorter than min_ms_played."""
+    if not isinstance(row, dict):
+        return None
+    uri = row.get("spotify_track_uri") or ""
+    title = row.get("master_metadata_track_name") or ""
+    if not uri.startswith("spotify:track:") or not title:
+        return None    # podcast episodes, audiobooks, local files
+    if int(row.get("ms_played") or 0) < min_ms_played:
+        return None
+    played_dt = st.parse_iso_z(row.get("ts") or "")
+    if not played_dt:
+        return None
+
+    artist = row.get("master_metadata_album_artist_name") or "Unknown artist"
+    local_dt = played_dt.astimezone(st.local_tz())
+    return {
+        "track": f"{artist} — {title}",
+        "artist": artist,
+        "title": title,
+        "album": row.get("master_metadata_album_album_name") or "",
+        "uri": uri,
+        "url": f"https://open.spotify.com/track/{uri.rsplit(':', 1)[-1]}",
+        # The export names the album artist only; no artist ids.
+        "artist_ids": [],
+        "played_at_utc": st.utc_iso(played_dt),
+        "played_at_local": local_dt.strftime("%Y-%m-%d %H:%M:%S %Z"),
+        **st.event_time_fields(played_dt),
+        "ms_played": int(row.get("ms_played") or 0),
+    }
+
+
+# =============================================================================
+# Checkpoint
+# =============================================================================
+
+def load_checkpoint(path: str):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            obj = json.load(f)
+        if isinstance(obj, dict) and isinstance(obj.get("files"), dict):
+            return obj
+    except Exception:
+        pass
+    return {"schema_version": 1, "files": {}}
+
+
+def save_checkpoint(path: str, checkpoint: dict):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(checkpoint, f, ensure_ascii=False, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def checkpoint_key(path: str) -> str:
+    # Name + size: a re-exported file with the same name starts over.
+    return f"{os.path.basename(path)}:{os.path.getsize(path)}"
+
+
+# =============================================================================
+# Import
+# =============================================================================
+
+def export_files(paths: list[str]):
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(glob.glob(os.path.join(path, "**", EXPORT_GLOB), recursive=True)))
+        else:
+            files.append(path)
+    return files
+
+
+def import_rollups(manifest: dict):
+    """Rollups to fold imported plays into; built from the journal when
+    missing so that a partial set never replaces the report's rebuild."""
+    rollups = st.load_rollups()
+    if rollups is None:
+        rollups = st.new_rollups()
+        st.rollup_add_events(rollups, st.iter_journal_events(manifest))
+    return rollups
+
+
+def imported_key(entry: dict) -> str:
+    played_at, uri = st.history_event_key(entry)
+    return f"{played_at}|{uri}"
+
+
+def rollup_only_events(manifest: dict, rollups: dict, events: list[dict]):
+    """Fold pre-retention plays into the rollups, skipping those already
+    counted: present in the journal or imported into their rollup day
+    before. Returns the plays folded in."""
+    days = rollups.setdefault("days", {})
+    journal_keys = {}
+    imported = {}
+    fresh = []
+    for entry in sorted(events, key=lambda e: e["played_at_utc"]):
+        segment_id = st.journal_segment_id(entry["played_at_utc"])
+        if segment_id not in journal_keys:
+            journal_keys[segment_id] = {
+                st.history_event_key(e) for e in st.read_journal_segment(segment_id, manifest)
+            }
+        if st.history_event_key(entry) in journal_keys[segment_id]:
+            continue
+        day_key = st.local_day_key(entry["local_day"])
+        if day_key not in imported:
+            imported[day_key] = set((days.get(day_key) or {}).get("imported_keys") or [])
+        key = imported_key(entry)
+        if key in imported[day_key]:
+            continue
+        imported[day_key].add(key)
+        fresh.append(entry)
+
+    st.rollup_add_events(rollups, fresh)
+    for entry in fresh:
+        day_key = st.local_day_key(entry["local_day"])
+        days[day_key]["imported_keys"] = sorted(imported[day_key])
+    return fresh
+
+
+def print_progress(name: str, progress: dict, size: int, final: bool = False):
+    pct = (progress["offset"] / size * 100.0) if size else 100.0
+    print(
+        f"{name}: {pct:5.1f}% | rows {progress['rows']} | imported {progress['imported']} | "
+        f"duplicate {progress['duplicates']} | skipped {progress['skipped']}"
+        + (" | done" if final else ""),
+        file=sys.stderr,
+    )
+
+
+def import_file(path: str, manifest: dict, rollups: dict, checkpoint: dict, args):
+    key = checkpoint_key(path)
+    progress = checkpoint["files"].get(key) or {
+        "offset": 0, "rows": 0, "imported": 0, "duplicates": 0, "skipped": 0, "done": False,
+    }
+    name = os.path.basename(path)
+    if progress.get("done"):
+        print(f"{name}: already imported, skipping", file=sys.stderr)
+        return progress
+    if progress["offset"]:
+        print(f"{name}: resuming at byte {progress['offset']} (row {progress['rows']})", file=sys.stderr)
+
+    size = os.path.getsize(path)
+    retention_cutoff = (
+        st.utc_iso(st.utc_now() - st.timedelta(days=st.HISTORY_RETENTION_DAYS))
+        if st.HISTORY_RETENTION_DAYS > 0 else ""
+    )
+    batch = []
+    last_report = time.monotonic()
+
+    def flush(offset: int):
+        if batch and not args.dry_run:
+            # Plays older than the retention window would be aged out on the
+            # next run; they only go into the (permanent) daily rollups.
+            retained = [e for e in batch if e["played_at_utc"] >= retention_cutoff]
+            aged = [e for e in batch if e["played_at_utc"] < retention_cutoff]
+            appended = st.append_journal_events(manifest, retained)
+            st.rollup_add_events(rollups, appended)
+            rolled = rollup_only_events(manifest, rollups, aged)
+            st.save_journal_manifest(manifest)
+            st.save_rollups(rollups)
+            progress["imported"] += len(appended) + len(rolled)
+            progress["duplicates"] += len(batch) - len(appended) - len(rolled)
+        elif batch:
+            progress["imported"] += len(batch)
+        batch.clear()
+        progress["offset"] = offset
+        if not args.dry_run:
+            checkpoint["files"][key] = dict(progress, updated_utc=st.utc_iso(st.utc_now()))
+            save_checkpoint(args.checkpoint, checkpoint)
+
+    offset = progress["offset"]
+    for row, offset in iter_json_array(path, progress["offset"]):
+        progress["rows"] += 1
+        event = export_row_to_event(row, args.min_ms_played)
+        if event is None:
+            progress["skipped"] += 1
+        else:
+            batch.append(event)
+        if len(batch) >= args.batch_size:
+            flush(offset)
+        if time.monotonic() - last_report >= PROGRESS_SECONDS:
+            progress["offset"] = offset
+            print_progress(name, progress, size)
+            last_report = time.monotonic()
+
+    progress["done"] = True
+    flush(offset)
+    print_progress(name, progress, size, final=True)
+    return progress
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import Spotify extended streaming history into the telemetry journal")
+    parser.add_argument("paths", nargs="+", help=f"export files or directories containing {EXPORT_GLOB}")
+    parser.add_argument("--checkpoint", default=CHECKPOINT_FILE, help="resume checkpoint file")
+    parser.add_argument("--restart", action="store_true", help="ignore the checkpoint and start over")
+    parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_EVENTS)
+    parser.add_argument("--min-ms-played", type=int, default=IMPORT_MIN_MS_PLAYED)
+    parser.add_argument("--dry-run", action="store_true", help="parse and count only; write nothing")
+    args = parser.parse_args()
+
+    if not st.journal_mode():
+        print("Import needs HISTORY_STORAGE_MODE = \"JOURNAL\" (bounded-memory appends).", file=sys.stderr)
+        sys.exit(2)
+
+    files = export_files(args.paths)
+    if not files:
+        print(f"No {EXPORT_GLOB} files found.", file=sys.stderr)
+        sys.exit(1)
+
+    if args.dry_run:
+        # Parse and count only: no legacy migration, no re-encoding and no
+        # rollups, all of which write state.
+        manifest, rollups = st.new_journal_manifest(), None
+    else:
+        # Only the manifest is needed; segments are read one at a time while
+        # deduplicating. A legacy single-file history is migrated once first.
+        manifest = st.load_journal_manifest()
+        if manifest is None:
+            manifest = st.load_history_store()["_journal"]
+        manifest = st.upgrade_journal_encoding(manifest)
+        rollups = import_rollups(manifest)
+    checkpoint = {"schema_version": 1, "files": {}} if args.restart else load_checkpoint(args.checkpoint)
+
+    totals = {"rows": 0, "imported": 0, "duplicates": 0, "skipped": 0}
+    for path in files:
+        progress = import_file(path, manifest, rollups, checkpoint, args)
+        for k in totals:
+            totals[k] += progress.get(k) or 0
+    print(
+        f"Import {'(dry run) ' if args.dry_run else ''}complete: {len(files)} files | "
+        + " | ".join(f"{k} {v}" for k, v in totals.items()),
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+# .github/scripts/spotify_history_query.py
+# Ad-hoc questions against the listening journal, answered from the journal
+# index (see "Journal index" in spotify_telemetry.py) instead of a full scan:
+# time ranges bisect each segment's sorted epochs, artist/playlist filters
+# bisect their postings lists, and only matching lines are read back.
+#
+#   python3 .github/scripts/spotify_history_query.py plays --artist "Radiohead" --month 2026-03
+#   python3 .github/scripts/spotify_history_query.py top-tracks --since 2026-01-01 --until 2026-04-01
+#   python3 .github/scripts/spotify_history_query.py top-artists --playlist "Focus" -n 20
+#
+# Dates are local (LOCAL_TIMEZONE); --until is exclusive.
+
+import argparse
+import sys
+from collections import Counter
+from datetime import datetime
+
+import spotify_telemetry as st
+
+DEFAULT_TOP = 10
+DEFAULT_PLAYS_LIMIT = 50
+
+
+def parse_local_date(value: str) -> datetime:
+    for fmt in ("%Y-%m-%d %H:%M", "%Y-%m-%d", "%Y-%m"):
+        try:
+            return datetime.strptime(value, fmt).replace(tzinfo=st.local_tz())
+        except ValueError:
+            continue
+    raise argparse.ArgumentTypeError(f"expected YYYY-MM-DD[ HH:MM] or YYYY-MM, got {value!r}")
+
+
+def time_bounds(args):
+    """(since_epoch, until_epoch) from --month / --since / --until."""
+    since = args.since
+    until = args.until
+    if args.month:
+        since = parse_local_date(args.month)
+        year, month = (since.year + 1, 1) if since.month == 12 else (since.year, since.month + 1)
+        until = since.replace(year=year, month=month)
+    return (
+        int(since.timestamp()) if since else None,
+        int(until.timestamp()) if until else None,
+    )
+
+
+def resolve_name(wanted: str, names, kind: str) -> str:
+    """Exact match, then case-insensitive, then a unique substring."""
+    if wanted in names:
+        return wanted
+    lowered = wanted.casefold()
+    exact = [n for n in names if n.casefold() == lowered]
+    if len(exact) == 1:
+        return exact[0]
+    partial = sorted(n for n in names if lowered in n.casefold())
+    if len(partial) == 1:
+        return partial[0]
+    if partial:
+        shown = ", ".join(partial[:10]) + (" …" if len(partial) > 10 else "")
+        sys.exit(f"{kind} {wanted!r} is ambiguous: {shown}")
+    sys.exit(f"No {kind} matching {wanted!r} in the index.")
+
+
+def resolve_playlist(wanted: str, index: dict) -> str:
+    names = index["playlist_names"]
+    if wanted in index["playlists"]:
+        return wanted
+    by_name = {}
+    for key, name in names.items():
+        by_name.setdefault(name, key)
+    return by_name[resolve_name(wanted, list(by_name), "playlist")]
+
+
+def cmd_plays(args, index, manifest, matches):
+    # Matches come oldest first; show the newest `limit` plays, newest first.
+    selected = []
+    for segment_id, seg_index, positions in reversed(list(matches)):
+        for pos in reversed(positions):
+            selected.append((segment_id, seg_index["offsets"][pos]))
+            if len(selected) >= args.limit:
+                break
+        if len(selected) >= args.limit:
+            break
+    by_segment = {}
+    for segment_id, offset in selected:
+        by_segment.setdefault(segment_id, []).append(offset)
+    for segment_id, offsets in by_segment.items():
+        for entry in st.read_indexed_events(segment_id, offsets, manifest):
+            playlist = entry.get("playlist_name") or ""
+            print(
+                f"{entry.get('played_at_local') or entry.get('played_at_utc')} | "
+                f"{entry.get('track') or 'N/A'}"
+                + (f" | {playlist}" if playlist else "")
+            )
+    print(f"{len(selected)} plays shown", file=sys.stderr)
+
+
+def cmd_top_tracks(args, index, manifest, matches):
+    counts = Counter()
+    for _, seg_index, positions in matches:
+        tracks, track = seg_index["tracks"], seg_index["track"]
+        counts.update(tracks[track[pos]] for pos in positions)
+    print_ranking(counts, args.top)
+
+
+def cmd_top_artists(args, index, manifest, matches):
+    counts = Counter()
+    for _, seg_index, positions in matches:
+        artists, track = seg_index["track_artists"], seg_index["track"]
+        counts.update(artists[track[pos]] for pos in positions)
+    print_ranking(counts, args.top)
+
+
+def print_ranking(counts: Counter, top: int):
+    total = sum(counts.values())
+    for rank, (name, n) in enumerate(counts.most_common(top), 1):
+        print(f"{rank:>3}. {name} — {n} plays ({n / total * 100:.1f}%)")
+    print(f"{total} plays, {len(counts)} distinct", file=sys.stderr)
+
+
+COMMANDS = {
+    "plays": cmd_plays,
+    "top-tracks": cmd_top_tracks,
+    "top-artists": cmd_top_artists,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Indexed queries over the Spotify listening journal")
+    parser.add_argument("--reindex", action="store_true", help="rebuild the whole index before querying")
+    sub = parser.add_subparsers(dest="command", required=True)
+    for name in COMMANDS:
+        p = sub.add_parser(name)
+        p.add_argument("--since", type=parse_local_date, help="local start (inclusive)")
+        p.add_argument("--until", type=parse_local_date, help="local end (exclusive)")
+        p.add_argument("--month", help="YYYY-MM (overrides --since/--until)")
+        p.add_argument("--artist", help="artist name (exact, case-insensitive or unique substring)")
+        p.add_argument("--playlist", help="playlist name or id")
+        if name == "plays":
+            p.add_argument("--limit", type=int, default=DEFAULT_PLAYS_LIMIT)
+        else:
+            p.add_argument("-n", "--top", type=int, default=DEFAULT_TOP)
+    args = parser.parse_args()
+
+    if not st.journal_mode():
+        sys.exit("Queries need HISTORY_STORAGE_MODE = \"JOURNAL\".")
+    manifest = st.load_journal_manifest()
+    if manifest is None:
+        sys.exit("No listening journal found; run spotify_telemetry.py first.")
+
+    # The index is local and derived: built on first use, then only the
+    # segments appended to since (runs, imports, a fresh pull) are reindexed.
+    index, reindexed = st.refresh_history_index(manifest, force=args.reindex)
+    if reindexed:
+        print(f"reindexed {len(reindexed)} segments", file=sys.stderr)
+
+    since, until = time_bounds(args)
+    artist = resolve_name(args.artist, list(index["artists"]), "artist") if args.artist else None
+    playlist = resolve_playlist(args.playlist, index) if args.playlist else None
+    matches = st.query_history_index(index, since, until, artist=artist, playlist=playlist)
+    COMMANDS[args.command](args, index, manifest, matches)
+
+
+if __name__ == "__main__":
+    main()
@@ -10,6 +10,8 @@ import urllib.request
 import urllib.error
 from datetime import datetime, timezone
 
+from spotify_token_cache import TokenRejected, cached_access_token, invalidate_token
+
 CLIENT_ID = os.environ.get("SPOTIFY_CLIENT_ID", "").strip()
 CLIENT_SECRET = os.environ.get("SPOTIFY_CLIENT_SECRET", "").strip()
 REFRESH_TOKEN = os.environ.get("SPOTIFY_REFRESH_TOKEN", "").strip()
@@ -35,10 +37,15 @@ def http_json(url: str, headers=None, data: bytes | None = None, timeout: int =
         return r.getcode(), dict(r.headers), payload
 
 
-def get_access_token() -> str:
+def get_access_token(force_refresh: bool = False) -> str:
     if not (CLIENT_ID and CLIENT_SECRET and REFRESH_TOKEN):
         raise RuntimeError("Missing Spotify secrets (SPOTIFY_CLIENT_ID / SPOTIFY_CLIENT_SECRET / SPOTIFY_REFRESH_TOKEN).")
 
+    token, _ = cached_access_token(CLIENT_ID, REFRESH_TOKEN, request_access_token, force_refresh=force_refresh)
+    return token
+
+
+def request_access_token():
     auth = base64.b64encode(f"{CLIENT_ID}:{CLIENT_SECRET}".encode()).decode()
     body = urllib.parse.urlencode({
         "grant_type": "refresh_token",
@@ -62,7 +69,7 @@ def get_access_token() -> str:
     if not token:
         raise RuntimeError(f"No access_token in response: {payload}")
 
-    return token
+    return token, payload.get("scope") or "", payload.get("expires_in")
 
 
 def get_currently_playing(access_token: str):
@@ -95,6 +102,8 @@ def get_currently_playing(access_token: str):
     except urllib.error.HTTPError as e:
         if e.code == 204:
             return None
+        if e.code == 401:
+            raise TokenRejected("currently-playing rejected the access token")
         # if playback-state scope is missing/blocked, we still can fall back to recent
         return None
     except Exception:
@@ -102,7 +111,12 @@ def get_currently_playing(access_token: str):
 
 
 def get_recently_played(access_token: str):
-    code, _, payload = http_json(RECENT_URL, headers={"Authorization": f"Bearer {access_token}"}, timeout=25)
+    try:
+        code, _, payload = http_json(RECENT_URL, headers={"Authorization": f"Bearer {access_token}"}, timeout=25)
+    except urllib.error.HTTPError as e:
+        if e.code == 401:
+            raise TokenRejected("recently-played rejected the access token")
+        raise
     if code >= 400:
         raise RuntimeError(f"Spotify recently-played failed: {payload}")
 
@@ -203,19 +217,26 @@ def svg_v1_style(artist: str, title: str, cover_url: str, mode: str, seed: str):
 </svg>'''
 
 
+def fetch_card_data(token: str):
+    current = get_currently_playing(token)
+    if current and current.get("mode") == "PLAYING":
+        return current, "PLAYING"
+    recent = get_recently_played(token)
+    if not recent:
+        raise RuntimeError("Spotify returned no recently-played items (empty history).")
+    return recent, "RECENT"
+
+
 def main():
     token = get_access_token()
 
-    current = get_currently_playing(token)
-    if current and current.get("mode") == "PLAYING":
-        data = current
-        mode = "PLAYING"
-    else:
-        recent = get_recently_played(token)
-        if not recent:
-            raise RuntimeError("Spotify returned no recently-played items (empty history).")
-        data = recent
-        mode = "RECENT"
+    try:
+        data, mode = fetch_card_data(token)
+    except TokenRejected:
+        # A cached token was revoked or expired early: refresh once and retry.
+        invalidate_token()
+        token = get_access_token(force_refresh=True)
+        data, mode = fetch_card_data(token)
 
     svg = svg_v1_style(
         artist=data["artist"],
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+# .github/scripts/spotify_poll_scheduler.py
+# Adaptive poll schedule for the telemetry workflow.
+#
+# /v1/me/player/recently-played only ever exposes the last 50 plays, so a
+# poll gap longer than 50 plays loses history. A fixed cron either wastes
+# runs while nothing is played or risks that overflow during long sessions.
+#
+# After every telemetry run, plan_next_poll() walks forward through the
+# retained hour-of-week play histogram (plus the current play rate while a
+# session is in progress) and picks the next poll time: soon when plays are
+# expected, late when they are not, and always before the expected number of
+# plays reaches POLL_SAFE_PLAYS. The decision is written to
+# spotify_poll_schedule.json; spotify_fastpoll_guard.py reads it on each
+# cron tick and only lets the full run through once it is due.
+
+import json
+import os
+from datetime import datetime, timedelta, timezone
+
+POLL_SCHEDULE_FILE = os.environ.get(
+    "POLL_SCHEDULE_FILE",
+    os.path.join(".github", "state", "spotify_poll_schedule.json"),
+).strip()
+POLL_SCHEDULE_SCHEMA_VERSION = 1
+
+# Ventana de recently-played: nunca esperar a que se acumulen más de
+# POLL_SAFE_PLAYS reproducciones esperadas (margen para la varianza).
+RECENT_WINDOW_PLAYS          = 50
+POLL_SAFE_PLAYS              = RECENT_WINDOW_PLAYS * 3 // 5
+
+POLL_TICK_MINUTES            = 60    # periodo del cron que consulta el guard
+POLL_MAX_INTERVAL_MINUTES    = 4 * 60
+POLL_ACTIVE_INTERVAL_MINUTES = 60    # tope mientras hay (o suele haber) reproducción
+POLL_ACTIVE_RATE             = 2.0   # plays/hora desde la cual una franja se considera activa
+POLL_HISTORY_DAYS            = 56    # semanas de historial usadas para el histograma
+POLL_RECENT_HOURS            = 2     # horas en que domina la tasa reciente si hay sesión abierta
+
+
+def utc_iso(dt: datetime) -> str:
+    return dt.astimezone(timezone.utc).strftime("%Y-%m-%d %H:%M:%SZ")
+
+
+def slot_rate(matrix, weeks: float, dt: datetime, tz) -> float:
+    """Expected plays per hour in dt's hour-of-week slot."""
+    local_dt = dt.astimezone(tz)
+    return matrix[local_dt.weekday()][local_dt.hour] / max(1.0, weeks)
+
+
+def rate_segments(matrix, weeks: float, now: datetime, tz, minutes: int, recent_rate: float, session_active: bool):
+    """(start_minute, length_minutes, plays_per_hour) up to `minutes` ahead,
+    split at local hour boundaries."""
+    minute = 0
+    while minute < minutes:
+        t = now + timedelta(minutes=minute)
+        rate = slot_rate(matrix, weeks, t, tz)
+        if session_active and minute < POLL_RECENT_HOURS * 60:
+            rate = max(rate, recent_rate)
+        step = min(60 - t.astimezone(tz).minute, minutes - minute)
+        yield minute, step, rate
+        minute += step
+
+
+def plan_next_poll(
+    matrix,
+    weeks: float,
+    now: datetime,
+    tz,
+    recent_rate: float = 0.0,
+    session_active: bool = False,
+):
+    """Next poll decision from the hour-of-week histogram.
+
+    matrix          : 7x24 play counts (Mon=0, local hours) over `weeks` weeks
+    recent_rate     : plays per hour over the last POLL_RECENT_HOURS
+    session_active  : a play happened within the session gap
+    """
+    # The guard fires on cron ticks, so a decision can run up to one tick
+    # late: the expected plays up to next_run + tick must fit the budget.
+    limit = POLL_MAX_INTERVAL_MINUTES + POLL_TICK_MINUTES
+    horizon = limit
+    expected = 0.0
+    for minute, step, rate in rate_segments(matrix, weeks, now, tz, limit, recent_rate, session_active):
+        gained = rate * step / 60.0
+        if expected + gained >= POLL_SAFE_PLAYS:
+            horizon = minute + (POLL_SAFE_PLAYS - expected) / rate * 60.0
+            break
+        expected += gained
+
+    interval = horizon - POLL_TICK_MINUTES
+    reason = "budget" if horizon < limit else "idle_max"
+    current_rate = slot_rate(matrix, weeks, now, tz)
+    if session_active or current_rate >= POLL_ACTIVE_RATE:
+        if interval > POLL_ACTIVE_INTERVAL_MINUTES:
+            interval = POLL_ACTIVE_INTERVAL_MINUTES
+            reason = "session_active" if session_active else "active_slot"
+    interval = max(0, int(interval))
+    # Worst case the guard lets the run through one tick after next_run.
+    worst_case = sum(
+        rate * step / 60.0
+        for _, step, rate in rate_segments(
+            matrix, weeks, now, tz, interval + POLL_TICK_MINUTES, recent_rate, session_active
+        )
+    )
+
+    return {
+        "schema_version": POLL_SCHEDULE_SCHEMA_VERSION,
+        "computed_utc": utc_iso(now),
+        "next_run_utc": utc_iso(now + timedelta(minutes=interval)),
+        "interval_minutes": interval,
+        "expected_plays": round(worst_case, 2),
+        "reason": reason,
+        "slot_rate": round(current_rate, 2),
+        "recent_rate": round(recent_rate, 2),
+        "session_active": bool(session_active),
+        "weeks_observed": round(weeks, 2),
+    }
+
+
+def load_poll_schedule(path: str = POLL_SCHEDULE_FILE):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            obj = json.load(f)
+        if isinstance(obj, dict) and obj.get("next_run_utc"):
+            return obj
+    except Exception:
+        pass
+    return None
+
+
+def save_poll_schedule(schedule: dict, path: str = POLL_SCHEDULE_FILE):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(json.dumps(schedule, ensure_ascii=False, indent=2, sort_keys=True) + "\n")
+
+
+def poll_due(schedule, now: datetime | None = None) -> bool:
+    """True when the scheduled poll time has come. A missing or unreadable
+    schedule is always due: skipping a run is only safe with a plan."""
+    now = now or datetime.now(timezone.utc)
+    if not schedule:
+        return True
+    try:
+        next_run = datetime.strptime(schedule["next_run_utc"], "%Y-%m-%d %H:%M:%SZ").replace(tzinfo=timezone.utc)
+    except (KeyError, TypeError, ValueError):
+        return True
+    return now >= next_run
@@ -2,19 +2,50 @@
 # .github/scripts/spotify_telemetry.py
 # v4.0 — persistent historical telemetry + past-oriented analytics
 
+import argparse
 import base64
+import bisect
+import http.client
+import io
 import json
+import math
 import os
 import re
+import signal
 import statistics
 import sys
+import threading
+import time
 import urllib.parse
 import urllib.request
 import urllib.error
-from collections import Counter
-from datetime import datetime, timezone, timedelta
+from collections import Counter, deque
+from collections.abc import Mapping, MutableMapping
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import date, datetime, timezone, timedelta
+from itertools import chain
 from zoneinfo import ZoneInfo
 
+from spotify_poll_scheduler import (
+    POLL_HISTORY_DAYS,
+    POLL_RECENT_HOURS,
+    load_poll_schedule,
+    plan_next_poll,
+    poll_due,
+    save_poll_schedule,
+)
+from spotify_token_cache import cached_access_token, invalidate_token
+
+# README block engine shared with the widget scripts in scripts/.
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "scripts"))
+from readme_blocks import ReadmeBlocks
+
+try:
+    import numpy as np
+except ImportError:  # optional: columnar analytics engine
+    np = None
+
 # =============================================================================
 # TOGGLES (set True/False) — keep these at top, clear and surgical
 # =============================================================================
@@ -48,6 +79,8 @@ SHOW_HOURLY_HEATMAP       = True
 SHOW_SESSION_ESTIMATES    = True
 SHOW_WEEK_ACTIVITY        = True
 SHOW_WEEKLY_HOUR_MATRIX   = True
+SHOW_LONG_HORIZON         = True   # 90d / 365d / all-time from daily rollups
+SHOW_LISTENING_TIME       = True   # minutes per hour / day / artist / genre (track durations)
 
 # ---- Formatting sub-toggles ----
 SCOPE_MODE                = "COMPACT"   # "WRAP" | "COMPACT" | "OFF"
@@ -57,8 +90,34 @@ LOCAL_TIMEZONE            = "America/Santiago"
 # ---- Behavior toggles ----
 FAIL_SAFE_DO_NOT_BREAK_README = True
 WRITE_STATE_FILE              = True
+WRITE_POLL_SCHEDULE           = True   # next-run decision for spotify_fastpoll_guard.py
 OBS_WINDOW_SECONDS            = 30 * 60
 
+# ---- Watcher (--watch) ----
+# Proceso residente: sondeo liviano del player y escrituras de README/estado
+# agrupadas. El heartbeat sigue spotify_poll_schedule.json.
+WATCH_ACTIVE_POLL_SECONDS = 60    # mientras hay reproducción
+WATCH_IDLE_POLL_SECONDS   = 300   # sin reproducción
+WATCH_DEBOUNCE_SECONDS    = 180   # cambios dentro de esta ventana → una sola escritura
+WATCH_ERROR_BACKOFF_MAX   = 900   # backoff exponencial tope ante errores de red/API
+
+# ---- History storage ----
+# "FILE"    : legacy single JSON document (spotify_listening_history.json)
+# "JOURNAL" : append-only JSONL segments, one per month, plus a small manifest.
+#             The legacy file keeps only non-event state (contexts, caches).
+HISTORY_STORAGE_MODE          = "JOURNAL"
+
+# Raw events older than this many days are aged out once folded into the
+# daily rollups (0 = keep every raw event). Aggregates are never lost.
+HISTORY_RETENTION_DAYS        = 0
+
+# Player/device context snapshots: ring buffer bounded by count and age.
+# Evicted snapshots are compacted into per-day device/volume summaries.
+PLAYBACK_CONTEXT_MAX_SNAPSHOTS = 200
+PLAYBACK_CONTEXT_MAX_DAYS      = 14
+# Registros de sesión persistidos (inicio, fin, tracks, artista, playlist, dispositivo)
+SESSION_LOG_MAX_SESSIONS       = 5000
+
 # ---- Debug (GitHub Actions only) ----
 DEBUG_ACTIONS        = True
 DEBUG_DUMP_PAYLOADS  = False   # keep False (privacy)
@@ -66,7 +125,40 @@ DEBUG_DUMP_PAYLOADS  = False   # keep False (privacy)
 # ---- Heuristics / safety caps ----
 SESSION_GAP_MINUTES       = 25
 MAX_RECENT_ITEMS          = 50
-MAX_ARTIST_LOOKUPS        = 80
+RECENT_MAX_PAGES          = 5    # pages of 50 fetched forward from the `after` cursor
+# Genre lookups use /v1/artists?ids= (up to 50 ids per request); the cap is
+# a budget of HTTP requests per run, not of artists.
+MAX_ARTIST_LOOKUP_REQUESTS = 4
+ARTIST_BATCH_SIZE         = 50
+ARTIST_LOOKUP_WORKERS     = 4
+
+# Artist genre cache (dedicated store, outside the report state)
+GENRE_CACHE_TTL_DAYS          = 30   # refresh resolved genres after this age
+GENRE_CACHE_NEGATIVE_TTL_DAYS = 7    # retry unknown artists / empty genres after this age
+GENRE_CACHE_MAX_ENTRIES       = 3000 # LRU eviction above this size
+
+# Duraciones de canciones vía /v1/tracks?ids= (hasta 50 ids por request). El tope
+# es de requests por corrida; lo que quede pendiente se resuelve en la siguiente.
+MAX_TRACK_LOOKUP_REQUESTS        = 2
+TRACK_BATCH_SIZE                 = 50
+DURATION_CACHE_NEGATIVE_TTL_DAYS = 7      # reintentar tracks no encontrados tras esta edad
+DURATION_CACHE_MAX_ENTRIES       = 20000  # se descartan las más antiguas sobre este tamaño
+
+# Ventanas analíticas calculadas en una sola pasada sobre el historial.
+# (label, seconds) — 24h, 7d y 30d son obligatorias para el reporte. La ventana
+# más amplia fija cuánto journal lee cada corrida: 90d / 365d salen de los
+# rollups diarios, no de eventos crudos.
+ANALYTICS_WINDOWS = (
+    ("1h", 3600),
+    ("24h", 24 * 3600),
+    ("7d", 7 * 86400),
+    ("30d", 30 * 86400),
+)
+
+# Motor analítico: "AUTO" usa NumPy (si está instalado) desde COLUMNAR_MIN_EVENTS
+# eventos; "NUMPY" siempre que esté disponible; "PYTHON" nunca. Mismo resultado.
+ANALYTICS_ENGINE          = "AUTO"
+COLUMNAR_MIN_EVENTS       = 20000
 
 # Cantidad de canciones recientes mostradas/guardadas (1-50)
 RECENT_HISTORY_LIMIT      = 41
@@ -74,11 +166,20 @@ RECENT_HISTORY_LIMIT      = 41
 # Cantidad de playlists recientes (cambios de contexto) mostradas
 PLAYLIST_HISTORY_LIMIT    = 10
 
+# Caché de metadatos de playlists
+PLAYLIST_CACHE_TTL_DAYS   = 14   # refrescar nombres resueltos tras esta edad
+PLAYLIST_MISS_RETRY_HOURS = 24   # reintento base de playlists no expuestas (backoff x2, máx x8)
+
 # ---- ASCII/Unicode visual analytics ----
 ANALYTICS_BAR_WIDTH       = 18
 VOLUME_BAR_WIDTH          = 12
 SHOW_VOLUME_BAR           = True
 
+# ---- Run instrumentation ----
+RUN_LOG_ENABLED           = True   # per-phase timings / HTTP / cache stats → spotify_run_log.json
+RUN_LOG_MAX_RUNS          = 500    # rolling history kept in the run log
+SHOW_ENDPOINT_PERCENTILES = True   # p50/p95 endpoint latency (run log) in the API block
+
 # =============================================================================
 # Config / files
 # =============================================================================
@@ -100,6 +201,24 @@ STATE_DIR     = ".github/state"
 STATE_FILE    = os.path.join(STATE_DIR, "spotify_last_report.json")
 HISTORY_FILE  = os.path.join(STATE_DIR, "spotify_listening_history.json")
 DEBUG_FILE    = os.path.join(STATE_DIR, "spotify_debug.json")
+GENRE_CACHE_FILE = os.path.join(STATE_DIR, "spotify_artist_genres.json")
+TRACK_DURATION_FILE = os.path.join(STATE_DIR, "spotify_track_durations.json")
+ROLLUP_FILE      = os.path.join(STATE_DIR, "spotify_daily_rollups.json")
+ROLLUP_SCHEMA_VERSION = 1
+SESSION_FILE     = os.path.join(STATE_DIR, "spotify_sessions.json")
+SESSION_SCHEMA_VERSION = 1
+RUN_LOG_FILE     = os.path.join(STATE_DIR, "spotify_run_log.json")
+RUN_LOG_SCHEMA_VERSION = 1
+
+HISTORY_JOURNAL_DIR   = os.path.join(STATE_DIR, "spotify_history")
+HISTORY_MANIFEST_FILE = os.path.join(HISTORY_JOURNAL_DIR, "manifest.json")
+HISTORY_CATALOG_FILE  = os.path.join(HISTORY_JOURNAL_DIR, "catalog.json")
+HISTORY_INDEX_DIR     = os.path.join(STATE_DIR, "spotify_history_index")   # derived, git-ignored
+HISTORY_INDEX_FILE    = os.path.join(HISTORY_INDEX_DIR, "index.json")
+HISTORY_INDEX_SCHEMA_VERSION = 1
+JOURNAL_SCHEMA_VERSION = 2
+JOURNAL_SEGMENT_FILE_RE = re.compile(r"events-(\d{4}-\d{2})\.jsonl")
+CATALOG_SCHEMA_VERSION = 1
 
 ARTIST_CACHE_KEY = "artist_genre_cache"
 LAST_SUCCESSFUL_REPORT_KEY = "last_successful_report"
@@ -111,8 +230,9 @@ LAST_VOLUME_STATE_KEY = "last_known_volume_percent"
 LAST_VOLUME_TELEMETRY_STATE_KEY = "last_known_volume_telemetry"
 HISTORICAL_SNAPSHOT_STATE_KEY = "historical_listening_snapshot"
 LAST_DEVICE_CAPTURED_UTC_KEY = "last_known_device_captured_utc"
-HISTORY_SCHEMA_VERSION = 1
+HISTORY_SCHEMA_VERSION = 2
 PLAYLIST_CACHE_KEY = "playlist_cache"
+RECENT_CURSOR_KEY = "recently_played_after_ms"
 
 # =============================================================================
 # Helpers
@@ -162,14 +282,117 @@ def local_tz():
         return timezone.utc
 
 
+EPOCH_DATE = date(1970, 1, 1)
+
+
+def event_time_fields(played_dt: datetime):
+    """Integer time fields stored on every history event (schema v2).
+
+    played_at_epoch : UTC seconds since the Unix epoch
+    local_day       : days since 1970-01-01 in LOCAL_TIMEZONE
+    local_hour      : 0-23 in LOCAL_TIMEZONE
+    weekday         : 0=Mon … 6=Sun in LOCAL_TIMEZONE
+    """
+    local_dt = played_dt.astimezone(local_tz())
+    return {
+        "played_at_epoch": int(played_dt.timestamp()),
+        "local_day": (local_dt.date() - EPOCH_DATE).days,
+        "local_hour": local_dt.hour,
+        "weekday": local_dt.weekday(),
+    }
+
+
+def ensure_event_time_fields(entry: dict, force: bool = False) -> bool:
+    """Lazily backfill the v2 time fields; True when the entry was changed."""
+    if (
+        not force
+        and isinstance(entry.get("played_at_epoch"), int)
+        and isinstance(entry.get("local_day"), int)
+    ):
+        return False
+    played_dt = parse_iso_z(entry.get("played_at_utc") or "")
+    if not played_dt:
+        return False
+    entry.update(event_time_fields(played_dt))
+    return True
+
+
+def event_epoch(entry: dict):
+    epoch = entry.get("played_at_epoch")
+    if isinstance(epoch, int):
+        return epoch
+    ensure_event_time_fields(entry)
+    return entry.get("played_at_epoch")
+
+
+def local_day_of(dt: datetime) -> int:
+    return (dt.astimezone(local_tz()).date() - EPOCH_DATE).days
+
+
+# Persistent HTTPS connections (one per host and thread), enabled by the
+# watcher: a resident process reuses TLS sessions instead of reconnecting for
+# every request. Cron runs keep the plain one-shot urllib path.
+HTTP_KEEPALIVE = {"enabled": False}
+HTTP_CONNECTIONS = threading.local()
+
+
+def keepalive_request(req: urllib.request.Request, timeout: int):
+    parsed = urllib.parse.urlsplit(req.full_url)
+    pool = HTTP_CONNECTIONS.__dict__.setdefault("by_host", {})
+    path = parsed.path + (f"?{parsed.query}" if parsed.query else "")
+    connection_cls = http.client.HTTPSConnection if parsed.scheme == "https" else http.client.HTTPConnection
+    for attempt in (1, 2):
+        conn = pool.get(parsed.netloc)
+        if conn is None:
+            conn = pool[parsed.netloc] = connection_cls(parsed.netloc, timeout=timeout)
+        conn.timeout = timeout
+        if conn.sock is not None:
+            conn.sock.settimeout(timeout)
+        try:
+            conn.request(req.get_method(), path, body=req.data, headers=dict(req.header_items()))
+            resp = conn.getresponse()
+            return resp.status, resp.reason, resp.headers, resp.read()
+        except (http.client.HTTPException, OSError):
+            # The server closed an idle connection: reconnect once.
+            conn.close()
+            pool.pop(parsed.netloc, None)
+            if attempt == 2:
+                raise
+
+
+def close_keepalive_connections():
+    for conn in HTTP_CONNECTIONS.__dict__.pop("by_host", {}).values():
+        conn.close()
+
+
+def open_url(req: urllib.request.Request, timeout: int):
+    """(status, headers, body); raises HTTPError for 4xx/5xx like urlopen."""
+    if not HTTP_KEEPALIVE["enabled"]:
+        with urllib.request.urlopen(req, timeout=timeout) as r:
+            return r.status, r.headers, r.read()
+    status, reason, headers, body = keepalive_request(req, timeout)
+    if status >= 400:
+        raise urllib.error.HTTPError(req.full_url, status, reason, headers, io.BytesIO(body))
+    return status, headers, body
+
+
 def http_json(url: str, headers=None, data: bytes | None = None, timeout: int = 25):
     headers = headers or {}
     req = urllib.request.Request(url, headers=headers, data=data)
-    with urllib.request.urlopen(req, timeout=timeout) as r:
-        body = r.read().decode("utf-8", "replace")
-        if not body.strip():
-            return r.status, dict(r.headers), None
-        return r.status, dict(r.headers), json.loads(body)
+    started = time.perf_counter()
+    status, raw = -1, b""
+    try:
+        status, resp_headers, raw = open_url(req, timeout)
+        resp_headers = dict(resp_headers)
+    except urllib.error.HTTPError as e:
+        status = e.code
+        raise
+    finally:
+        record_http(url, status, len(raw), started)
+    body = raw.decode("utf-8", "replace")
+    if not body.strip():
+        return status, resp_headers, None
+    return status, resp_headers, json.loads(body)
 
 
 def dlog(msg: str):
@@ -179,6 +402,144 @@ def dlog(msg: str):
         print(f"[SPOTIFY_DEBUG] {msg}", file=sys.stderr)
 
 
+# =============================================================================
+# Run instrumentation
+# build_report() wraps each phase in trace_phase(). Every round trip made via
+# http_json() / fetch_json_endpoint() is recorded with status, bytes received
+# and wall time, and is attributed to every phase open when it completed
+# (phase figures are inclusive of nested phases). main() appends the trace of
+# each run to a rolling, machine-readable run log.
+# =============================================================================
+
+RUN_TRACE = {"started": None, "phases": [], "http": [], "depth": 0}
+RUN_TRACE_LOCK = threading.Lock()
+
+ENDPOINT_LABELS = (
+    ("/me/player/recently-played", "recent"),
+    ("/me/player/currently-playing", "current"),
+    ("/me/player", "player"),
+    ("/v1/artists", "artists"),
+    ("/v1/tracks", "tracks"),
+    ("/v1/playlists/", "playlists"),
+)
+
+
+def reset_run_trace():
+    with RUN_TRACE_LOCK:
+        RUN_TRACE.clear()
+        RUN_TRACE.update({"started": time.perf_counter(), "phases": [], "http": [], "depth": 0})
+
+
+def endpoint_label(url: str) -> str:
+    if url.startswith(AUTH_URL):
+        return "token"
+    path = urllib.parse.urlsplit(url).path
+    for marker, label in ENDPOINT_LABELS:
+        if path.startswith(marker):
+            return label
+    return "other"
+
+
+def record_http(url: str, status: int, nbytes: int, started: float):
+    call = {
+        "endpoint": endpoint_label(url),
+        "http": status,
+        "bytes": nbytes,
+        "ms": round((time.perf_counter() - started) * 1000.0, 1),
+    }
+    with RUN_TRACE_LOCK:
+        RUN_TRACE.setdefault("http", []).append(call)
+
+
+def summarize_http(calls: list[dict]):
+    statuses = Counter(str(c["http"]) for c in calls)
+    return {
+        "requests": len(calls),
+        "bytes": sum(c["bytes"] for c in calls),
+        "http": dict(sorted(statuses.items())),
+    }
+
+
+@contextmanager
+def trace_phase(name: str):
+    """Time a phase; callers may annotate the yielded dict (e.g. "cache")."""
+    with RUN_TRACE_LOCK:
+        http_start = len(RUN_TRACE.setdefault("http", []))
+        phase = {"name": name, "depth": RUN_TRACE.get("depth", 0)}
+        RUN_TRACE["depth"] = phase["depth"] + 1
+    started = time.perf_counter()
+    try:
+        yield phase
+    finally:
+        phase["ms"] = round((time.perf_counter() - started) * 1000.0, 1)
+        with RUN_TRACE_LOCK:
+            calls = RUN_TRACE["http"][http_start:]
+            RUN_TRACE["depth"] = phase["depth"]
+            if calls:
+                phase.update(summarize_http(calls))
+            RUN_TRACE.setdefault("phases", []).append(phase)
+
+
+def load_run_log():
+    try:
+        with open(RUN_LOG_FILE, "r", encoding="utf-8") as f:
+            log = json.load(f)
+        if not isinstance(log, dict) or not isinstance(log.get("runs"), list):
+            raise ValueError("run log root is not an object")
+    except Exception:
+        log = {"schema_version": RUN_LOG_SCHEMA_VERSION, "runs": []}
+    return log
+
+
+def run_log_entry(outcome: str):
+    with RUN_TRACE_LOCK:
+        calls = list(RUN_TRACE.get("http") or [])
+        started = RUN_TRACE.get("started")
+        entry = {
+            "run_utc": RUN_TRACE.get("run_utc") or utc_iso(utc_now()),
+            "outcome": outcome,
+            "total_ms": round((time.perf_counter() - started) * 1000.0, 1) if started else None,
+            "endpoint_ms": RUN_TRACE.get("endpoint_ms") or {},
+            "phases": list(RUN_TRACE.get("phases") or []),
+        }
+    by_endpoint = {}
+    for call in calls:
+        by_endpoint.setdefault(call["endpoint"], []).append(call)
+    entry["http"] = dict(
+        summarize_http(calls),
+        endpoints={
+            label: dict(summarize_http(group), ms=round(sum(c["ms"] for c in group), 1))
+            for label, group in sorted(by_endpoint.items())
+        },
+    )
+    return entry
+
+
+def save_run_log(outcome: str):
+    if not (RUN_LOG_ENABLED and WRITE_STATE_FILE):
+        return
+    try:
+        log = load_run_log()
+        log["schema_version"] = RUN_LOG_SCHEMA_VERSION
+        log["runs"] = (log["runs"] + [run_log_entry(outcome)])[-max(1, RUN_LOG_MAX_RUNS):]
+        os.makedirs(STATE_DIR, exist_ok=True)
+        with open(RUN_LOG_FILE, "w", encoding="utf-8") as f:
+            f.write('{"schema_version": %d, "runs": [\n' % log["schema_version"])
+            f.write(",\n".join(json.dumps(run, ensure_ascii=False, sort_keys=True) for run in log["runs"]))
+            f.write("\n]}\n")
+    except OSError as e:
+        # Instrumentation must never fail a telemetry run.
+        dlog(f"run log not written: {e}")
+
+
+def percentile(values, pct: float):
+    """Nearest-rank percentile of a non-empty sequence, else None."""
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    return ordered[max(1, math.ceil(pct / 100.0 * len(ordered))) - 1]
+
+
 class SpotifyAuthError(Exception):
     def __init__(self, reason: str, detail: str = ""):
         self.reason = reason
@@ -186,6 +547,11 @@ class SpotifyAuthError(Exception):
         super().__init__(f"{reason}: {detail}")
 
 
+# Auth failures no retry can fix. Any other SpotifyAuthError (network error,
+# 5xx from accounts.spotify.com) may clear up on its own.
+FATAL_AUTH_REASONS = ("SPOTIFY_SECRETS_MISSING", "SPOTIFY_REFRESH_TOKEN")
+
+
 def load_state():
     try:
         with open(STATE_FILE, "r", encoding="utf-8") as f:
@@ -200,7 +566,14 @@ def save_state(obj: dict):
         json.dump(obj, f, ensure_ascii=False, indent=2)
 
 
-def load_history_store():
+def journal_mode() -> bool:
+    return str(HISTORY_STORAGE_MODE).upper() == "JOURNAL"
+
+
+def load_history_store(since: datetime | None = None):
+    """History store; in JOURNAL mode only the segments from `since` on are
+    read into events (every segment when None). FILE mode always reads the
+    whole document."""
     try:
         with open(HISTORY_FILE, "r", encoding="utf-8") as f:
             obj = json.load(f)
@@ -213,14 +586,77 @@ def load_history_store():
     obj.setdefault("updated_utc", None)
     obj.setdefault("events", [])
     obj.setdefault("playback_context", [])
+    obj.setdefault("playback_context_daily", {})
     obj.setdefault(PLAYLIST_CACHE_KEY, {})
+
+    # Snapshots used to be stored newest-first (list.insert(0, ...)); the ring
+    # keeps them in append order so adding one is O(1).
+    contexts = [c for c in obj.get("playback_context") or [] if isinstance(c, dict)]
+    if obj.get("playback_context_order") != "append":
+        contexts.reverse()
+        obj["playback_context_order"] = "append"
+    obj["playback_context"] = deque(contexts)
+
+    # Local-time fields depend on LOCAL_TIMEZONE; recompute them if it moved.
+    tz_changed = obj.get("local_timezone") not in (None, LOCAL_TIMEZONE)
+    backfill_history_events(obj.get("events") or [], force=tz_changed)
+
+    if journal_mode():
+        manifest = load_journal_manifest()
+        if manifest is None:
+            # The legacy events are gone once migrated: a lost manifest is
+            # rebuilt from the segments, never re-migrated over them.
+            if journal_segment_files():
+                manifest = rebuild_journal_manifest()
+            else:
+                manifest = migrate_history_file_to_journal(obj)
+        manifest = upgrade_journal_encoding(manifest)
+        # A timezone change rewrites the local fields of every segment, so
+        # that one run reads the whole journal.
+        if tz_changed:
+            since = None
+        obj["events"] = load_journal_events(manifest, since)
+        obj["storage_mode"] = "journal"
+        # Runtime-only keys (leading underscore) are never persisted.
+        obj["_journal"] = manifest
+        obj["_history_since"] = since
+        obj["_backfilled_segments"] = sorted({
+            journal_segment_id(e.get("played_at_utc") or "")
+            for e in obj["events"]
+            if ensure_event_time_fields(e, force=tz_changed)
+        })
+    obj["local_timezone"] = LOCAL_TIMEZONE
     return obj
 
 
+def backfill_history_events(events: list[dict], force: bool = False) -> int:
+    changed = 0
+    for entry in events:
+        if isinstance(entry, dict) and ensure_event_time_fields(entry, force=force):
+            changed += 1
+    return changed
+
+
 def save_history_store(obj: dict):
     os.makedirs(STATE_DIR, exist_ok=True)
+    if journal_mode():
+        manifest = obj.get("_journal") or load_journal_manifest() or new_journal_manifest()
+        backfilled = obj.get("_backfilled_segments") or []
+        if backfilled:
+            rewrite_journal_segments(backfilled, obj.get("events") or [], manifest)
+            obj["_backfilled_segments"] = []
+        append_journal_events(manifest, obj.get("_new_events") or [])
+        obj["_new_events"] = []
+        save_journal_manifest(manifest)
+        persisted = {
+            k: v for k, v in obj.items()
+            if k != "events" and not k.startswith("_")
+        }
+    else:
+        persisted = {k: v for k, v in obj.items() if not k.startswith("_")}
+    persisted["playback_context"] = list(obj.get("playback_context") or [])
     with open(HISTORY_FILE, "w", encoding="utf-8") as f:
-        json.dump(obj, f, ensure_ascii=False, indent=2)
+        json.dump(persisted, f, ensure_ascii=False, indent=2)
 
 
 def history_event_key(entry: dict):
@@ -230,52 +666,987 @@ def history_event_key(entry: dict):
     )
 
 
+# =============================================================================
+# Segmented event journal
+# Events are appended as compact JSONL lines to one segment per month
+# (keyed on played_at_utc), so a run only touches the segments that received
+# new plays and git diffs stay proportional to the number of new events.
+# =============================================================================
+
+def new_journal_manifest():
+    return {
+        "schema_version": JOURNAL_SCHEMA_VERSION,
+        "partition": "month",
+        "encoding": "catalog",
+        "events_total": 0,
+        "segments": {},
+    }
+
+
+def journal_segment_id(played_at_utc: str) -> str:
+    # played_at_utc is always "YYYY-MM-DD HH:MM:SSZ"; the month prefix is the
+    # partition key, no datetime parsing needed.
+    return (played_at_utc or "")[:7]
+
+
+def journal_segment_path(segment_id: str) -> str:
+    return os.path.join(HISTORY_JOURNAL_DIR, f"events-{segment_id}.jsonl")
+
+
+def load_journal_manifest():
+    try:
+        with open(HISTORY_MANIFEST_FILE, "r", encoding="utf-8") as f:
+            obj = json.load(f)
+        if not isinstance(obj, dict) or not isinstance(obj.get("segments"), dict):
+            return None
+    except Exception:
+        return None
+    return obj
+
+
+def save_journal_manifest(manifest: dict):
+    os.makedirs(HISTORY_JOURNAL_DIR, exist_ok=True)
+    save_journal_catalog(journal_catalog(manifest))
+    manifest["events_total"] = sum(
+        int(seg.get("events") or 0) for seg in manifest.get("segments", {}).values()
+    )
+    persisted = {k: v for k, v in manifest.items() if not k.startswith("_")}
+    with open(HISTORY_MANIFEST_FILE, "w", encoding="utf-8") as f:
+        json.dump(persisted, f, ensure_ascii=False, indent=2, sort_keys=True)
+
+
+def decode_journal_line(line: str, catalog: dict):
+    """Event for one journal line; None for blank, truncated or dangling lines."""
+    line = line.strip()
+    if not line:
+        return None
+    try:
+        entry = json.loads(line)
+    except ValueError:
+        # A truncated trailing line must not poison the segment.
+        return None
+    if isinstance(entry, list):
+        if (
+            len(entry) >= JOURNAL_RECORD_FIELDS
+            and 0 <= entry[REC_TRACK] < len(catalog["_tracks"])
+            and entry[REC_CONTEXT] < len(catalog["_contexts"])
+        ):
+            return JournalEvent(entry, catalog)
+        return None
+    if isinstance(entry, dict):
+        # Schema 1 lines (full event objects) are still readable.
+        return entry
+    return None
+
+
+def read_journal_segment(segment_id: str, manifest: dict | None = None):
+    catalog = journal_catalog(manifest) if manifest is not None else load_journal_catalog()
+    try:
+        with open(journal_segment_path(segment_id), "r", encoding="utf-8") as f:
+            for line in f:
+                entry = decode_journal_line(line, catalog)
+                if entry is not None:
+                    yield entry
+    except FileNotFoundError:
+        return
+
+
+# =============================================================================
+# Journal catalog (dictionary encoding)
+# Track, artist and context strings are stored once in catalog.json; journal
+# lines are compact records of the play timestamp, its time fields and
+# integer references into those tables. Tables are append-only, so a
+# reference never changes meaning and catalog diffs are pure additions (a
+# track row only ever gains its duration once it becomes known).
+# JournalEvent expands a record against the catalog field by field on access.
+# =============================================================================
+
+# Record layout: [played_at_utc, played_at_epoch, local_day, local_hour,
+# weekday, track_ref, context_ref (-1 = none), {per-event fields}?]
+REC_PLAYED_AT, REC_EPOCH, REC_DAY, REC_HOUR, REC_WEEKDAY, REC_TRACK, REC_CONTEXT, REC_EXTRA = range(8)
+JOURNAL_RECORD_FIELDS = 7
+RECORD_FIELD_INDEX = {
+    "played_at_utc": REC_PLAYED_AT,
+    "played_at_epoch": REC_EPOCH,
+    "local_day": REC_DAY,
+    "local_hour": REC_HOUR,
+    "weekday": REC_WEEKDAY,
+}
+TRACK_FIELDS = ("uri", "artist", "title", "album", "url")
+CONTEXT_FIELDS = (
+    "context_type", "context_uri", "context_url",
+    "playlist_id", "playlist_name", "playlist_uri", "playlist_url",
+)
+EVENT_FIELD_ORDER = (
+    "track", "artist", "title", "album", "uri", "url", "artist_ids", "duration_ms",
+    "played_at_utc", "played_at_local", "played_at_epoch", "local_day",
+    "local_hour", "weekday",
+) + CONTEXT_FIELDS
+
+_MISSING = object()
+
+
+def local_display_time(played_at_utc: str):
+    played_dt = parse_iso_z(played_at_utc or "")
+    if not played_dt:
+        return None
+    return played_dt.astimezone(local_tz()).strftime("%Y-%m-%d %H:%M:%S %Z")
+
+
+class JournalEvent(MutableMapping):
+    """A catalog-encoded journal record behaving like the event dict.
+
+    Writes (e.g. a time-field backfill) land in the per-event overrides and
+    are folded back into the record when the segment is rewritten.
+    """
+
+    __slots__ = ("record", "catalog", "extra")
+
+    def __init__(self, record: list, catalog: dict):
+        self.record = record
+        self.catalog = catalog
+        self.extra = record[REC_EXTRA] if len(record) > REC_EXTRA and isinstance(record[REC_EXTRA], dict) else None
+
+    def get(self, key, default=None):
+        extra = self.extra
+        if extra is not None and key in extra:
+            return extra[key]
+        if key in RECORD_FIELD_INDEX:
+            return self.record[RECORD_FIELD_INDEX[key]]
+        track = self.catalog["_tracks"][self.record[REC_TRACK]]
+        if key in track:
+            return track[key]
+        context_ref = self.record[REC_CONTEXT]
+        if context_ref >= 0:
+            context = self.catalog["_contexts"][context_ref]
+            if key in context:
+                return context[key]
+        if key == "played_at_local":
+            return local_display_time(self.record[REC_PLAYED_AT])
+        return default
+
+    def __getitem__(self, key):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        if self.extra is None:
+            self.extra = {}
+        self.extra[key] = value
+
+    def __delitem__(self, key):
+        if self.extra is None or key not in self.extra:
+            raise KeyError(key)
+        del self.extra[key]
+
+    def __iter__(self):
+        seen = set()
+        for key in EVENT_FIELD_ORDER:
+            if self.get(key, _MISSING) is not _MISSING:
+                seen.add(key)
+                yield key
+        for key in self.extra or ():
+            if key not in seen:
+                yield key
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return f"JournalEvent({dict(self)!r})"
+
+
+def new_journal_catalog():
+    catalog = {
+        "schema_version": CATALOG_SCHEMA_VERSION,
+        "artists": [],
+        "tracks": [],
+        "contexts": [],
+    }
+    index_journal_catalog(catalog)
+    return catalog
+
+
+def index_journal_catalog(catalog: dict):
+    """Build the runtime lookups and expanded rows (underscore keys)."""
+    artists = catalog["artists"]
+    catalog["_artist_index"] = {aid: ref for ref, aid in enumerate(artists)}
+    catalog["_tracks"] = []
+    catalog["_track_index"] = {}
+    for row in catalog["tracks"]:
+        expand_catalog_track(catalog, row)
+    catalog["_contexts"] = []
+    catalog["_context_index"] = {}
+    for row in catalog["contexts"]:
+        expand_catalog_context(catalog, row)
+    catalog["_dirty"] = False
+    return catalog
+
+
+def catalog_track_key(entry) -> str:
+    uri = entry.get("uri")
+    if uri:
+        return uri
+    return "\x1f".join(str(entry.get(k) or "") for k in ("artist", "title", "album"))
+
+
+def expand_catalog_track(catalog: dict, row: list):
+    # row: [uri, artist, title, album, url, [artist_refs], duration_ms?];
+    # None = field absent.
+    track = {k: v for k, v in zip(TRACK_FIELDS, row) if v is not None}
+    if row[5] is not None:
+        track["artist_ids"] = [catalog["artists"][ref] for ref in row[5]]
+    if len(row) > 6 and row[6] is not None:
+        track["duration_ms"] = row[6]
+    if "artist" in track and "title" in track:
+        track["track"] = f"{track['artist']} — {track['title']}"
+    catalog["_track_index"][catalog_track_key(track)] = len(catalog["_tracks"])
+    catalog["_tracks"].append(track)
+
+
+def expand_catalog_context(catalog: dict, row: list):
+    context = {k: v for k, v in zip(CONTEXT_FIELDS, row) if v is not None}
+    catalog["_context_index"][tuple(row)] = len(catalog["_contexts"])
+    catalog["_contexts"].append(context)
+
+
+def load_journal_catalog():
+    try:
+        with open(HISTORY_CATALOG_FILE, "r", encoding="utf-8") as f:
+            catalog = json.load(f)
+        if not isinstance(catalog, dict) or not all(
+            isinstance(catalog.get(k), list) for k in ("artists", "tracks", "contexts")
+        ):
+            raise ValueError("catalog root is not an object")
+    except Exception:
+        return new_journal_catalog()
+    return index_journal_catalog(catalog)
+
+
+def journal_catalog(manifest: dict):
+    """The catalog bound to a manifest, loaded on first use (runtime key)."""
+    catalog = manifest.get("_catalog")
+    if catalog is None:
+        catalog = load_journal_catalog()
+        manifest["_catalog"] = catalog
+    return catalog
+
+
+def save_journal_catalog(catalog: dict):
+    if not catalog.get("_dirty"):
+        return
+    os.makedirs(HISTORY_JOURNAL_DIR, exist_ok=True)
+    tmp = HISTORY_CATALOG_FILE + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        # One row per line: appends show up as added lines in git diffs.
+        f.write('{"schema_version": %d,\n' % CATALOG_SCHEMA_VERSION)
+        for i, table in enumerate(("artists", "tracks", "contexts")):
+            rows = ",\n".join(
+                json.dumps(row, ensure_ascii=False, separators=(",", ":")) for row in catalog[table]
+            )
+            f.write(f'"{table}": [\n{rows}\n]' + (",\n" if i < 2 else "}\n"))
+    os.replace(tmp, HISTORY_CATALOG_FILE)
+    catalog["_dirty"] = False
+
+
+def catalog_track_ref(catalog: dict, entry) -> int:
+    key = catalog_track_key(entry)
+    ref = catalog["_track_index"].get(key)
+    duration_ms = entry.get("duration_ms")
+    if ref is not None:
+        track = catalog["_tracks"][ref]
+        if duration_ms and "duration_ms" not in track:
+            row = catalog["tracks"][ref]
+            row[6:] = [duration_ms]
+            track["duration_ms"] = duration_ms
+            catalog["_dirty"] = True
+        return ref
+    artist_refs = None
+    artist_ids = entry.get("artist_ids")
+    if isinstance(artist_ids, list):
+        artist_refs = []
+        for aid in artist_ids:
+            aref = catalog["_artist_index"].get(aid)
+            if aref is None:
+                aref = len(catalog["artists"])
+                catalog["artists"].append(aid)
+                catalog["_artist_index"][aid] = aref
+            artist_refs.append(aref)
+    row = [entry.get(k) for k in TRACK_FIELDS] + [artist_refs]
+    if duration_ms:
+        row.append(duration_ms)
+    catalog["tracks"].append(row)
+    expand_catalog_track(catalog, row)
+    catalog["_dirty"] = True
+    return catalog["_track_index"][key]
+
+
+def catalog_context_ref(catalog: dict, entry) -> int:
+    row = [entry.get(k) for k in CONTEXT_FIELDS]
+    if all(v is None for v in row):
+        return -1
+    ref = catalog["_context_index"].get(tuple(row))
+    if ref is None:
+        ref = len(catalog["contexts"])
+        catalog["contexts"].append(row)
+        expand_catalog_context(catalog, row)
+        catalog["_dirty"] = True
+    return ref
+
+
+def encode_journal_event(catalog: dict, entry) -> list:
+    """Journal record for an event; fields the catalog cannot reproduce
+    exactly (renamed tracks, other-timezone local stamps, extra keys) are
+    kept per event."""
+    ensure_event_time_fields(entry)
+    record = [
+        entry.get("played_at_utc"),
+        entry.get("played_at_epoch"),
+        entry.get("local_day"),
+        entry.get("local_hour"),
+        entry.get("weekday"),
+        catalog_track_ref(catalog, entry),
+        catalog_context_ref(catalog, entry),
+    ]
+    decoded = JournalEvent(record, catalog)
+    extra = {k: v for k, v in entry.items() if decoded.get(k, _MISSING) != v}
+    if extra:
+        record.append(extra)
+    return record
+
+
+def journal_segments_since(manifest: dict, cutoff: datetime | None = None):
+    segment_ids = sorted((manifest or {}).get("segments", {}))
+    if cutoff is None:
+        return segment_ids
+    first = cutoff.astimezone(timezone.utc).strftime("%Y-%m")
+    return [seg for seg in segment_ids if seg >= first]
+
+
+def iter_journal_events(manifest: dict, cutoff: datetime | None = None):
+    """Stream events from only the segments that can overlap [cutoff, now]."""
+    for segment_id in journal_segments_since(manifest, cutoff):
+        yield from read_journal_segment(segment_id, manifest)
+
+
+def load_journal_events(manifest: dict, cutoff: datetime | None = None):
+    cutoff_s = utc_iso(cutoff) if cutoff else ""
+    events = [
+        e for e in iter_journal_events(manifest, cutoff)
+        if (e.get("played_at_utc") or "") >= cutoff_s
+    ]
+    # "YYYY-MM-DD HH:MM:SSZ" sorts lexicographically in time order.
+    events.sort(key=lambda e: e.get("played_at_utc") or "", reverse=True)
+    return events
+
+
+def history_load_cutoff(now: datetime) -> datetime:
+    """Oldest play a report run reads from the journal: the widest analytics
+    window (or the poll histogram span, if wider), rounded down to the start
+    of its UTC month so that every segment read is read whole."""
+    seconds = max([s for _, s in analytics_windows()] + [POLL_HISTORY_DAYS * 86400])
+    oldest = (now - timedelta(seconds=seconds)).astimezone(timezone.utc)
+    return oldest.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def extend_history_store(store: dict, since: datetime):
+    """Read the segments between `since` and the store's current lower bound
+    into its events (a merge is about to reach plays older than the window)."""
+    loaded = store.get("_history_since")
+    if loaded is None or since >= loaded:
+        return
+    since = since.astimezone(timezone.utc).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    stop = loaded.strftime("%Y-%m")
+    manifest = store["_journal"]
+    older = [
+        e
+        for segment_id in journal_segments_since(manifest, since)
+        if segment_id < stop
+        for e in read_journal_segment(segment_id, manifest)
+    ]
+    older.sort(key=lambda e: e.get("played_at_utc") or "", reverse=True)
+    # Every added play is older than the loaded ones: newest-first holds.
+    store["events"] = (store.get("events") or []) + older
+    store["_history_since"] = since
+
+
+def all_history_events(store: dict):
+    """Every retained event. A store loaded with a window streams the whole
+    journal segment by segment, plus the merged plays not appended yet."""
+    if store.get("_history_since") is None:
+        return store.get("events") or []
+    manifest = store["_journal"]
+    return chain(iter_journal_events(manifest), store.get("_new_events") or [])
+
+
+def segment_playlist_events(segment_id: str, manifest: dict) -> int:
+    return sum(
+        1 for e in read_journal_segment(segment_id, manifest)
+        if e.get("context_type") == "playlist"
+    )
+
+
+def history_totals(store: dict):
+    """Retained events, oldest play and playlist plays of the whole history.
+    Windowed journal stores answer from the manifest's per-segment counts
+    instead of the loaded events."""
+    if store.get("_history_since") is None:
+        events = store.get("events") or []
+        return {
+            "events": len(events),
+            "oldest_utc": events[-1].get("played_at_utc") if events else None,
+            "playlist_events": sum(1 for e in events if e.get("context_type") == "playlist"),
+        }
+    manifest = store["_journal"]
+    new_events = store.get("_new_events") or []
+    segments = manifest.get("segments") or {}
+    playlist_events = sum(1 for e in new_events if e.get("context_type") == "playlist")
+    for segment_id, meta in segments.items():
+        if "playlist_events" not in meta:
+            # Segments written before the count existed: counted once here,
+            # kept up to date by append_journal_events() from then on.
+            meta["playlist_events"] = segment_playlist_events(segment_id, manifest)
+        playlist_events += int(meta.get("playlist_events") or 0)
+    stamps = [meta.get("oldest_utc") for meta in segments.values() if meta.get("events")]
+    stamps += [e.get("played_at_utc") for e in new_events]
+    stamps = [stamp for stamp in stamps if stamp]
+    return {
+        "events": sum(int(meta.get("events") or 0) for meta in segments.values()) + len(new_events),
+        "oldest_utc": min(stamps) if stamps else None,
+        "playlist_events": playlist_events,
+    }
+
+
+def append_journal_events(manifest: dict, events: list[dict]):
+    by_segment = {}
+    for entry in events:
+        if not isinstance(entry, Mapping):
+            continue
+        key = history_event_key(entry)
+        if not key[0]:
+            continue
+        by_segment.setdefault(journal_segment_id(key[0]), []).append(entry)
+
+    appended = []
+    if not by_segment:
+        return appended
+
+    os.makedirs(HISTORY_JOURNAL_DIR, exist_ok=True)
+    catalog = journal_catalog(manifest)
+    segments = manifest.setdefault("segments", {})
+    pending = []
+    for segment_id in sorted(by_segment):
+        # An event's key fixes its segment, so deduplicating against that one
+        # segment is equivalent to deduplicating against the whole journal.
+        seen = {history_event_key(e) for e in read_journal_segment(segment_id, manifest)}
+        fresh = []
+        for entry in sorted(by_segment[segment_id], key=lambda e: e.get("played_at_utc") or ""):
+            key = history_event_key(entry)
+            if key in seen:
+                continue
+            seen.add(key)
+            fresh.append(entry)
+        if fresh:
+            pending.append((segment_id, [encode_journal_event(catalog, e) for e in fresh], fresh))
+
+    # Catalog rows first: a journal line must never reference a row that is
+    # not on disk yet.
+    save_journal_catalog(catalog)
+    for segment_id, records, fresh in pending:
+        with open(journal_segment_path(segment_id), "a", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n")
+
+        meta = segments.setdefault(segment_id, {
+            "file": os.path.basename(journal_segment_path(segment_id)),
+            "events": 0,
+            "oldest_utc": None,
+            "newest_utc": None,
+            "playlist_events": 0,
+        })
+        meta["events"] = int(meta.get("events") or 0) + len(fresh)
+        if "playlist_events" in meta:
+            meta["playlist_events"] += sum(1 for e in fresh if e.get("context_type") == "playlist")
+        stamps = [e.get("played_at_utc") for e in fresh]
+        meta["oldest_utc"] = min([s for s in stamps + [meta.get("oldest_utc")] if s])
+        meta["newest_utc"] = max([s for s in stamps + [meta.get("newest_utc")] if s])
+        appended.extend(fresh)
+    return appended
+
+
+def rewrite_journal_segments(segment_ids: list[str], events: list[dict], manifest: dict):
+    """Rewrite whole segments from in-memory events (one-time schema backfill)."""
+    catalog = journal_catalog(manifest)
+    wanted = set(segment_ids)
+    by_segment = {seg: [] for seg in wanted}
+    for entry in events:
+        seg = journal_segment_id(entry.get("played_at_utc") or "")
+        if seg in wanted:
+            by_segment[seg].append(entry)
+    encoded = {}
+    for seg, entries in by_segment.items():
+        if entries:
+            entries.sort(key=lambda e: e.get("played_at_utc") or "")
+            encoded[seg] = [encode_journal_event(catalog, e) for e in entries]
+    save_journal_catalog(catalog)
+    for seg, records in encoded.items():
+        path = journal_segment_path(seg)
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n")
+        os.replace(tmp, path)
+
+
+def upgrade_journal_encoding(manifest: dict):
+    """One-time rewrite of schema 1 segments (full event objects per line)
+    into catalog-encoded records."""
+    if int(manifest.get("schema_version") or 1) >= JOURNAL_SCHEMA_VERSION:
+        return manifest
+    segment_ids = sorted(manifest.get("segments") or {})
+    events = load_journal_events(manifest)
+    rewrite_journal_segments(segment_ids, events, manifest)
+    manifest["schema_version"] = JOURNAL_SCHEMA_VERSION
+    manifest["encoding"] = "catalog"
+    save_journal_manifest(manifest)
+    dlog(f"history journal re-encoded: {len(events)} events, {len(segment_ids)} segments")
+    return manifest
+
+
+def journal_segment_files():
+    """Segment ids of the events-YYYY-MM.jsonl files on disk."""
+    try:
+        names = os.listdir(HISTORY_JOURNAL_DIR)
+    except FileNotFoundError:
+        return []
+    return sorted(
+        m.group(1) for m in map(JOURNAL_SEGMENT_FILE_RE.fullmatch, names) if m
+    )
+
+
+def rebuild_journal_manifest():
+    """Manifest recounted from the segment files (manifest.json missing or
+    unreadable). Fails if a segment cannot be decoded, e.g. without its catalog."""
+    manifest = new_journal_manifest()
+    segments = manifest["segments"]
+    for segment_id in journal_segment_files():
+        path = journal_segment_path(segment_id)
+        stamps = []
+        playlist_events = 0
+        for entry in read_journal_segment(segment_id, manifest):
+            if not isinstance(entry, JournalEvent):
+                # Schema 1 lines: upgrade_journal_encoding() re-encodes them.
+                manifest["schema_version"] = 1
+            stamps.append(entry.get("played_at_utc") or "")
+            playlist_events += entry.get("context_type") == "playlist"
+        if not stamps:
+            if os.path.getsize(path):
+                raise RuntimeError(f"history journal: cannot decode {path}; manifest not rebuilt")
+            continue
+        stamps = [stamp for stamp in stamps if stamp]
+        segments[segment_id] = {
+            "file": os.path.basename(path),
+            "events": len(stamps),
+            "oldest_utc": min(stamps) if stamps else None,
+            "newest_utc": max(stamps) if stamps else None,
+            "playlist_events": playlist_events,
+        }
+    manifest["rebuilt_utc"] = utc_iso(utc_now())
+    save_journal_manifest(manifest)
+    dlog(f"history journal manifest rebuilt: {len(segments)} segments")
+    return manifest
+
+
+def migrate_history_file_to_journal(obj: dict):
+    """One-time move of the legacy single-file event list into segments."""
+    manifest = new_journal_manifest()
+    legacy = [e for e in (obj.get("events") or []) if isinstance(e, dict)]
+    append_journal_events(manifest, legacy)
+    manifest["migrated_utc"] = utc_iso(utc_now())
+    manifest["migrated_events"] = len(legacy)
+    save_journal_manifest(manifest)
+    dlog(f"history journal migration: {len(legacy)} events → {len(manifest['segments'])} segments")
+    return manifest
+
+
+# =============================================================================
+# Journal index
+# Derived lookups for spotify_history_query.py, built on demand by the query
+# CLI outside the committed journal (git-ignored). Each segment gets
+# index-YYYY-MM.json: its plays in time order (epochs plus the byte offset of
+# each line) with artist and playlist postings lists. index.json maps every
+# artist and playlist to the segments it appears in. Time ranges bisect the
+# epochs, filters bisect the postings, and only the matched lines are read
+# back. A segment is reindexed only when its file size changes.
+# =============================================================================
+
+def new_history_index():
+    return {
+        "schema_version": HISTORY_INDEX_SCHEMA_VERSION,
+        "segments": {},
+        "artists": {},
+        "playlists": {},
+        "playlist_names": {},
+    }
+
+
+def history_index_segment_path(segment_id: str) -> str:
+    return os.path.join(HISTORY_INDEX_DIR, f"index-{segment_id}.json")
+
+
+def load_history_index():
+    try:
+        with open(HISTORY_INDEX_FILE, "r", encoding="utf-8") as f:
+            obj = json.load(f)
+        if (
+            isinstance(obj, dict)
+            and obj.get("schema_version") == HISTORY_INDEX_SCHEMA_VERSION
+            and isinstance(obj.get("segments"), dict)
+        ):
+            for key in ("artists", "playlists", "playlist_names"):
+                obj.setdefault(key, {})
+            return obj
+    except Exception:
+        pass
+    return new_history_index()
+
+
+def save_history_index(index: dict):
+    os.makedirs(HISTORY_INDEX_DIR, exist_ok=True)
+    tmp = HISTORY_INDEX_FILE + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        # One segment / artist / playlist per line: reindexing a month only
+        # touches the lines that mention it.
+        f.write('{"schema_version": %d' % HISTORY_INDEX_SCHEMA_VERSION)
+        for table in ("segments", "artists", "playlists", "playlist_names"):
+            rows = ",\n".join(
+                json.dumps(key, ensure_ascii=False) + ": "
+                + json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+                for key, value in sorted(index[table].items())
+            )
+            f.write(f',\n"{table}": {{\n{rows}\n}}')
+        f.write("}\n")
+    os.replace(tmp, HISTORY_INDEX_FILE)
+
+
+def build_segment_index(segment_id: str, manifest: dict):
+    """Time-ordered index of one journal segment (None if the file is gone)."""
+    catalog = journal_catalog(manifest)
+    rows = []
+    offset = 0
+    try:
+        with open(journal_segment_path(segment_id), "rb") as f:
+            for raw in f:
+                entry = decode_journal_line(raw.decode("utf-8", errors="replace"), catalog)
+                if entry is not None:
+                    epoch = event_epoch(entry)
+                    if epoch is not None:
+                        rows.append((epoch, offset, entry))
+                offset += len(raw)
+    except FileNotFoundError:
+        return None
+    rows.sort(key=lambda row: row[:2])
+
+    tracks, track_artists, track_index = [], [], {}
+    track_refs, artists, playlists, playlist_names = [], {}, {}, {}
+    for pos, (_, _, entry) in enumerate(rows):
+        artist = entry.get("artist") or "Unknown artist"
+        track = entry.get("track") or "N/A"
+        ref = track_index.get((track, artist))
+        if ref is None:
+            ref = track_index[(track, artist)] = len(tracks)
+            tracks.append(track)
+            track_artists.append(artist)
+        track_refs.append(ref)
+        artists.setdefault(artist, []).append(pos)
+        if entry.get("context_type") == "playlist":
+            # Same playlist key as playlist_history_from_events().
+            key = entry.get("playlist_id") or entry.get("playlist_uri") or entry.get("playlist_name")
+            if key:
+                playlists.setdefault(key, []).append(pos)
+                playlist_names[key] = entry.get("playlist_name") or playlist_names.get(key) or key
+
+    return {
+        "schema_version": HISTORY_INDEX_SCHEMA_VERSION,
+        "segment": segment_id,
+        "size": offset,
+        "epochs": [row[0] for row in rows],
+        "offsets": [row[1] for row in rows],
+        "track": track_refs,
+        "tracks": tracks,
+        "track_artists": track_artists,
+        "artists": artists,
+        "playlists": playlists,
+        "playlist_names": playlist_names,
+    }
+
+
+def save_segment_index(seg_index: dict):
+    path = history_index_segment_path(seg_index["segment"])
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write("{" + ",\n".join(
+            json.dumps(key) + ": " + json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+            for key, value in seg_index.items()
+        ) + "}\n")
+    os.replace(tmp, path)
+
+
+def load_segment_index(index: dict, segment_id: str):
+    loaded = index.setdefault("_loaded", {})
+    if segment_id not in loaded:
+        try:
+            with open(history_index_segment_path(segment_id), "r", encoding="utf-8") as f:
+                loaded[segment_id] = json.load(f)
+        except Exception:
+            loaded[segment_id] = None
+    return loaded[segment_id]
+
+
+def refresh_history_index(manifest: dict, index: dict | None = None, force: bool = False):
+    """Reindex the journal segments whose file changed since they were
+    indexed and drop the ones no longer in the journal. Returns the index
+    and the reindexed segment ids."""
+    index = index or load_history_index()
+    segments = index["segments"]
+    journal_segments = manifest.get("segments") or {}
+    stale = []
+    for segment_id in sorted(journal_segments):
+        try:
+            size = os.path.getsize(journal_segment_path(segment_id))
+        except OSError:
+            continue
+        meta = segments.get(segment_id)
+        if (
+            force
+            or not meta
+            or meta.get("size") != size
+            or not os.path.exists(history_index_segment_path(segment_id))
+        ):
+            stale.append(segment_id)
+    gone = [
+        seg for seg in segments
+        if seg not in journal_segments or not os.path.exists(journal_segment_path(seg))
+    ]
+    if not stale and not gone:
+        return index, []
+
+    changed = set(stale) | set(gone)
+    for table in ("artists", "playlists"):
+        for key, segment_ids in list(index[table].items()):
+            kept = [seg for seg in segment_ids if seg not in changed]
+            if kept:
+                index[table][key] = kept
+            else:
+                del index[table][key]
+    loaded = index.setdefault("_loaded", {})
+    for segment_id in gone:
+        segments.pop(segment_id, None)
+        loaded.pop(segment_id, None)
+        try:
+            os.remove(history_index_segment_path(segment_id))
+        except OSError:
+            pass
+
+    os.makedirs(HISTORY_INDEX_DIR, exist_ok=True)
+    for segment_id in stale:
+        seg_index = build_segment_index(segment_id, manifest)
+        if seg_index is None:
+            continue
+        save_segment_index(seg_index)
+        loaded[segment_id] = seg_index
+        epochs = seg_index["epochs"]
+        segments[segment_id] = {
+            "size": seg_index["size"],
+            "events": len(epochs),
+            "oldest_epoch": epochs[0] if epochs else None,
+            "newest_epoch": epochs[-1] if epochs else None,
+        }
+        for table in ("artists", "playlists"):
+            for key in seg_index[table]:
+                bisect.insort(index[table].setdefault(key, []), segment_id)
+        index["playlist_names"].update(seg_index["playlist_names"])
+    index["playlist_names"] = {
+        key: name for key, name in index["playlist_names"].items() if key in index["playlists"]
+    }
+    save_history_index(index)
+    return index, stale
+
+
+def history_index_segments(index: dict, since_epoch=None, until_epoch=None):
+    """Indexed segment ids with plays in [since, until), oldest first."""
+    return [
+        segment_id for segment_id, meta in sorted(index["segments"].items())
+        if meta.get("events")
+        and (since_epoch is None or meta["newest_epoch"] >= since_epoch)
+        and (until_epoch is None or meta["oldest_epoch"] < until_epoch)
+    ]
+
+
+def index_positions(seg_index: dict, since_epoch=None, until_epoch=None, postings=None):
+    """Time-ordered positions of a segment's plays in [since, until),
+    optionally restricted to a postings list. Both bounds are bisected."""
+    epochs = seg_index["epochs"]
+    if postings is None:
+        lo = 0 if since_epoch is None else bisect.bisect_left(epochs, since_epoch)
+        hi = len(epochs) if until_epoch is None else bisect.bisect_left(epochs, until_epoch)
+        return range(lo, hi)
+    lo = 0 if since_epoch is None else bisect.bisect_left(postings, since_epoch, key=epochs.__getitem__)
+    hi = len(postings) if until_epoch is None else bisect.bisect_left(postings, until_epoch, key=epochs.__getitem__)
+    return postings[lo:hi]
+
+
+def query_history_index(index: dict, since_epoch=None, until_epoch=None, artist=None, playlist=None):
+    """Yield (segment_id, segment_index, positions) for the indexed plays in
+    [since, until), filtered by exact artist name and/or playlist key."""
+    candidates = history_index_segments(index, since_epoch, until_epoch)
+    for key, table in ((artist, "artists"), (playlist, "playlists")):
+        if key is not None:
+            allowed = set(index[table].get(key) or ())
+            candidates = [seg for seg in candidates if seg in allowed]
+
+    for segment_id in candidates:
+        seg_index = load_segment_index(index, segment_id)
+        if seg_index is None:
+            continue
+        if artist is None and playlist is None:
+            positions = index_positions(seg_index, since_epoch, until_epoch)
+        else:
+            lists = [
+                seg_index[table].get(key) or []
+                for key, table in ((artist, "artists"), (playlist, "playlists"))
+                if key is not None
+            ]
+            lists.sort(key=len)
+            positions = index_positions(seg_index, since_epoch, until_epoch, lists[0])
+            if len(lists) > 1:
+                other = set(lists[1])
+                positions = [pos for pos in positions if pos in other]
+        if positions:
+            yield segment_id, seg_index, positions
+
+
+def read_indexed_events(segment_id: str, offsets, manifest: dict):
+    """Events at the given line offsets of a segment, read by seeking."""
+    catalog = journal_catalog(manifest)
+    with open(journal_segment_path(segment_id), "rb") as f:
+        for offset in offsets:
+            f.seek(offset)
+            entry = decode_journal_line(f.readline().decode("utf-8", errors="replace"), catalog)
+            if entry is not None:
+                yield entry
+
+
 def merge_history_events(store: dict, new_events: list[dict], now_s: str):
+    """Merge new plays into the newest-first history without a full re-sort.
+
+    A new play can only collide with (or sit between) retained events at or
+    after its own timestamp, which form a prefix of the sorted history. Only
+    that prefix is deduplicated and re-ordered; the tail is reused as is.
+    """
     existing = store.get("events") or []
-    merged = {}
-    for entry in existing + new_events:
+    incoming = {}
+    for entry in new_events:
         if not isinstance(entry, dict):
             continue
         key = history_event_key(entry)
-        if not key[0]:
+        if not key[0] or event_epoch(entry) is None:
             continue
-        merged[key] = entry
-    events = sorted(
-        merged.values(),
-        key=lambda e: parse_iso_z(e.get("played_at_utc") or "")
-        or datetime.min.replace(tzinfo=timezone.utc),
-        reverse=True,
-    )
+        incoming[key] = entry
+
+    added = []
+    events = existing
+    if incoming:
+        oldest_new = min(event_epoch(e) for e in incoming.values())
+        split = bisect.bisect_right(existing, -oldest_new, key=lambda e: -(event_epoch(e) or 0))
+        prefix = []
+        for entry in existing[:split]:
+            key = history_event_key(entry)
+            # Same key: the fresher observation replaces the retained one.
+            prefix.append(incoming.pop(key) if key in incoming else entry)
+        added = list(incoming.values())
+        prefix.extend(added)
+        prefix.sort(key=lambda e: event_epoch(e) or 0, reverse=True)
+        events = prefix + existing[split:]
+
     store["events"] = events
+    # Plays not seen before this merge; the journal appends exactly these.
+    store["_new_events"] = (store.get("_new_events") or []) + added
     store["schema_version"] = HISTORY_SCHEMA_VERSION
     store["created_utc"] = store.get("created_utc") or now_s
     store["updated_utc"] = now_s
     return events
 
 
-def append_playback_context(store: dict, snapshot: dict):
-    contexts = store.get("playback_context") or []
+def append_playback_context(store: dict, snapshot: dict, now: datetime | None = None):
+    contexts = store.get("playback_context")
+    if not isinstance(contexts, deque):
+        contexts = deque(contexts or [])
     # Preserve every materially distinct observed context while avoiding
     # identical snapshots produced by consecutive scheduled runs.
     signature_fields = (
         "is_playing", "track", "device_type", "device_name",
         "volume_percent", "volume_telemetry", "playback_state",
     )
-    previous = contexts[0] if contexts else None
+    previous = contexts[-1] if contexts else None
     changed = not previous or any(
         previous.get(k) != snapshot.get(k) for k in signature_fields
     )
     if changed:
-        contexts.insert(0, snapshot)
+        contexts.append(snapshot)
     store["playback_context"] = contexts
+    compact_playback_context(store, now or utc_now())
     return contexts
 
 
+def compact_playback_context(store: dict, now: datetime):
+    """Evict snapshots beyond the count/age caps into per-day summaries."""
+    contexts = store.get("playback_context")
+    daily = store.setdefault("playback_context_daily", {})
+    cutoff_s = utc_iso(now - timedelta(days=PLAYBACK_CONTEXT_MAX_DAYS))
+    evicted = 0
+    while contexts and (
+        len(contexts) > PLAYBACK_CONTEXT_MAX_SNAPSHOTS
+        or (contexts[0].get("captured_utc") or "") < cutoff_s
+    ):
+        snapshot = contexts.popleft()
+        captured = parse_iso_z(snapshot.get("captured_utc") or "")
+        day_key = captured.astimezone(local_tz()).date().isoformat() if captured else "unknown"
+        day = daily.setdefault(day_key, {
+            "snapshots": 0,
+            "playing": 0,
+            "devices": {},
+            "volume_min": None,
+            "volume_max": None,
+            "volume_sum": 0,
+            "volume_samples": 0,
+        })
+        day["snapshots"] += 1
+        if snapshot.get("is_playing"):
+            day["playing"] += 1
+        if snapshot.get("device_type") or snapshot.get("device_name"):
+            device = " · ".join(
+                str(x) for x in (snapshot.get("device_type"), snapshot.get("device_name")) if x
+            )
+            day["devices"][device] = day["devices"].get(device, 0) + 1
+        volume = snapshot.get("volume_percent")
+        if isinstance(volume, (int, float)):
+            day["volume_min"] = volume if day["volume_min"] is None else min(day["volume_min"], volume)
+            day["volume_max"] = volume if day["volume_max"] is None else max(day["volume_max"], volume)
+            day["volume_sum"] += volume
+            day["volume_samples"] += 1
+        evicted += 1
+    return evicted
+
+
 def filter_history_window(events: list[dict], cutoff: datetime):
+    cutoff_ts = cutoff.timestamp()
     out = []
     for entry in events:
-        dt = parse_iso_z(entry.get("played_at_utc") or "")
-        if dt and dt >= cutoff:
+        epoch = event_epoch(entry)
+        if epoch is not None and epoch >= cutoff_ts:
             out.append(entry)
     return out
 
@@ -283,102 +1654,803 @@ def filter_history_window(events: list[dict], cutoff: datetime):
 def hour_hist_from_history(events: list[dict]):
     hist = [0] * 24
     for entry in events:
-        dt = parse_iso_z(entry.get("played_at_utc") or "")
-        if not dt:
+        if event_epoch(entry) is None:
             continue
-        hist[dt.astimezone(local_tz()).hour] += 1
+        hist[entry["local_hour"]] += 1
     return hist
 
 
 def week_activity_from_history(events: list[dict]):
     counts = [0] * 7
     for entry in events:
-        dt = parse_iso_z(entry.get("played_at_utc") or "")
-        if dt:
-            counts[dt.astimezone(local_tz()).weekday()] += 1
+        if event_epoch(entry) is not None:
+            counts[entry["weekday"]] += 1
     return counts
 
 
 def weekly_hour_matrix_from_history(events: list[dict]):
     matrix = [[0] * 24 for _ in range(7)]
     for entry in events:
-        dt = parse_iso_z(entry.get("played_at_utc") or "")
-        if not dt:
+        if event_epoch(entry) is None:
             continue
-        local_dt = dt.astimezone(local_tz())
-        matrix[local_dt.weekday()][local_dt.hour] += 1
+        matrix[entry["weekday"]][entry["local_hour"]] += 1
     return matrix
 
 
 def daily_activity_series(events: list[dict], days: int, now: datetime):
     if days <= 0:
         return []
-    tz = local_tz()
-    today = now.astimezone(tz).date()
-    start = today - timedelta(days=days - 1)
+    start = local_day_of(now) - (days - 1)
     counts = [0] * days
     for entry in events:
-        dt = parse_iso_z(entry.get("played_at_utc") or "")
-        if not dt:
+        if event_epoch(entry) is None:
             continue
-        day = dt.astimezone(tz).date()
-        offset = (day - start).days
+        offset = entry["local_day"] - start
         if 0 <= offset < days:
             counts[offset] += 1
     return counts
 
 
-def build_auth_watch_block(
-    refresh_token_state: str,
-    user_action_required: str,
-    secret_to_update: str = "NONE",
-    last_good_utc: str | None = None,
-):
-    client_id_state = "CONFIGURED" if CLIENT_ID else "MISSING"
-    client_secret_state = "CONFIGURED" if CLIENT_SECRET else "NOT SET (PKCE OPTIONAL)"
-    out = []
-    out.append("AUTHORIZATION WATCH")
-    out.append("------------------------------------------------------------")
-    out.append(f"Client ID state           : {client_id_state}")
-    out.append(f"Client secret state       : {client_secret_state}")
-    out.append(f"Refresh token state       : {refresh_token_state}")
-    out.append(f"User action required      : {user_action_required}")
-    out.append(f"Secret to update          : {secret_to_update}")
-    out.append("Recovery repository       : felipealfonsog/felipealfonsog.github.io")
-    out.append("Recovery workflow         : update-spotify-callback.yml")
-    out.append("Callback page             : https://felipealfonsog.github.io/spotify-callback.html")
-    if str(user_action_required).upper() == "YES":
-        out.append("Recovery step 1           : Run Update Spotify Callback")
-        out.append("Recovery step 2           : Enter Spotify Client ID")
-        out.append("Recovery step 3           : Open callback page")
-        out.append("Recovery step 4           : Authorize Spotify and copy token")
-        out.append("Recovery step 5           : Update SPOTIFY_REFRESH_TOKEN")
-        out.append("Recovery step 6           : Run Spotify Telemetry")
-    else:
-        out.append("Recovery procedure        : NOT REQUIRED")
-    if last_good_utc:
-        out.append(f"Last good telemetry UTC   : {last_good_utc}")
-    out.append("------------------------------------------------------------")
-    return "\n".join(out)
+# =============================================================================
+# Single-pass multi-window analytics engine
+# The history is newest-first, so every window is a prefix of it. One walk
+# reads each event's integer time fields once and feeds the accumulators of all windows that
+# contain it; the walk stops at the oldest configured cutoff.
+# =============================================================================
 
+REQUIRED_ANALYTICS_WINDOWS = (("24h", 24 * 3600), ("7d", 7 * 86400), ("30d", 30 * 86400))
 
-def replace_auth_watch_block(
-    report: str,
-    refresh_token_state: str,
-    user_action_required: str,
-    secret_to_update: str = "NONE",
-    last_good_utc: str | None = None,
-):
-    new_block = build_auth_watch_block(
-        refresh_token_state,
-        user_action_required,
-        secret_to_update,
-        last_good_utc,
-    )
-    pattern = re.compile(
-        r"AUTHORIZATION WATCH\n"
-        r"------------------------------------------------------------\n"
-        r".*?"
+
+def analytics_windows():
+    windows = {label: int(seconds) for label, seconds in ANALYTICS_WINDOWS}
+    for label, seconds in REQUIRED_ANALYTICS_WINDOWS:
+        windows.setdefault(label, seconds)
+    return sorted(windows.items(), key=lambda kv: kv[1])
+
+
+def new_window_accumulator(label: str, seconds: int, now: datetime):
+    days = max(1, -(-seconds // 86400))
+    return {
+        "label": label,
+        "seconds": seconds,
+        "cutoff": now - timedelta(seconds=seconds),
+        "cutoff_ts": now.timestamp() - seconds,
+        "daily_start": local_day_of(now) - (days - 1),
+        "events": [],
+        "count": 0,
+        "hour_hist": [0] * 24,
+        "week_activity": [0] * 7,
+        "week_matrix": [[0] * 24 for _ in range(7)],
+        "daily": [0] * days,
+        "artist_counts": Counter(),
+        "tracks": set(),
+        "first_epoch": None,
+        "last_epoch": None,
+        "first_dt": None,
+        "last_dt": None,
+        "gaps": [],
+        "sessions": 0,
+        "switches": 0,
+        "_prev_epoch": None,
+        "_prev_artist": None,
+        "_streak_artist": None,
+        "_streak_count": 0,
+        "streak_artist": "N/A",
+        "streak_count": 0,
+    }
+
+
+def aggregate_history_windows(events: list[dict], now: datetime, windows=None):
+    """Fill every window's accumulators from one walk of newest-first events."""
+    windows = windows or analytics_windows()
+    accs = [new_window_accumulator(label, seconds, now) for label, seconds in windows]
+    if not accs:
+        return {}
+    gap_s = SESSION_GAP_MINUTES * 60
+    oldest_cutoff = min(acc["cutoff_ts"] for acc in accs)
+
+    for entry in events:
+        epoch = event_epoch(entry)
+        if epoch is None:
+            continue
+        if epoch < oldest_cutoff:
+            break
+        hour = entry["local_hour"]
+        weekday = entry["weekday"]
+        day = entry["local_day"]
+        artist = entry.get("artist") or "Unknown artist"
+        raw_artist = entry.get("artist") or ""
+        track = entry.get("track") or "N/A"
+
+        for acc in accs:
+            if epoch < acc["cutoff_ts"]:
+                continue
+            acc["events"].append(entry)
+            acc["count"] += 1
+            acc["hour_hist"][hour] += 1
+            acc["week_activity"][weekday] += 1
+            acc["week_matrix"][weekday][hour] += 1
+            offset = day - acc["daily_start"]
+            if 0 <= offset < len(acc["daily"]):
+                acc["daily"][offset] += 1
+            acc["artist_counts"][artist] += 1
+            acc["tracks"].add(track)
+            if acc["last_epoch"] is None or epoch > acc["last_epoch"]:
+                acc["last_epoch"] = epoch
+            if acc["first_epoch"] is None or epoch < acc["first_epoch"]:
+                acc["first_epoch"] = epoch
+
+            prev_epoch = acc["_prev_epoch"]
+            if prev_epoch is None:
+                acc["sessions"] = 1
+            else:
+                gap = abs(prev_epoch - epoch)
+                acc["gaps"].append(gap)
+                if gap > gap_s:
+                    acc["sessions"] += 1
+                if raw_artist != acc["_prev_artist"]:
+                    acc["switches"] += 1
+            acc["_prev_epoch"] = epoch
+            acc["_prev_artist"] = raw_artist
+
+            # Walking newest → oldest, ">=" lets the chronologically earliest
+            # streak win ties, matching longest_artist_streak().
+            if artist == acc["_streak_artist"]:
+                acc["_streak_count"] += 1
+            else:
+                acc["_streak_artist"] = artist
+                acc["_streak_count"] = 1
+            if acc["_streak_count"] >= acc["streak_count"]:
+                acc["streak_count"] = acc["_streak_count"]
+                acc["streak_artist"] = artist
+
+    for acc in accs:
+        if acc["first_epoch"] is not None:
+            acc["first_dt"] = datetime.fromtimestamp(acc["first_epoch"], timezone.utc)
+            acc["last_dt"] = datetime.fromtimestamp(acc["last_epoch"], timezone.utc)
+    return {acc["label"]: acc for acc in accs}
+
+
+def columnar_engine_enabled(n_events: int) -> bool:
+    engine = str(ANALYTICS_ENGINE).upper()
+    if np is None or engine == "PYTHON":
+        return False
+    return engine == "NUMPY" or n_events >= COLUMNAR_MIN_EVENTS
+
+
+def history_windows(events: list[dict], now: datetime, windows=None):
+    """Window accumulators from the columnar engine when enabled, else the
+    pure-Python walk. Both produce identical accumulators."""
+    if columnar_engine_enabled(len(events)):
+        return aggregate_history_windows_columnar(events, now, windows)
+    return aggregate_history_windows(events, now, windows)
+
+
+def history_columns(events: list[dict], oldest_cutoff: float):
+    """Column arrays for the events the row walk would visit.
+
+    Artist and track strings become int32 codes. Catalog-encoded journal
+    records without per-event overrides are read straight from the record.
+    """
+    rows = []
+    epochs, hours, weekdays, days = [], [], [], []
+    raw_codes, track_codes = [], []
+    raw_index, track_index = {}, {}
+
+    for entry in events:
+        if type(entry) is JournalEvent and entry.extra is None:
+            record = entry.record
+            epoch = record[REC_EPOCH]
+            if epoch < oldest_cutoff:
+                break
+            hour, weekday, day = record[REC_HOUR], record[REC_WEEKDAY], record[REC_DAY]
+            track_row = entry.catalog["_tracks"][record[REC_TRACK]]
+            raw_artist = track_row.get("artist") or ""
+            track = track_row.get("track") or "N/A"
+        else:
+            epoch = entry.get("played_at_epoch")
+            if not isinstance(epoch, int):
+                epoch = event_epoch(entry)
+                if epoch is None:
+                    continue
+            if epoch < oldest_cutoff:
+                break
+            hour, weekday, day = entry["local_hour"], entry["weekday"], entry["local_day"]
+            raw_artist = entry.get("artist") or ""
+            track = entry.get("track") or "N/A"
+        rows.append(entry)
+        epochs.append(epoch)
+        hours.append(hour)
+        weekdays.append(weekday)
+        days.append(day)
+        raw_codes.append(raw_index.setdefault(raw_artist, len(raw_index)))
+        track_codes.append(track_index.setdefault(track, len(track_index)))
+
+    # Display artist ("Unknown artist" for blanks) per raw artist code.
+    artist_index = {}
+    display_of_raw = [
+        artist_index.setdefault(raw or "Unknown artist", len(artist_index)) for raw in raw_index
+    ]
+    raw_artist_codes = np.asarray(raw_codes, dtype=np.int32)
+    return {
+        "rows": rows,
+        "epoch": np.asarray(epochs, dtype=np.int64),
+        "hour": np.asarray(hours, dtype=np.int32),
+        "weekday": np.asarray(weekdays, dtype=np.int32),
+        "day": np.asarray(days, dtype=np.int64),
+        "raw_artist": raw_artist_codes,
+        "artist": np.asarray(display_of_raw, dtype=np.int32)[raw_artist_codes] if raw_codes else raw_artist_codes,
+        "track": np.asarray(track_codes, dtype=np.int32),
+        "raw_artist_values": list(raw_index),
+        "artist_values": list(artist_index),
+        "track_values": list(track_index),
+    }
+
+
+def fill_window_columnar(acc: dict, cols: dict, gap_s: int):
+    mask = cols["epoch"] >= acc["cutoff_ts"]
+    index = np.flatnonzero(mask)
+    count = int(index.size)
+    if not count:
+        return acc
+    epoch = cols["epoch"][index]
+    hour = cols["hour"][index]
+    weekday = cols["weekday"][index]
+    artist = cols["artist"][index]
+    raw_artist = cols["raw_artist"][index]
+
+    rows = cols["rows"]
+    # Newest-first history: a window is normally a prefix of the rows.
+    acc["events"] = rows[:count] if index[-1] == count - 1 else [rows[i] for i in index.tolist()]
+    acc["count"] = count
+    acc["hour_hist"] = np.bincount(hour, minlength=24).tolist()
+    acc["week_activity"] = np.bincount(weekday, minlength=7).tolist()
+    acc["week_matrix"] = np.bincount(weekday * 24 + hour, minlength=7 * 24).reshape(7, 24).tolist()
+    offset = cols["day"][index] - acc["daily_start"]
+    offset = offset[(offset >= 0) & (offset < len(acc["daily"]))]
+    acc["daily"] = np.bincount(offset, minlength=len(acc["daily"])).tolist()
+
+    # Insert artists in their first-seen order within the window, as the row
+    # walk does; most_common() breaks ties by that order.
+    artist_totals = np.bincount(artist)
+    artist_values = cols["artist_values"]
+    seen_codes, first_seen = np.unique(artist, return_index=True)
+    acc["artist_counts"] = Counter({
+        artist_values[c]: int(artist_totals[c])
+        for c in seen_codes[np.argsort(first_seen)].tolist()
+    })
+    track_values = cols["track_values"]
+    acc["tracks"] = {track_values[c] for c in np.unique(cols["track"][index]).tolist()}
+    acc["first_epoch"] = int(epoch.min())
+    acc["last_epoch"] = int(epoch.max())
+
+    gaps = np.abs(np.diff(epoch))
+    acc["gaps"] = gaps.tolist()
+    acc["sessions"] = 1 + int(np.count_nonzero(gaps > gap_s))
+    acc["switches"] = int(np.count_nonzero(raw_artist[1:] != raw_artist[:-1]))
+    acc["_prev_epoch"] = int(epoch[-1])
+    acc["_prev_artist"] = cols["raw_artist_values"][int(raw_artist[-1])]
+
+    # Artist runs in walk order; ties go to the last longest run, as with
+    # the ">=" update of the row walk.
+    starts = np.flatnonzero(np.concatenate(([True], artist[1:] != artist[:-1])))
+    lengths = np.diff(np.append(starts, count))
+    best = int(lengths.max())
+    best_run = int(np.flatnonzero(lengths == best)[-1])
+    acc["streak_count"] = best
+    acc["streak_artist"] = artist_values[int(artist[starts[best_run]])]
+    acc["_streak_artist"] = artist_values[int(artist[starts[-1]])]
+    acc["_streak_count"] = int(lengths[-1])
+    return acc
+
+
+def aggregate_history_windows_columnar(events: list[dict], now: datetime, windows=None):
+    """NumPy equivalent of aggregate_history_windows(): one extraction pass
+    into int64/int32 columns, then bincount histograms and vectorized diffs
+    per window."""
+    windows = windows or analytics_windows()
+    accs = [new_window_accumulator(label, seconds, now) for label, seconds in windows]
+    if not accs:
+        return {}
+    cols = history_columns(events, min(acc["cutoff_ts"] for acc in accs))
+    gap_s = SESSION_GAP_MINUTES * 60
+    for acc in accs:
+        fill_window_columnar(acc, cols, gap_s)
+        if acc["first_epoch"] is not None:
+            acc["first_dt"] = datetime.fromtimestamp(acc["first_epoch"], timezone.utc)
+            acc["last_dt"] = datetime.fromtimestamp(acc["last_epoch"], timezone.utc)
+    return {acc["label"]: acc for acc in accs}
+
+
+def window_behaviour(acc: dict):
+    """behavioural_metrics() equivalent computed from a window accumulator."""
+    observed = acc["count"]
+    if not observed:
+        return behavioural_metrics([])
+    unique_tracks = len(acc["tracks"])
+    unique_artists = len(acc["artist_counts"])
+    dominant_artist, dominant_count = acc["artist_counts"].most_common(1)[0]
+    transitions = observed - 1
+    return {
+        "observed": observed,
+        "unique_tracks": unique_tracks,
+        "unique_artists": unique_artists,
+        "replay_ratio": ((observed - unique_tracks) / observed) * 100,
+        "artist_diversity": (unique_artists / observed) * 100,
+        "dominant_artist": dominant_artist,
+        "dominant_artist_share": (dominant_count / observed) * 100,
+        "switch_ratio": (acc["switches"] / transitions) * 100 if transitions else 0.0,
+        "longest_artist_streak_artist": acc["streak_artist"],
+        "longest_artist_streak_count": acc["streak_count"],
+    }
+
+
+def window_gap_stats(acc: dict):
+    gaps = acc["gaps"]
+    if not gaps:
+        return None, None, None
+    return statistics.mean(gaps), statistics.median(gaps), max(gaps)
+
+
+def window_sessions(acc: dict):
+    gaps = acc["gaps"]
+    return acc["sessions"], (sum(gaps) / len(gaps)) if gaps else None
+
+
+def window_daypart(acc: dict):
+    counts = {"NIGHT": 0, "MORNING": 0, "AFTERNOON": 0, "EVENING": 0}
+    for hour, n in enumerate(acc["hour_hist"]):
+        counts[daypart_for_hour(hour)] += n
+    total = sum(counts.values())
+    pct = {k: ((v / total) * 100 if total else 0.0) for k, v in counts.items()}
+    dominant = max(counts, key=counts.get) if total else "N/A"
+    return counts, pct, dominant
+
+
+# =============================================================================
+# Daily rollups
+# One record per local day: plays per hour, per-artist / per-artist-id /
+# per-genre counts, first and last play. Rollups are updated incrementally
+# from the plays each merge adds, so long windows (90d, 365d, all-time) cost
+# O(days) instead of O(events) and survive raw-event retention.
+# =============================================================================
+
+def local_day_key(local_day: int) -> str:
+    return (EPOCH_DATE + timedelta(days=local_day)).isoformat()
+
+
+def new_rollups():
+    return {
+        "schema_version": ROLLUP_SCHEMA_VERSION,
+        "local_timezone": LOCAL_TIMEZONE,
+        "days": {},
+    }
+
+
+def load_rollups(any_timezone: bool = False):
+    try:
+        with open(ROLLUP_FILE, "r", encoding="utf-8") as f:
+            obj = json.load(f)
+        if not isinstance(obj, dict) or not isinstance(obj.get("days"), dict):
+            return None
+    except Exception:
+        return None
+    # Rollups are bucketed by local day; a timezone change invalidates them.
+    if obj.get("local_timezone") != LOCAL_TIMEZONE and not any_timezone:
+        return None
+    return obj
+
+
+def save_rollups(rollups: dict):
+    os.makedirs(STATE_DIR, exist_ok=True)
+    # One day per line keeps diffs proportional to the days that changed.
+    days = rollups.get("days") or {}
+    lines = [
+        f"    {json.dumps(key)}: {json.dumps(days[key], ensure_ascii=False, sort_keys=True, separators=(',', ':'))}"
+        for key in sorted(days)
+    ]
+    header = {k: v for k, v in rollups.items() if k != "days" and not k.startswith("_")}
+    with open(ROLLUP_FILE, "w", encoding="utf-8") as f:
+        f.write("{\n")
+        for key in sorted(header):
+            f.write(f"  {json.dumps(key)}: {json.dumps(header[key], ensure_ascii=False)},\n")
+        f.write('  "days": {\n' + ",\n".join(lines) + ("\n" if lines else "") + "  }\n}\n")
+
+
+def rollup_add_events(rollups: dict, events: list[dict]):
+    """Fold events into their day records; returns the touched day keys."""
+    days = rollups.setdefault("days", {})
+    touched = set()
+    for entry in events:
+        epoch = event_epoch(entry)
+        if epoch is None:
+            continue
+        key = local_day_key(entry["local_day"])
+        day = days.get(key)
+        if day is None:
+            day = days[key] = {
+                "local_day": entry["local_day"],
+                "plays": 0,
+                "hours": [0] * 24,
+                "artists": {},
+                "artist_ids": {},
+                "genres": {},
+                "first_utc": None,
+                "last_utc": None,
+            }
+        played_at = entry.get("played_at_utc") or ""
+        day["plays"] += 1
+        day["hours"][entry["local_hour"]] += 1
+        artist = entry.get("artist") or "Unknown artist"
+        day["artists"][artist] = day["artists"].get(artist, 0) + 1
+        for aid in entry.get("artist_ids") or []:
+            day["artist_ids"][aid] = day["artist_ids"].get(aid, 0) + 1
+        if not day["first_utc"] or played_at < day["first_utc"]:
+            day["first_utc"] = played_at
+        if not day["last_utc"] or played_at > day["last_utc"]:
+            day["last_utc"] = played_at
+        touched.add(key)
+    return touched
+
+
+def rollup_refresh_genres(rollups: dict, day_keys, genre_cache: dict):
+    """Recompute genre counts of the given days from artist-id counts."""
+    entries = (genre_cache or {}).get("entries") or {}
+    days = rollups.get("days") or {}
+    for key in day_keys:
+        day = days.get(key)
+        if not day:
+            continue
+        genres = Counter()
+        for aid, n in (day.get("artist_ids") or {}).items():
+            for genre in (entries.get(aid) or {}).get("genres") or []:
+                genre = (genre or "").strip().lower()
+                if genre:
+                    genres[genre] += n
+        day["genres"] = dict(genres)
+
+
+def rollups_for_history(history_store: dict):
+    """Existing rollups, or a one-time rebuild from every retained event.
+
+    Days older than the retained history (aged out, or imported into the
+    rollups only) cannot be rebuilt: when a timezone change invalidates the
+    rollups, those days are carried over as they were bucketed.
+    """
+    rollups = load_rollups()
+    if rollups is not None:
+        return rollups, False
+    previous = load_rollups(any_timezone=True)
+    rollups = new_rollups()
+    rollup_add_events(rollups, all_history_events(history_store))
+    if previous:
+        days = rollups["days"]
+        first = min((day["local_day"] for day in days.values()), default=None)
+        for key, day in previous["days"].items():
+            if first is None or day.get("local_day", first) < first:
+                days.setdefault(key, day)
+    return rollups, True
+
+
+def rollup_days_in_window(rollups: dict, days: int | None, now: datetime):
+    """Day records of the last `days` local days (all days when None)."""
+    records = (rollups or {}).get("days") or {}
+    if days is None:
+        return list(records.values())
+    start = local_day_of(now) - (days - 1)
+    return [d for d in records.values() if d.get("local_day", -1) >= start]
+
+
+def rollup_daily_series(rollups: dict, days: int, now: datetime):
+    if days <= 0:
+        return []
+    start = local_day_of(now) - (days - 1)
+    counts = [0] * days
+    for day in rollup_days_in_window(rollups, days, now):
+        offset = day["local_day"] - start
+        if 0 <= offset < days:
+            counts[offset] = day.get("plays") or 0
+    return counts
+
+
+def rollup_summary(rollups: dict, days: int | None, now: datetime):
+    records = rollup_days_in_window(rollups, days, now)
+    hours = [0] * 24
+    artists = Counter()
+    genres = Counter()
+    plays = 0
+    for day in records:
+        plays += day.get("plays") or 0
+        for hour, n in enumerate(day.get("hours") or []):
+            hours[hour] += n
+        artists.update(day.get("artists") or {})
+        genres.update(day.get("genres") or {})
+    active = sum(1 for day in records if day.get("plays"))
+    return {
+        "plays": plays,
+        "active_days": active,
+        "hour_hist": hours,
+        "artists": artists,
+        "genres": genres,
+        "first_day": min((local_day_key(d["local_day"]) for d in records), default=None),
+    }
+
+
+def age_out_history(history_store: dict, rollups: dict, now: datetime):
+    """Drop raw events older than HISTORY_RETENTION_DAYS.
+
+    Maintenance step of a run, called once the rollups are saved: a play is
+    only dropped when the rollups hold its local day, so no aged-out day
+    depends on a later rebuild from raw events. Plays the raw analytics
+    windows still read are kept whatever the retention.
+    """
+    if HISTORY_RETENTION_DAYS <= 0:
+        return 0
+    cutoff_s = utc_iso(min(now - timedelta(days=HISTORY_RETENTION_DAYS), history_load_cutoff(now)))
+    days = (rollups or {}).get("days") or {}
+
+    def rolled_up(entry) -> bool:
+        local_day = entry.get("local_day")
+        return local_day is not None and local_day_key(local_day) in days
+
+    events = history_store.get("events") or []
+    if not journal_mode():
+        kept = [e for e in events if (e.get("played_at_utc") or "") >= cutoff_s or not rolled_up(e)]
+        history_store["events"] = kept
+        return len(events) - len(kept)
+
+    manifest = history_store.get("_journal") or {}
+    segments = manifest.get("segments") or {}
+    dropped = 0
+    removed = set()
+    # Whole segments only: a segment is removed once its newest play is
+    # past the cutoff, so append-only files are never rewritten here.
+    for segment_id in sorted(k for k, v in segments.items() if (v.get("newest_utc") or "") < cutoff_s):
+        if not all(rolled_up(e) for e in read_journal_segment(segment_id, manifest)):
+            dlog(f"history retention: segment {segment_id} kept, days missing from the rollups")
+            continue
+        try:
+            os.remove(journal_segment_path(segment_id))
+        except OSError:
+            pass
+        dropped += int(segments[segment_id].get("events") or 0)
+        del segments[segment_id]
+        removed.add(segment_id)
+    if removed:
+        history_store["events"] = [
+            e for e in events if journal_segment_id(e.get("played_at_utc") or "") not in removed
+        ]
+    return dropped
+
+
+# =============================================================================
+# Session log
+# Plays separated by at most SESSION_GAP_MINUTES form one session. Closed
+# sessions are stored as compact records (oldest first); the newest session
+# stays "open" with its per-artist / per-playlist / per-device counters until
+# a later play falls outside the gap. Each run folds only its new plays, so a
+# run extends or closes the open session and appends at most a few records.
+# =============================================================================
+
+def new_session_log():
+    return {
+        "schema_version": SESSION_SCHEMA_VERSION,
+        "gap_minutes": SESSION_GAP_MINUTES,
+        "events": 0,
+        "last_epoch": None,
+        "sessions": [],
+        "open": None,
+    }
+
+
+def load_session_log():
+    try:
+        with open(SESSION_FILE, "r", encoding="utf-8") as f:
+            obj = json.load(f)
+        if not isinstance(obj, dict) or not isinstance(obj.get("sessions"), list):
+            return None
+    except Exception:
+        return None
+    # Session boundaries depend on the gap threshold; a change invalidates them.
+    if obj.get("gap_minutes") != SESSION_GAP_MINUTES:
+        return None
+    return obj
+
+
+def save_session_log(log: dict):
+    os.makedirs(STATE_DIR, exist_ok=True)
+    sessions = log.get("sessions") or []
+    del sessions[:max(0, len(sessions) - SESSION_LOG_MAX_SESSIONS)]
+    # One session per line: a run's diff is the open session plus new records.
+    lines = [
+        "    " + json.dumps(session, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+        for session in sessions
+    ]
+    header = {k: v for k, v in log.items() if k != "sessions" and not k.startswith("_")}
+    with open(SESSION_FILE, "w", encoding="utf-8") as f:
+        f.write("{\n")
+        for key in sorted(header):
+            f.write(f"  {json.dumps(key)}: {json.dumps(header[key], ensure_ascii=False, sort_keys=True)},\n")
+        f.write('  "sessions": [\n' + ",\n".join(lines) + ("\n" if lines else "") + "  ]\n}\n")
+
+
+def snapshot_devices(contexts):
+    """(captured_epoch, device) for playing snapshots that name a device."""
+    devices = []
+    for snapshot in contexts or ():
+        captured = parse_iso_z(snapshot.get("captured_utc") or "")
+        if captured and snapshot.get("is_playing") and snapshot.get("device_type"):
+            devices.append((int(captured.timestamp()), snapshot["device_type"]))
+    return devices
+
+
+def open_session(epoch: int, played_at_utc: str):
+    return {
+        "start_utc": played_at_utc,
+        "start_epoch": epoch,
+        "end_utc": played_at_utc,
+        "end_epoch": epoch,
+        "tracks": 0,
+        "artist_counts": {},
+        "playlist_counts": {},
+        "device_counts": {},
+    }
+
+
+def close_session(session: dict):
+    """Compact record of a finished session (counters collapse to the top)."""
+    record = {k: v for k, v in session.items() if not k.endswith("_counts")}
+    for field, counts in (
+        ("artist", session["artist_counts"]),
+        ("playlist", session["playlist_counts"]),
+        ("device", session["device_counts"]),
+    ):
+        record[field] = max(counts, key=counts.get) if counts else None
+    record["artist_tracks"] = session["artist_counts"].get(record["artist"], 0) if record["artist"] else 0
+    return record
+
+
+def sessionize_events(log: dict, events, contexts=()):
+    """Fold plays (any order, all newer than log["last_epoch"]) into the log."""
+    gap_s = SESSION_GAP_MINUTES * 60
+    timed = []
+    for entry in events:
+        # Untimed plays are counted as seen so they never trigger a rebuild.
+        log["events"] += 1
+        epoch = event_epoch(entry)
+        if epoch is not None:
+            timed.append((epoch, entry))
+    timed.sort(key=lambda pair: pair[0])
+    devices = snapshot_devices(contexts)
+    session = log.get("open")
+    for epoch, entry in timed:
+        if session is not None and epoch - session["end_epoch"] > gap_s:
+            log["sessions"].append(close_session(session))
+            session = None
+        if session is None:
+            session = open_session(epoch, entry.get("played_at_utc") or "")
+        session["end_epoch"] = epoch
+        session["end_utc"] = entry.get("played_at_utc") or ""
+        session["tracks"] += 1
+        artist = entry.get("artist") or "Unknown artist"
+        session["artist_counts"][artist] = session["artist_counts"].get(artist, 0) + 1
+        if entry.get("context_type") == "playlist":
+            name = entry.get("playlist_name")
+            playlist = name if name and name != "N/A" else entry.get("playlist_id")
+            if playlist:
+                session["playlist_counts"][playlist] = session["playlist_counts"].get(playlist, 0) + 1
+        # Devices come from the run snapshots seen while the play was current.
+        for captured, device in devices:
+            if abs(captured - epoch) <= gap_s:
+                session["device_counts"][device] = session["device_counts"].get(device, 0) + 1
+        log["last_epoch"] = epoch
+    log["open"] = session
+    return log
+
+
+def close_stale_session(log: dict, now: datetime):
+    """Close the open session once no play can extend it any more."""
+    session = log.get("open")
+    if session is not None and now.timestamp() - session["end_epoch"] > SESSION_GAP_MINUTES * 60:
+        log["sessions"].append(close_session(session))
+        log["open"] = None
+    return log
+
+
+def session_log_for_history(history_store: dict):
+    """The persisted session log with this run's plays folded in; rebuilt
+    from every retained event when missing, invalidated, or when the history
+    holds plays the log never saw (older plays backfilled by the importer)."""
+    log = load_session_log()
+    new_events = history_store.get("_new_events") or []
+    if log is not None:
+        last_epoch = log.get("last_epoch")
+        retained = history_totals(history_store)["events"]
+        backfilled = retained > int(log.get("events") or 0) + len(new_events)
+        out_of_order = last_epoch is not None and any(
+            (event_epoch(e) or 0) <= last_epoch for e in new_events
+        )
+        if not backfilled and not out_of_order:
+            return sessionize_events(log, new_events, history_store.get("playback_context")), False
+    return sessionize_events(
+        new_session_log(), all_history_events(history_store), history_store.get("playback_context")
+    ), True
+
+
+def session_records_since(log: dict, cutoff_epoch: float):
+    """Closed and open session records that end at or after cutoff_epoch."""
+    sessions = log.get("sessions") or []
+    index = bisect.bisect_left([s["end_epoch"] for s in sessions], cutoff_epoch)
+    records = sessions[index:]
+    if log.get("open") is not None and log["open"]["end_epoch"] >= cutoff_epoch:
+        records = records + [close_session(log["open"])]
+    return records
+
+
+def session_summary(log: dict, seconds: int, now: datetime):
+    records = session_records_since(log, now.timestamp() - seconds)
+    lengths = [r["end_epoch"] - r["start_epoch"] for r in records]
+    longest = max(records, key=lambda r: r["end_epoch"] - r["start_epoch"]) if records else None
+    return {
+        "count": len(records),
+        "per_day": len(records) / max(1.0, seconds / 86400.0),
+        "median_length": statistics.median(lengths) if lengths else None,
+        "median_tracks": statistics.median([r["tracks"] for r in records]) if records else None,
+        "longest": longest,
+    }
+
+
+def build_auth_watch_block(
+    refresh_token_state: str,
+    user_action_required: str,
+    secret_to_update: str = "NONE",
+    last_good_utc: str | None = None,
+):
+    client_id_state = "CONFIGURED" if CLIENT_ID else "MISSING"
+    client_secret_state = "CONFIGURED" if CLIENT_SECRET else "NOT SET (PKCE OPTIONAL)"
+    out = []
+    out.append("AUTHORIZATION WATCH")
+    out.append("------------------------------------------------------------")
+    out.append(f"Client ID state           : {client_id_state}")
+    out.append(f"Client secret state       : {client_secret_state}")
+    out.append(f"Refresh token state       : {refresh_token_state}")
+    out.append(f"User action required      : {user_action_required}")
+    out.append(f"Secret to update          : {secret_to_update}")
+    out.append("Recovery repository       : felipealfonsog/felipealfonsog.github.io")
+    out.append("Recovery workflow         : update-spotify-callback.yml")
+    out.append("Callback page             : https://felipealfonsog.github.io/spotify-callback.html")
+    if str(user_action_required).upper() == "YES":
+        out.append("Recovery step 1           : Run Update Spotify Callback")
+        out.append("Recovery step 2           : Enter Spotify Client ID")
+        out.append("Recovery step 3           : Open callback page")
+        out.append("Recovery step 4           : Authorize Spotify and copy token")
+        out.append("Recovery step 5           : Update SPOTIFY_REFRESH_TOKEN")
+        out.append("Recovery step 6           : Run Spotify Telemetry")
+    else:
+        out.append("Recovery procedure        : NOT REQUIRED")
+    if last_good_utc:
+        out.append(f"Last good telemetry UTC   : {last_good_utc}")
+    out.append("------------------------------------------------------------")
+    return "\n".join(out)
+
+
+def replace_auth_watch_block(
+    report: str,
+    refresh_token_state: str,
+    user_action_required: str,
+    secret_to_update: str = "NONE",
+    last_good_utc: str | None = None,
+):
+    new_block = build_auth_watch_block(
+        refresh_token_state,
+        user_action_required,
+        secret_to_update,
+        last_good_utc,
+    )
+    pattern = re.compile(
+        r"AUTHORIZATION WATCH\n"
+        r"------------------------------------------------------------\n"
+        r".*?"
         r"------------------------------------------------------------",
         re.S,
     )
@@ -486,13 +2558,21 @@ def spotify_token_request(headers: dict, form: dict):
     return code, payload
 
 
-def spotify_access_token():
+def spotify_access_token(force_refresh: bool = False):
     if not (CLIENT_ID and REFRESH_TOKEN):
         raise SpotifyAuthError(
             "SPOTIFY_SECRETS_MISSING",
             "Missing Spotify secrets: SPOTIFY_CLIENT_ID / SPOTIFY_REFRESH_TOKEN",
         )
+    return cached_access_token(
+        CLIENT_ID,
+        REFRESH_TOKEN,
+        spotify_refresh_access_token,
+        force_refresh=force_refresh,
+    )
 
+
+def spotify_refresh_access_token():
     attempts = []
 
     if CLIENT_SECRET:
@@ -506,7 +2586,7 @@ def spotify_access_token():
         )
         attempts.append(("AUTHORIZATION_CODE", code, payload))
         if code < 400 and isinstance(payload, dict) and payload.get("access_token"):
-            return payload["access_token"], payload.get("scope") or ""
+            return payload["access_token"], payload.get("scope") or "", payload.get("expires_in")
 
     code, payload = spotify_token_request(
         headers={"Content-Type": "application/x-www-form-urlencoded"},
@@ -518,7 +2598,7 @@ def spotify_access_token():
     )
     attempts.append(("PKCE", code, payload))
     if code < 400 and isinstance(payload, dict) and payload.get("access_token"):
-        return payload["access_token"], payload.get("scope") or ""
+        return payload["access_token"], payload.get("scope") or "", payload.get("expires_in")
 
     errors = [
         payload.get("error")
@@ -548,24 +2628,30 @@ def spotify_access_token():
 
 def fetch_json_endpoint(url: str, token: str, timeout: int = 15):
     req = urllib.request.Request(url, headers={"Authorization": f"Bearer {token}"})
+    started = time.perf_counter()
+    nbytes = 0
     try:
-        with urllib.request.urlopen(req, timeout=timeout) as r:
-            if r.status == 204:
-                return {"http": 204, "data": None}
-            raw = r.read().decode("utf-8", "replace").strip()
-            if not raw:
-                return {"http": r.status, "data": None}
-            return {"http": r.status, "data": json.loads(raw)}
+        status, _, body = open_url(req, timeout)
+        if status == 204:
+            result = {"http": 204, "data": None}
+        else:
+            nbytes = len(body)
+            raw = body.decode("utf-8", "replace").strip()
+            result = {"http": status, "data": json.loads(raw) if raw else None}
     except urllib.error.HTTPError as e:
         if e.code == 204:
-            return {"http": 204, "data": None}
-        try:
-            raw = e.read().decode("utf-8", "replace")
-        except Exception:
-            raw = ""
-        return {"http": e.code, "data": raw or None}
+            result = {"http": 204, "data": None}
+        else:
+            try:
+                raw = e.read().decode("utf-8", "replace")
+            except Exception:
+                raw = ""
+            nbytes = len(raw)
+            result = {"http": e.code, "data": raw or None}
     except Exception as e:
-        return {"http": -1, "data": str(e)}
+        result = {"http": -1, "data": str(e)}
+    record_http(url, result["http"], nbytes, started)
+    return result
 
 
 def fetch_currently_playing(token: str):
@@ -576,10 +2662,136 @@ def fetch_player_state(token: str):
     return fetch_json_endpoint(PLAYER_URL, token, timeout=15)
 
 
-def fetch_recently_played(token: str, limit: int = 50):
+def fetch_recently_played(token: str, limit: int = 50, after_ms: int | None = None, max_pages: int = RECENT_MAX_PAGES):
+    """Latest plays, or only plays newer than after_ms when a cursor is known.
+
+    With a cursor, pages forward through cursors.after while full pages come
+    back, so more than `limit` plays since the previous run are not lost.
+    Items are returned newest-first in a single payload.
+    """
     url = "https://api.spotify.com/v1/me/player/recently-played?limit=" + str(limit)
-    code, _, payload = http_json(url, headers={"Authorization": f"Bearer {token}"}, timeout=20)
-    return code, payload
+    if not after_ms:
+        code, _, payload = http_json(url, headers={"Authorization": f"Bearer {token}"}, timeout=20)
+        return code, payload
+
+    items = []
+    seen = set()
+    cursor = int(after_ms)
+    code, payload = 200, None
+    for _ in range(max(1, max_pages)):
+        code, _, payload = http_json(
+            f"{url}&after={cursor}",
+            headers={"Authorization": f"Bearer {token}"},
+            timeout=20,
+        )
+        if code != 200 or not isinstance(payload, dict):
+            break
+        page = payload.get("items") or []
+        for item in page:
+            key = (item.get("played_at"), ((item.get("track") or {}).get("uri")))
+            if key not in seen:
+                seen.add(key)
+                items.append(item)
+        next_cursor = (payload.get("cursors") or {}).get("after")
+        try:
+            next_cursor = int(next_cursor)
+        except (TypeError, ValueError):
+            break
+        if len(page) < limit or next_cursor <= cursor:
+            break
+        cursor = next_cursor
+
+    if code != 200 and not items:
+        return code, payload
+    items.sort(key=lambda it: it.get("played_at") or "", reverse=True)
+    merged = dict(payload) if isinstance(payload, dict) else {}
+    merged["items"] = items
+    return 200, merged
+
+
+def played_at_ms(played_at: str):
+    """Spotify played_at ("...T12:34:56.789Z") as integer epoch milliseconds."""
+    dt = parse_iso_z(played_at or "")
+    if not dt:
+        return None
+    return (dt - datetime(1970, 1, 1, tzinfo=timezone.utc)) // timedelta(milliseconds=1)
+
+
+def recent_cursor_from_payload(payload):
+    """Millisecond `after` cursor covering every play in a recently-played
+    payload: the newest played_at, or cursors.after when no item parses."""
+    if not isinstance(payload, dict):
+        return None
+    stamps = [played_at_ms(item.get("played_at")) for item in payload.get("items") or [] if isinstance(item, dict)]
+    stamps = [ms for ms in stamps if ms]
+    if stamps:
+        return max(stamps)
+    try:
+        return int((payload.get("cursors") or {}).get("after")) or None
+    except (TypeError, ValueError):
+        return None
+
+
+def advance_recent_cursor(store: dict, payload) -> None:
+    # played_at_utc is stored at whole seconds and `after` is exclusive, so a
+    # cursor rebuilt from events would return the newest play on every run.
+    cursor = recent_cursor_from_payload(payload)
+    if cursor:
+        store[RECENT_CURSOR_KEY] = max(int(store.get(RECENT_CURSOR_KEY) or 0), cursor)
+
+
+def recent_cursor_from_history(store: dict):
+    """`after` cursor (ms) for the next recently-played request."""
+    cursor = store.get(RECENT_CURSOR_KEY)
+    if isinstance(cursor, int) and cursor > 0:
+        return cursor
+    # No stored cursor yet (fresh or imported store): seconds precision
+    # re-fetches the newest play once; the merge deduplicates it and the
+    # run stores the exact cursor.
+    events = store.get("events") or []
+    newest = event_epoch(events[0]) if events else None
+    return newest * 1000 if newest else None
+
+
+def timed_call(fn, *args, **kwargs):
+    started = time.perf_counter()
+    try:
+        return fn(*args, **kwargs), None, (time.perf_counter() - started) * 1000.0
+    except Exception as e:
+        return None, e, (time.perf_counter() - started) * 1000.0
+
+
+def fetch_live_endpoints(token: str, recent_limit: int = MAX_RECENT_ITEMS, recent_after_ms: int | None = None):
+    """Fetch player, currently-playing and recently-played concurrently.
+
+    The three reads are independent, so wall time is the slowest round trip
+    rather than the sum. Per-endpoint wall time is returned in ms. Errors
+    raised by a fetcher are re-raised here, exactly as a sequential call
+    would have raised them.
+    """
+    calls = {
+        "player": (fetch_player_state, (token,), {}),
+        "current": (fetch_currently_playing, (token,), {}),
+        "recent": (fetch_recently_played, (token,), {"limit": recent_limit, "after_ms": recent_after_ms}),
+    }
+    with ThreadPoolExecutor(max_workers=len(calls)) as pool:
+        futures = {
+            name: pool.submit(timed_call, fn, *args, **kwargs)
+            for name, (fn, args, kwargs) in calls.items()
+        }
+        outcomes = {name: future.result() for name, future in futures.items()}
+
+    results = {}
+    timings_ms = {}
+    for name in calls:
+        value, error, elapsed_ms = outcomes[name]
+        timings_ms[name] = round(elapsed_ms, 1)
+        if error is not None:
+            raise error
+        results[name] = value
+    results["timings_ms"] = timings_ms
+    dlog("endpoint timings ms: " + " ".join(f"{k}={v}" for k, v in timings_ms.items()))
+    return results
 
 
 def spotify_id_from_uri(uri: str, expected_type: str | None = None):
@@ -613,10 +2825,22 @@ def fetch_playlist_metadata(token: str, playlist_id: str):
     }
 
 
-def resolve_playlist_context(token: str, context: dict | None, history_store: dict):
+def playlist_context_fields(meta: dict, playlist_id: str, context: dict):
+    uri = context.get("uri") or ""
+    return {
+        "context_type": "playlist",
+        "playlist_id": meta.get("id") or playlist_id,
+        "playlist_name": meta.get("name") or "N/A",
+        "playlist_uri": meta.get("uri") or uri,
+        "playlist_url": meta.get("url") or (context.get("external_urls") or {}).get("spotify") or "",
+    }
+
+
+def resolve_playlist_context(token: str, context: dict | None, history_store: dict, now_epoch: int | None = None):
     if not isinstance(context, dict) or context.get("type") != "playlist":
         return None
 
+    now_epoch = int(now_epoch if now_epoch is not None else time.time())
     uri = context.get("uri") or ""
     playlist_id = spotify_id_from_uri(uri, "playlist")
     if not playlist_id:
@@ -625,26 +2849,37 @@ def resolve_playlist_context(token: str, context: dict | None, history_store: di
             playlist_id = href.rstrip("/").split("/")[-1].split("?")[0]
 
     cache = history_store.setdefault(PLAYLIST_CACHE_KEY, {})
+    # Per-run coalescing: each playlist id is fetched at most once per loaded
+    # store, however many events reference it. Runtime-only, never persisted.
+    run_lookups = history_store.setdefault("_playlist_lookups", {})
     cached = cache.get(playlist_id) if playlist_id else None
-    if isinstance(cached, dict) and cached.get("name"):
-        return {
-            "context_type": "playlist",
-            "playlist_id": cached.get("id") or playlist_id,
-            "playlist_name": cached.get("name") or "N/A",
-            "playlist_uri": cached.get("uri") or uri,
-            "playlist_url": cached.get("url") or (context.get("external_urls") or {}).get("spotify") or "",
-        }
+    cached = cached if isinstance(cached, dict) else None
+    has_name = bool(cached and cached.get("name"))
 
-    meta = fetch_playlist_metadata(token, playlist_id) if playlist_id else None
-    if meta:
-        cache[playlist_id] = meta
-        return {
-            "context_type": "playlist",
-            "playlist_id": meta.get("id") or playlist_id,
-            "playlist_name": meta.get("name") or "N/A",
-            "playlist_uri": meta.get("uri") or uri,
-            "playlist_url": meta.get("url") or (context.get("external_urls") or {}).get("spotify") or "",
-        }
+    # Entries written before TTL tracking carry no fetched_epoch; they are
+    # refreshed once and then follow the TTL.
+    fresh = has_name and (
+        now_epoch - int(cached.get("fetched_epoch") or 0) < PLAYLIST_CACHE_TTL_DAYS * 86400
+    )
+    backing_off = bool(cached) and now_epoch < int(cached.get("retry_after_epoch") or 0)
+
+    if playlist_id and not fresh and not backing_off and playlist_id not in run_lookups:
+        meta = fetch_playlist_metadata(token, playlist_id)
+        run_lookups[playlist_id] = meta
+        if meta:
+            cached = dict(meta, status="ok", fetched_epoch=now_epoch)
+            cache[playlist_id] = cached
+            has_name = bool(cached.get("name"))
+        else:
+            misses = int((cached or {}).get("misses") or 0) + 1
+            backoff = PLAYLIST_MISS_RETRY_HOURS * 3600 * min(2 ** (misses - 1), 8)
+            # A failed refresh keeps the last good name (stale beats unknown).
+            cached = dict(cached or {"id": playlist_id}, misses=misses, retry_after_epoch=now_epoch + backoff)
+            cached["status"] = "stale" if has_name else "miss"
+            cache[playlist_id] = cached
+
+    if has_name:
+        return playlist_context_fields(cached, playlist_id, context)
 
     # Preserve the context even when Spotify does not expose the playlist
     # metadata to this app/user. This avoids inventing a playlist name.
@@ -695,7 +2930,7 @@ def parse_track_item(track_obj: dict):
     ext = (track_obj.get("external_urls") or {}).get("spotify") or ""
     album = track_obj.get("album") or {}
     album_name = album.get("name") or ""
-    return {
+    parsed = {
         "artist": artist,
         "title": title,
         "album": album_name,
@@ -703,21 +2938,19 @@ def parse_track_item(track_obj: dict):
         "url": ext,
         "artist_ids": [a.get("id") for a in artists if a.get("id")],
     }
+    duration_ms = track_obj.get("duration_ms")
+    if isinstance(duration_ms, int) and duration_ms > 0:
+        parsed["duration_ms"] = duration_ms
+    return parsed
 
 
 def rewrite_readme_block(new_block: str):
-    with open(README_PATH, "r", encoding="utf-8") as f:
-        md = f.read()
-
-    pattern = re.compile(re.escape(MARKER_START) + r".*?" + re.escape(MARKER_END), re.S)
-    if not pattern.search(md):
+    """Splice the report into its README block; written only if it changed."""
+    readme = ReadmeBlocks(README_PATH)
+    if not readme.has(MARKER_START, MARKER_END):
         raise RuntimeError(f"Markers not found in README: {MARKER_START} ... {MARKER_END}")
-
-    replacement = f"{MARKER_START}\n```text\n{new_block.rstrip()}\n```\n{MARKER_END}"
-    md2 = pattern.sub(replacement, md)
-
-    with open(README_PATH, "w", encoding="utf-8") as f:
-        f.write(md2)
+    readme.set(MARKER_START, MARKER_END, f"\n```text\n{new_block.rstrip()}\n```\n", name="SPOTIFY_TEL")
+    return readme.write()
 
 
 def classify_sitrep(status: str, playback_state: str, api_ok: bool):
@@ -763,37 +2996,285 @@ def fmt_scope_lines(scope_str: str):
     return lines
 
 
-def fetch_artist(token: str, artist_id: str):
-    url = f"https://api.spotify.com/v1/artists/{artist_id}"
-    code, _, payload = http_json(url, headers={"Authorization": f"Bearer {token}"}, timeout=20)
+def fetch_artists_batch(token: str, artist_ids: list[str]):
+    ids = ",".join(artist_ids[:ARTIST_BATCH_SIZE])
+    url = "https://api.spotify.com/v1/artists?ids=" + urllib.parse.quote(ids, safe=",")
+    try:
+        code, _, payload = http_json(url, headers={"Authorization": f"Bearer {token}"}, timeout=20)
+    except urllib.error.HTTPError as e:
+        return e.code, None
+    except Exception:
+        return -1, None
     return code, payload
 
 
-def get_artist_genres(token: str, artist_id: str, state: dict, lookups_counter: dict):
-    cache = state.get(ARTIST_CACHE_KEY) or {}
-    if artist_id in cache:
-        return cache.get(artist_id) or []
+def fetch_tracks_batch(token: str, track_ids: list[str]):
+    ids = ",".join(track_ids[:TRACK_BATCH_SIZE])
+    url = "https://api.spotify.com/v1/tracks?ids=" + urllib.parse.quote(ids, safe=",")
+    try:
+        code, _, payload = http_json(url, headers={"Authorization": f"Bearer {token}"}, timeout=20)
+    except urllib.error.HTTPError as e:
+        return e.code, None
+    except Exception:
+        return -1, None
+    return code, payload
 
-    lookups_counter["n"] += 1
-    if lookups_counter["n"] > MAX_ARTIST_LOOKUPS:
-        return []
 
-    code, payload = fetch_artist(token, artist_id)
-    if code != 200 or not isinstance(payload, dict):
-        return []
+# =============================================================================
+# Artist genre cache
+# Entries carry fetch/use timestamps and a status. "ok" entries live for
+# GENRE_CACHE_TTL_DAYS; "empty" (no genres) and "not_found" entries are
+# negative-cached for GENRE_CACHE_NEGATIVE_TTL_DAYS so they are not retried
+# every run. Above GENRE_CACHE_MAX_ENTRIES the least recently used go first.
+# =============================================================================
 
-    genres = payload.get("genres") or []
-    cache[artist_id] = genres
-    state[ARTIST_CACHE_KEY] = cache
-    return genres
+def new_genre_cache_stats():
+    return {"hits": 0, "misses": 0, "evictions": 0, "expired": 0}
 
 
-def topk(lst, k=6):
-    if not lst:
-        return []
-    counts = {}
-    for x in lst:
-        x = (x or "").strip().lower()
+def load_genre_cache(state: dict | None = None, now_epoch: int | None = None):
+    now_epoch = int(now_epoch if now_epoch is not None else time.time())
+    try:
+        with open(GENRE_CACHE_FILE, "r", encoding="utf-8") as f:
+            cache = json.load(f)
+        if not isinstance(cache, dict) or not isinstance(cache.get("entries"), dict):
+            raise ValueError("genre cache root is not an object")
+    except Exception:
+        cache = {"schema_version": 1, "entries": {}}
+
+    # One-time move of the legacy unbounded cache out of the report state.
+    legacy = (state or {}).pop(ARTIST_CACHE_KEY, None)
+    if isinstance(legacy, dict):
+        for aid, genres in legacy.items():
+            if aid in cache["entries"] or not isinstance(genres, list):
+                continue
+            cache["entries"][aid] = {
+                "genres": genres,
+                "status": "ok" if genres else "empty",
+                "fetched_epoch": now_epoch,
+                "used_epoch": now_epoch,
+            }
+
+    cache["_stats"] = new_genre_cache_stats()
+    return cache
+
+
+def save_genre_cache(cache: dict):
+    evict_genre_cache(cache)
+    os.makedirs(STATE_DIR, exist_ok=True)
+    persisted = {k: v for k, v in cache.items() if not k.startswith("_")}
+    with open(GENRE_CACHE_FILE, "w", encoding="utf-8") as f:
+        json.dump(persisted, f, ensure_ascii=False, indent=1, sort_keys=True)
+
+
+def genre_cache_entry_fresh(entry: dict, now_epoch: int) -> bool:
+    if not isinstance(entry, dict):
+        return False
+    ttl_days = GENRE_CACHE_TTL_DAYS if entry.get("status") == "ok" else GENRE_CACHE_NEGATIVE_TTL_DAYS
+    return now_epoch - int(entry.get("fetched_epoch") or 0) < ttl_days * 86400
+
+
+def genre_cache_put(cache: dict, artist_id: str, genres: list, status: str, now_epoch: int):
+    cache["entries"][artist_id] = {
+        "genres": list(genres or []),
+        "status": status,
+        "fetched_epoch": now_epoch,
+        "used_epoch": now_epoch,
+    }
+
+
+def evict_genre_cache(cache: dict):
+    entries = cache.get("entries") or {}
+    overflow = len(entries) - max(0, GENRE_CACHE_MAX_ENTRIES)
+    if overflow <= 0:
+        return 0
+    lru = sorted(entries, key=lambda aid: int(entries[aid].get("used_epoch") or 0))[:overflow]
+    for aid in lru:
+        del entries[aid]
+    cache.setdefault("_stats", new_genre_cache_stats())["evictions"] += len(lru)
+    return len(lru)
+
+
+def missing_artist_ids(events: list[dict], cache: dict, now_epoch: int):
+    """Unique artist ids with no fresh cache entry; counts hits and misses."""
+    entries = cache.get("entries") or {}
+    stats = cache.setdefault("_stats", new_genre_cache_stats())
+    missing = []
+    seen = set()
+    for entry in events:
+        for aid in entry.get("artist_ids") or []:
+            if not aid or aid in seen:
+                continue
+            seen.add(aid)
+            cached = entries.get(aid)
+            if genre_cache_entry_fresh(cached, now_epoch):
+                stats["hits"] += 1
+                continue
+            if cached is not None:
+                stats["expired"] += 1
+            stats["misses"] += 1
+            missing.append(aid)
+    return missing
+
+
+def resolve_artist_genres(
+    token: str,
+    artist_ids: list[str],
+    cache: dict,
+    lookups_counter: dict,
+    now_epoch: int,
+):
+    """Resolve uncached artist ids in batches of ARTIST_BATCH_SIZE.
+
+    At most MAX_ARTIST_LOOKUP_REQUESTS batches go out, ARTIST_LOOKUP_WORKERS
+    at a time. The cache is filled in one pass after all batches return.
+    Ids beyond the budget stay uncached and are picked up by the next run.
+    """
+    pending = [aid for aid in artist_ids if aid]
+    batches = [
+        pending[i:i + ARTIST_BATCH_SIZE]
+        for i in range(0, len(pending), ARTIST_BATCH_SIZE)
+    ][:max(0, MAX_ARTIST_LOOKUP_REQUESTS - lookups_counter["requests"])]
+    if not batches:
+        return cache
+
+    with ThreadPoolExecutor(max_workers=max(1, min(ARTIST_LOOKUP_WORKERS, len(batches)))) as pool:
+        responses = list(pool.map(lambda batch: fetch_artists_batch(token, batch), batches))
+
+    lookups_counter["requests"] += len(batches)
+    for batch, (code, payload) in zip(batches, responses):
+        lookups_counter["artists"] += len(batch)
+        if code == 404:
+            for aid in batch:
+                genre_cache_put(cache, aid, [], "not_found", now_epoch)
+            continue
+        if code != 200 or not isinstance(payload, dict):
+            # Transient failure (429/5xx/network): leave uncached, retry next run.
+            continue
+        # The batch endpoint answers unknown ids with null, in request order.
+        for aid, artist in zip(batch, payload.get("artists") or []):
+            if not isinstance(artist, dict):
+                genre_cache_put(cache, aid, [], "not_found", now_epoch)
+                continue
+            genres = artist.get("genres") or []
+            genre_cache_put(cache, artist.get("id") or aid, genres, "ok" if genres else "empty", now_epoch)
+    return cache
+
+
+def get_artist_genres(artist_id: str, cache: dict, now_epoch: int):
+    entry = (cache.get("entries") or {}).get(artist_id)
+    if not isinstance(entry, dict):
+        return []
+    entry["used_epoch"] = now_epoch
+    return entry.get("genres") or []
+
+
+# =============================================================================
+# Track duration cache
+# Durations come with the play when the payload has them (stored on the event
+# and in the journal catalog). Tracks seen without one are resolved through
+# /v1/tracks?ids= into this cache, keyed by track id. A duration never goes
+# stale; "not_found" entries are retried after DURATION_CACHE_NEGATIVE_TTL_DAYS.
+# =============================================================================
+
+def load_duration_cache():
+    try:
+        with open(TRACK_DURATION_FILE, "r", encoding="utf-8") as f:
+            cache = json.load(f)
+        if not isinstance(cache, dict) or not isinstance(cache.get("entries"), dict):
+            raise ValueError("duration cache root is not an object")
+    except Exception:
+        cache = {"schema_version": 1, "entries": {}}
+    cache["_stats"] = new_genre_cache_stats()
+    return cache
+
+
+def save_duration_cache(cache: dict):
+    entries = cache.get("entries") or {}
+    overflow = len(entries) - max(0, DURATION_CACHE_MAX_ENTRIES)
+    if overflow > 0:
+        oldest = sorted(entries, key=lambda tid: int(entries[tid].get("fetched_epoch") or 0))[:overflow]
+        for tid in oldest:
+            del entries[tid]
+        cache.setdefault("_stats", new_genre_cache_stats())["evictions"] += len(oldest)
+    os.makedirs(STATE_DIR, exist_ok=True)
+    persisted = {k: v for k, v in cache.items() if not k.startswith("_")}
+    with open(TRACK_DURATION_FILE, "w", encoding="utf-8") as f:
+        json.dump(persisted, f, ensure_ascii=False, indent=1, sort_keys=True)
+
+
+def event_listened_ms(entry, cache: dict):
+    """Listening time of one play: ms_played when the source reports it
+    (streaming history export), else the track duration from the event or
+    the duration cache. None when unknown."""
+    ms = entry.get("ms_played") or entry.get("duration_ms")
+    if ms:
+        return ms
+    track_id = spotify_id_from_uri(entry.get("uri") or "", "track")
+    cached = (cache.get("entries") or {}).get(track_id) if track_id else None
+    if isinstance(cached, dict) and cached.get("status") == "ok":
+        return cached.get("duration_ms")
+    return None
+
+
+def missing_track_ids(events: list[dict], cache: dict, now_epoch: int):
+    """Unique track ids (newest first) whose duration is not known yet."""
+    entries = cache.get("entries") or {}
+    stats = cache.setdefault("_stats", new_genre_cache_stats())
+    missing = []
+    seen = set()
+    for entry in events:
+        if entry.get("ms_played") or entry.get("duration_ms"):
+            continue
+        track_id = spotify_id_from_uri(entry.get("uri") or "", "track")
+        if not track_id or track_id in seen:
+            continue
+        seen.add(track_id)
+        cached = entries.get(track_id)
+        if isinstance(cached, dict) and (
+            cached.get("status") == "ok"
+            or now_epoch - int(cached.get("fetched_epoch") or 0) < DURATION_CACHE_NEGATIVE_TTL_DAYS * 86400
+        ):
+            stats["hits"] += 1
+            continue
+        if cached is not None:
+            stats["expired"] += 1
+        stats["misses"] += 1
+        missing.append(track_id)
+    return missing
+
+
+def resolve_track_durations(token: str, track_ids: list[str], cache: dict, lookups_counter: dict, now_epoch: int):
+    """Resolve uncached track ids in batches of TRACK_BATCH_SIZE, at most
+    MAX_TRACK_LOOKUP_REQUESTS per run; the rest waits for the next run."""
+    batches = [
+        track_ids[i:i + TRACK_BATCH_SIZE]
+        for i in range(0, len(track_ids), TRACK_BATCH_SIZE)
+    ][:max(0, MAX_TRACK_LOOKUP_REQUESTS - lookups_counter["requests"])]
+    entries = cache.setdefault("entries", {})
+    for batch in batches:
+        code, payload = fetch_tracks_batch(token, batch)
+        lookups_counter["requests"] += 1
+        lookups_counter["tracks"] += len(batch)
+        if code != 200 or not isinstance(payload, dict):
+            # Transient failure (429/5xx/network): leave uncached, retry next run.
+            continue
+        # Unknown ids come back as null, in request order.
+        for track_id, track in zip(batch, payload.get("tracks") or []):
+            duration_ms = track.get("duration_ms") if isinstance(track, dict) else None
+            if isinstance(duration_ms, int) and duration_ms > 0:
+                entries[track_id] = {"duration_ms": duration_ms, "status": "ok", "fetched_epoch": now_epoch}
+            else:
+                entries[track_id] = {"duration_ms": None, "status": "not_found", "fetched_epoch": now_epoch}
+    return cache
+
+
+def topk(lst, k=6):
+    if not lst:
+        return []
+    counts = {}
+    for x in lst:
+        x = (x or "").strip().lower()
         if not x:
             continue
         counts[x] = counts.get(x, 0) + 1
@@ -861,6 +3342,7 @@ def recent_history_from_payload(payload: dict, limit: int = RECENT_HISTORY_LIMIT
         if not track or not played_dt:
             continue
 
+        time_fields = event_time_fields(played_dt)
         local_dt = played_dt.astimezone(local_tz())
         entry = {
             "track": f"{track['artist']} — {track['title']}",
@@ -872,9 +3354,10 @@ def recent_history_from_payload(payload: dict, limit: int = RECENT_HISTORY_LIMIT
             "artist_ids": track.get("artist_ids") or [],
             "played_at_utc": utc_iso(played_dt),
             "played_at_local": local_dt.strftime("%Y-%m-%d %H:%M:%S %Z"),
-            "local_hour": local_dt.hour,
-            "weekday": local_dt.weekday(),
+            **time_fields,
         }
+        if track.get("duration_ms"):
+            entry["duration_ms"] = track["duration_ms"]
 
         context = item.get("context") if isinstance(item, dict) else None
         if isinstance(context, dict):
@@ -908,56 +3391,146 @@ def recent_history_heatmap(history: list):
     return hist
 
 
+class HistoryTimeline:
+    """Immutable oldest → newest view of a window of plays.
+
+    Built once from history in its stored order (newest first): the walk
+    only reverses it, and sorts only when the input turns out not to be
+    monotonic. Gaps, sessions, switches, streaks and artist counts are then
+    single O(n) passes over the ordered columns.
+    """
+
+    __slots__ = ("epochs", "artists", "raw_artists", "tracks")
+
+    def __init__(self, epochs=(), raw_artists=(), tracks=()):
+        object.__setattr__(self, "epochs", tuple(epochs))
+        object.__setattr__(self, "raw_artists", tuple(raw_artists))
+        object.__setattr__(self, "artists", tuple(a or "Unknown artist" for a in self.raw_artists))
+        object.__setattr__(self, "tracks", tuple(tracks))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("HistoryTimeline is immutable")
+
+    def __len__(self):
+        return len(self.epochs)
+
+    @classmethod
+    def from_history(cls, history: list[dict]):
+        rows = []
+        newest_first = oldest_first = True
+        prev = None
+        for entry in history:
+            epoch = event_epoch(entry)
+            if epoch is None:
+                continue
+            if prev is not None:
+                newest_first = newest_first and epoch <= prev
+                oldest_first = oldest_first and epoch >= prev
+            prev = epoch
+            rows.append((epoch, entry.get("artist") or "", entry.get("track") or "N/A"))
+        if newest_first:
+            rows.reverse()
+        elif not oldest_first:
+            rows.sort(key=lambda row: row[0])
+        return cls(*zip(*rows)) if rows else cls()
+
+    @classmethod
+    def from_datetimes(cls, dts: list[datetime]):
+        epochs = [dt.timestamp() for dt in dts]
+        if any(epochs[i] < epochs[i - 1] for i in range(1, len(epochs))):
+            if all(epochs[i] <= epochs[i - 1] for i in range(1, len(epochs))):
+                epochs.reverse()
+            else:
+                epochs.sort()
+        return cls(epochs, [""] * len(epochs), ["N/A"] * len(epochs))
+
+    def gaps(self):
+        epochs = self.epochs
+        return [epochs[i] - epochs[i - 1] for i in range(1, len(epochs))]
+
+    def gap_stats(self):
+        gaps = self.gaps()
+        if not gaps:
+            return None, None, None
+        return statistics.mean(gaps), statistics.median(gaps), max(gaps)
+
+    def sessions(self, gap_s: float | None = None):
+        """(session count, average gap in seconds)."""
+        if not self.epochs:
+            return 0, None
+        gap_s = SESSION_GAP_MINUTES * 60 if gap_s is None else gap_s
+        gaps = self.gaps()
+        sessions = 1 + sum(1 for gap in gaps if gap > gap_s)
+        return sessions, (sum(gaps) / len(gaps)) if gaps else None
+
+    def switches(self):
+        raw = self.raw_artists
+        return sum(1 for i in range(1, len(raw)) if raw[i] != raw[i - 1])
+
+    def switch_ratio(self):
+        transitions = len(self.epochs) - 1
+        return (self.switches() / transitions) * 100 if transitions > 0 else 0.0
+
+    def longest_streak(self):
+        """(artist, plays) of the longest run of consecutive plays by one
+        artist; the chronologically earliest run wins ties."""
+        best_artist, best_count = "N/A", 0
+        current_artist, current_count = None, 0
+        for artist in self.artists:
+            if artist == current_artist:
+                current_count += 1
+            else:
+                current_artist, current_count = artist, 1
+            if current_count > best_count:
+                best_artist, best_count = artist, current_count
+        return best_artist, best_count
+
+    def artist_counts(self):
+        # Counted newest first, as the window walk does: most_common() breaks
+        # ties by first insertion.
+        return Counter(reversed(self.artists))
+
+    def behaviour(self):
+        observed = len(self.epochs)
+        if not observed:
+            return behavioural_metrics([])
+        unique_tracks = len(set(self.tracks))
+        counts = self.artist_counts()
+        dominant_artist, dominant_count = counts.most_common(1)[0]
+        streak_artist, streak_count = self.longest_streak()
+        return {
+            "observed": observed,
+            "unique_tracks": unique_tracks,
+            "unique_artists": len(counts),
+            "replay_ratio": ((observed - unique_tracks) / observed) * 100,
+            "artist_diversity": (len(counts) / observed) * 100,
+            "dominant_artist": dominant_artist,
+            "dominant_artist_share": (dominant_count / observed) * 100,
+            "switch_ratio": self.switch_ratio(),
+            "longest_artist_streak_artist": streak_artist,
+            "longest_artist_streak_count": streak_count,
+        }
+
+
+def as_timeline(values):
+    """HistoryTimeline for a timeline, a list of events or a list of datetimes."""
+    if isinstance(values, HistoryTimeline):
+        return values
+    if values and isinstance(values[0], datetime):
+        return HistoryTimeline.from_datetimes(values)
+    return HistoryTimeline.from_history(values or [])
+
+
 def infer_sessions(dts):
-    if not dts:
-        return 0, None
-    dts = sorted(dts)
-    gap_s = SESSION_GAP_MINUTES * 60
-    sessions = 1
-    gaps = []
-    for i in range(1, len(dts)):
-        delta = (dts[i] - dts[i - 1]).total_seconds()
-        gaps.append(delta)
-        if delta > gap_s:
-            sessions += 1
-    avg_gap = (sum(gaps) / len(gaps)) if gaps else None
-    return sessions, avg_gap
+    return as_timeline(dts).sessions()
 
 
 def gap_stats(dts: list[datetime]):
-    if len(dts) < 2:
-        return None, None, None
-    ordered = sorted(dts)
-    gaps = [(ordered[i] - ordered[i - 1]).total_seconds() for i in range(1, len(ordered))]
-    return (
-        statistics.mean(gaps) if gaps else None,
-        statistics.median(gaps) if gaps else None,
-        max(gaps) if gaps else None,
-    )
+    return as_timeline(dts).gap_stats()
 
 
 def longest_artist_streak(entries: list[dict]):
-    if not entries:
-        return "N/A", 0
-    ordered = sorted(
-        entries,
-        key=lambda e: parse_iso_z(e.get("played_at_utc") or "") or datetime.min.replace(tzinfo=timezone.utc),
-    )
-    best_artist = "N/A"
-    best_count = 0
-    current_artist = None
-    current_count = 0
-    for e in ordered:
-        artist = e.get("artist") or "Unknown artist"
-        if artist == current_artist:
-            current_count += 1
-        else:
-            current_artist = artist
-            current_count = 1
-        if current_count > best_count:
-            best_count = current_count
-            best_artist = artist
-    return best_artist, best_count
+    return as_timeline(entries).longest_streak()
 
 
 def behavioural_metrics(history: list[dict]):
@@ -974,44 +3547,7 @@ def behavioural_metrics(history: list[dict]):
             "longest_artist_streak_artist": "N/A",
             "longest_artist_streak_count": 0,
         }
-
-    tracks = [e.get("track") or "N/A" for e in history]
-    artists = [e.get("artist") or "Unknown artist" for e in history]
-    observed = len(history)
-    unique_tracks = len(set(tracks))
-    unique_artists = len(set(artists))
-    replay_ratio = ((observed - unique_tracks) / observed) * 100 if observed else None
-    artist_diversity = (unique_artists / observed) * 100 if observed else None
-
-    artist_counts = Counter(artists)
-    dominant_artist, dominant_count = artist_counts.most_common(1)[0]
-    dominant_share = (dominant_count / observed) * 100 if observed else None
-
-    ordered = sorted(
-        history,
-        key=lambda e: parse_iso_z(e.get("played_at_utc") or "") or datetime.min.replace(tzinfo=timezone.utc),
-    )
-    switches = 0
-    transitions = max(0, len(ordered) - 1)
-    for i in range(1, len(ordered)):
-        if (ordered[i].get("artist") or "") != (ordered[i - 1].get("artist") or ""):
-            switches += 1
-    switch_ratio = (switches / transitions) * 100 if transitions else 0.0
-
-    streak_artist, streak_count = longest_artist_streak(history)
-
-    return {
-        "observed": observed,
-        "unique_tracks": unique_tracks,
-        "unique_artists": unique_artists,
-        "replay_ratio": replay_ratio,
-        "artist_diversity": artist_diversity,
-        "dominant_artist": dominant_artist,
-        "dominant_artist_share": dominant_share,
-        "switch_ratio": switch_ratio,
-        "longest_artist_streak_artist": streak_artist,
-        "longest_artist_streak_count": streak_count,
-    }
+    return as_timeline(history).behaviour()
 
 
 def week_activity_from_items(items: list[dict]):
@@ -1058,221 +3594,72 @@ def volume_bar(percent: int | None) -> str:
     return "".join(out).rstrip() or "-"
 
 # =============================================================================
-# Main telemetry build
+# Lazy report metrics and registered section renderers
+# Sections declare the metrics they need; metrics are computed on first use
+# and memoized. A section whose SHOW_* toggle is off never pulls its metrics,
+# so it costs neither CPU nor API quota (genre intel is the only metric that
+# touches the network).
 # =============================================================================
 
-def build_report():
-    now = utc_now()
-    now_s = utc_iso(now)
-
-    prev = load_state() if WRITE_STATE_FILE else {}
-    mutable_state = dict(prev)
-
-    prev_track = prev.get("last_track", "")
-    prev_last_played = prev.get("last_played_utc", "")
-    prev_status = prev.get("status", "")
-    prev_report_ts = prev.get("report_generated_utc", "")
-
-    token, scope = spotify_access_token()
-
-    player = fetch_player_state(token)
-    player_http = player.get("http", -1)
-    player_data = player.get("data") if isinstance(player.get("data"), dict) else None
-
-    cur = fetch_currently_playing(token)
-    api_http = cur.get("http", -1)
-    api_ok_current = api_http in (200, 204)
-
-    cur_data = cur.get("data") if isinstance(cur.get("data"), dict) else None
-    cur_is_playing = bool(cur_data.get("is_playing")) if isinstance(cur_data, dict) else False
-
-    has_active_session = (
-        player_http == 200
-        and isinstance(player_data, dict)
-        and isinstance(player_data.get("device"), dict)
-    )
-
-    device_type = "N/A"
-    device_name = "N/A"
-    volume_percent = None
-
-    status = "UNKNOWN"
-    playback_state = "UNKNOWN"
-    last_activity_type = "UNKNOWN"
-    now_track_name = "N/A"
-    is_playing = False
-    volume_telemetry = "NO ACTIVE SESSION"
-
-    if has_active_session:
-        is_playing = cur_is_playing if api_http == 200 else bool((player_data or {}).get("is_playing"))
-        status = "PLAYING" if is_playing else "IDLE"
-        playback_state = "ONLINE (active session)" if is_playing else "ONLINE (idle session)"
-        last_activity_type = "PLAYBACK_ACTIVE" if is_playing else "PLAYBACK_INACTIVE"
-    else:
-        if api_http == 200 and cur_is_playing:
-            is_playing = True
-            status = "PLAYING"
-            playback_state = "ONLINE (active session)"
-            last_activity_type = "PLAYBACK_ACTIVE"
-        else:
-            is_playing = False
-            status = "IDLE"
-            playback_state = "OFFLINE (no active session)"
-            last_activity_type = "NO_ACTIVE_SESSION"
+REPORT_METRICS = {}
+REPORT_SECTIONS = []
 
-    if player_http == 200 and isinstance(player_data, dict) and isinstance(player_data.get("device"), dict):
-        dev = player_data.get("device") or {}
-        device_type = dev.get("type") or "N/A"
-        device_name = dev.get("name") or "N/A"
-        volume_percent = dev.get("volume_percent", None)
-        if is_playing:
-            volume_telemetry = "OK" if volume_percent is not None else "NOT EXPOSED BY DEVICE"
-        else:
-            volume_telemetry = "IDLE (session present, no playback)"
-    else:
-        volume_telemetry = "PLAYING (device not available this run)" if is_playing else "NO ACTIVE SESSION"
 
-    if api_http == 200 and isinstance(cur_data, dict):
-        item = cur_data.get("item") or {}
-        now_track_obj = parse_track_item(item)
-        if cur_is_playing and now_track_obj:
-            now_track_name = f"{now_track_obj['artist']} — {now_track_obj['title']}"
+def report_metric(name: str):
+    def register(fn):
+        REPORT_METRICS[name] = fn
+        return fn
+    return register
 
-    dlog(
-        f"session={has_active_session} is_playing={is_playing} status={status} "
-        f"playback_state={playback_state} player_http={player_http} api_http={api_http}"
-    )
 
-    if DEBUG_ACTIONS and os.environ.get("GITHUB_ACTIONS", "").lower() == "true":
-        os.makedirs(STATE_DIR, exist_ok=True)
-        debug_obj = {
-            "ts_utc": now_s,
-            "player_http": player_http,
-            "current_http": api_http,
-            "has_active_session": has_active_session,
-            "is_playing": is_playing,
-            "status": status,
-            "playback_state": playback_state,
-            "last_activity_type": last_activity_type,
-            "device_type": device_type,
-            "device_name": device_name if SHOW_DEVICE_NAME else None,
-            "volume_percent": volume_percent,
-        }
-        if DEBUG_DUMP_PAYLOADS:
-            debug_obj["player_payload_keys"] = sorted(list((player_data or {}).keys())) if isinstance(player_data, dict) else None
-            debug_obj["current_payload_keys"] = sorted(list((cur_data or {}).keys())) if isinstance(cur_data, dict) else None
-        with open(DEBUG_FILE, "w", encoding="utf-8") as f:
-            json.dump(debug_obj, f, ensure_ascii=False, indent=2)
+def report_section(toggle: str, needs: tuple = ()):
+    def register(fn):
+        REPORT_SECTIONS.append((toggle, tuple(needs), fn))
+        return fn
+    return register
 
-    recent_code, recent_payload = fetch_recently_played(token, limit=MAX_RECENT_ITEMS)
-    recent_ok = recent_code == 200 and isinstance(recent_payload, dict)
 
-    # -------------------------------------------------------------------------
-    # Persistent listening history
-    # Spotify exposes only a recent-playback window. Every run merges newly
-    # observed plays into our own journal so 24h/7d/30d analytics are based on
-    # retained history, not only the latest API window.
-    # -------------------------------------------------------------------------
-    history_store = load_history_store()
-    api_history = (
-        recent_history_from_payload(
-            recent_payload,
-            MAX_RECENT_ITEMS,
-            token=token,
-            history_store=history_store,
-        )
-        if recent_ok else []
-    )
-    all_history = merge_history_events(history_store, api_history, now_s)
-    recent_history = all_history[:RECENT_HISTORY_LIMIT]
-    playlist_history = playlist_history_from_events(all_history, PLAYLIST_HISTORY_LIMIT)
+def section_enabled(toggle: str) -> bool:
+    return bool(globals().get(toggle, False))
 
-    # Keep a lightweight history of observed player/device contexts. Spotify
-    # does not provide per-track historical device/volume information.
-    context_snapshot = {
-        "captured_utc": now_s,
-        "is_playing": bool(is_playing),
-        "track": now_track_name if is_playing else None,
-        "playback_state": playback_state,
-        "device_type": device_type if has_active_session else None,
-        "device_name": device_name if has_active_session else None,
-        "volume_percent": volume_percent if has_active_session else None,
-        "volume_telemetry": volume_telemetry,
-    }
-    append_playback_context(history_store, context_snapshot)
 
-    last_track_name = recent_history[0].get("track", "-") if recent_history else "-"
-    last_played_utc = recent_history[0].get("played_at_utc", "") if recent_history else ""
-    last_played_local = recent_history[0].get("played_at_local", "N/A") if recent_history else "N/A"
+class ReportMetrics:
+    """Memoized, on-demand metric values over a run context (m.ctx)."""
 
-    # Last observed playback context is persisted independently from whether a
-    # live session exists at this exact run.
-    if has_active_session:
-        last_known_device_type = device_type or "N/A"
-        last_known_device_name = device_name or "N/A"
-        last_known_volume_percent = volume_percent
-        last_known_volume_telemetry = volume_telemetry
-        last_known_device_captured_utc = now_s
-    else:
-        last_known_device_type = prev.get(LAST_DEVICE_TYPE_STATE_KEY) or "N/A"
-        last_known_device_name = prev.get(LAST_DEVICE_NAME_STATE_KEY) or "N/A"
-        last_known_volume_percent = prev.get(LAST_VOLUME_STATE_KEY)
-        last_known_volume_telemetry = prev.get(LAST_VOLUME_TELEMETRY_STATE_KEY) or "N/A"
-        last_known_device_captured_utc = prev.get(LAST_DEVICE_CAPTURED_UTC_KEY) or "N/A"
+    def __init__(self, ctx: dict):
+        self.ctx = ctx
+        self._values = {}
 
-    time_since_last_play = "N/A"
-    telemetry_age = "N/A"
-    if last_played_utc:
-        last_dt = parse_iso_z(last_played_utc)
-        if last_dt:
-            delta = (now - last_dt).total_seconds()
-            time_since_last_play = fmt_hms(delta)
-            telemetry_age = fmt_hms(delta)
+    def __getitem__(self, name: str):
+        if name not in self._values:
+            self._values[name] = REPORT_METRICS[name](self)
+        return self._values[name]
 
-    def delta_str(prev_val, new_val, first_label="N/A (first report)"):
-        if not prev_val:
-            return first_label
-        if prev_val == new_val:
-            return "NO CHANGE"
-        return f"{prev_val} → {new_val}"
+    def computed(self):
+        return list(self._values)
 
-    d_track = delta_str(prev_track, last_track_name)
-    d_last = delta_str(prev_last_played, last_played_utc)
-    d_stat = delta_str(prev_status, status)
 
-    d_time = "N/A (first report)"
-    if prev_report_ts:
-        pdt = parse_iso_z(prev_report_ts)
-        if pdt:
-            d_time = fmt_hms((now - pdt).total_seconds())
+def fmt_rank(ranked) -> str:
+    return " | ".join(f"{name}({count})" for name, count in ranked) if ranked else "N/A"
 
-    tz = local_tz()
-    cutoff_24h = now - timedelta(hours=24)
-    cutoff_7d = now - timedelta(days=7)
-    cutoff_30d = now - timedelta(days=30)
 
-    history_24h = filter_history_window(all_history, cutoff_24h)
-    history_7d = filter_history_window(all_history, cutoff_7d)
-    history_30d = filter_history_window(all_history, cutoff_30d)
+@report_metric("history")
+def metric_history(m):
+    return m.ctx["history_store"].get("events") or []
 
-    hour_hist_24h = hour_hist_from_history(history_24h)
-    hour_hist_7d = hour_hist_from_history(history_7d)
-    hour_hist_30d = hour_hist_from_history(history_30d)
 
-    played_times_24h = [
-        dt for dt in (parse_iso_z(e.get("played_at_utc") or "") for e in history_24h) if dt
-    ]
-    played_times_7d = [
-        dt for dt in (parse_iso_z(e.get("played_at_utc") or "") for e in history_7d) if dt
-    ]
+@report_metric("windows")
+def metric_windows(m):
+    return history_windows(m["history"], m.ctx["now"])
 
-    daily_tracks = len(history_24h)
-    weekly_total = len(history_7d)
 
-    artist_counts_24h = Counter(e.get("artist") or "Unknown artist" for e in history_24h)
-    artist_counts_7d = Counter(e.get("artist") or "Unknown artist" for e in history_7d)
-    dominant_artist_24h = artist_counts_24h.most_common(1)[0][0] if artist_counts_24h else None
-    dominant_artist_week = artist_counts_7d.most_common(1)[0][0] if artist_counts_7d else None
+@report_metric("activity_levels")
+def metric_activity_levels(m):
+    windows = m["windows"]
+    daily_tracks = windows["24h"]["count"]
+    weekly_total = windows["7d"]["count"]
+    artist_counts_24h = windows["24h"]["artist_counts"]
+    artist_counts_7d = windows["7d"]["artist_counts"]
 
     if daily_tracks >= 25:
         daily_status = "HIGH"
@@ -1298,490 +3685,1275 @@ def build_report():
     else:
         cadence = "NONE"
 
-    week_window_start = cutoff_7d
+    return {
+        "daily_tracks": daily_tracks,
+        "weekly_total": weekly_total,
+        "dominant_artist_24h": artist_counts_24h.most_common(1)[0][0] if artist_counts_24h else None,
+        "dominant_artist_week": artist_counts_7d.most_common(1)[0][0] if artist_counts_7d else None,
+        "daily_status": daily_status,
+        "daily_pattern": daily_pattern,
+        "cadence": cadence,
+        "week_window_start": windows["7d"]["cutoff"],
+    }
+
+
+@report_metric("sessions")
+def metric_sessions(m):
+    windows = m["windows"]
+    sessions_24h, _ = window_sessions(windows["24h"])
+    sessions_7d, avg_gap = window_sessions(windows["7d"])
+    return {
+        "sessions_24h": sessions_24h,
+        "sessions_7d": sessions_7d,
+        "avg_gap_7d": fmt_hms(avg_gap) if avg_gap is not None else "N/A",
+    }
+
+
+@report_metric("genre_cache")
+def metric_genre_cache(m):
+    return load_genre_cache(m.ctx["mutable_state"], int(m.ctx["now"].timestamp()))
 
-    sessions_24h = 0
-    sessions_7d = 0
-    avg_session_gap_7d = "N/A"
-    if SHOW_SESSION_ESTIMATES:
-        sessions_24h, _ = infer_sessions(played_times_24h)
-        sessions_7d, avg_gap = infer_sessions(played_times_7d)
-        avg_session_gap_7d = fmt_hms(avg_gap) if avg_gap is not None else "N/A"
 
+@report_metric("genre_intel")
+def metric_genre_intel(m):
     # Genre intelligence is derived from persistent events and cached artist IDs.
+    window_24h = m["windows"]["24h"]
+    history_7d = m["windows"]["7d"]["events"]
+    genre_cache = m["genre_cache"]
+    now_epoch = int(m.ctx["now"].timestamp())
+    lookups = {"requests": 0, "artists": 0}
+    with trace_phase("genre_lookups") as phase:
+        resolve_artist_genres(
+            m.ctx["token"],
+            missing_artist_ids(history_7d, genre_cache, now_epoch),
+            genre_cache,
+            lookups,
+            now_epoch,
+        )
+        evict_genre_cache(genre_cache)
+        stats = genre_cache.get("_stats") or new_genre_cache_stats()
+        phase["cache"] = {"hits": stats["hits"], "misses": stats["misses"]}
+
     genre_24h = []
     genre_7d = []
-    artist_lookup_counter = {"n": 0}
-    if SHOW_GENRE_INTEL:
-        for entry in history_7d:
-            dtp = parse_iso_z(entry.get("played_at_utc") or "")
-            for aid in entry.get("artist_ids") or []:
-                genres = get_artist_genres(token, aid, mutable_state, artist_lookup_counter)
-                if dtp and dtp >= cutoff_24h:
-                    genre_24h.extend(genres)
-                genre_7d.extend(genres)
-
-    genre_top_24h = topk(genre_24h, 6)
-    genre_top_7d = topk(genre_7d, 6)
-
-    historical_snapshot = {
-        "captured_utc": now_s,
-        "week_window_utc": f"{utc_iso(week_window_start)} → {now_s}",
-        "tracks_24h": daily_tracks,
-        "tracks_7d": weekly_total,
-        "dominant_artist_24h": dominant_artist_24h or "N/A",
-        "dominant_artist_7d": dominant_artist_week or "N/A",
-        "listening_pattern_24h": daily_pattern,
-        "activity_status_24h": daily_status,
-        "cadence_7d": cadence,
-        "local_timezone": LOCAL_TIMEZONE,
-        "peak_hour_24h": peak_hour(hour_hist_24h),
-        "peak_hour_7d": peak_hour(hour_hist_7d),
-        "heatmap_24h": heatmap_line(hour_hist_24h),
-        "heatmap_7d": heatmap_line(hour_hist_7d),
-        "sessions_24h": sessions_24h or "N/A",
-        "sessions_7d": sessions_7d or "N/A",
-        "avg_inter_play_gap_7d": avg_session_gap_7d,
-        "top_genres_24h": " | ".join(f"{g}({c})" for g, c in genre_top_24h) if genre_top_24h else "N/A",
-        "top_genres_7d": " | ".join(f"{g}({c})" for g, c in genre_top_7d) if genre_top_7d else "N/A",
+    cutoff_24h_ts = window_24h["cutoff_ts"]
+    for entry in history_7d:
+        in_24h = (event_epoch(entry) or 0) >= cutoff_24h_ts
+        for aid in entry.get("artist_ids") or []:
+            genres = get_artist_genres(aid, genre_cache, now_epoch)
+            if in_24h:
+                genre_24h.extend(genres)
+            genre_7d.extend(genres)
+    return {
+        "top_24h": topk(genre_24h, 6),
+        "top_7d": topk(genre_7d, 6),
+        "lookups": lookups,
     }
 
-    api_ok = (player_http in (200, 204)) and api_ok_current and recent_ok
-    sitrep = classify_sitrep(status, playback_state, api_ok)
 
-    if api_http == 200:
-        api_class = "200 OK"
-    elif api_http == 204:
+@report_metric("duration_cache")
+def metric_duration_cache(m):
+    return load_duration_cache()
+
+
+@report_metric("listening_time")
+def metric_listening_time(m):
+    # Listening time over the 24h/7d/30d windows; per hour, day, artist and
+    # genre breakdowns over 7d. Unknown durations of the 30d plays are
+    # resolved first (batched, budgeted), genres after genre intel.
+    windows = m["windows"]
+    history_30d = windows["30d"]["events"]
+    duration_cache = m["duration_cache"]
+    now_epoch = int(m.ctx["now"].timestamp())
+    lookups = {"requests": 0, "tracks": 0}
+    with trace_phase("duration_lookups") as phase:
+        resolve_track_durations(
+            m.ctx["token"],
+            missing_track_ids(history_30d, duration_cache, now_epoch),
+            duration_cache,
+            lookups,
+            now_epoch,
+        )
+        stats = duration_cache.get("_stats") or new_genre_cache_stats()
+        phase["cache"] = {"hits": stats["hits"], "misses": stats["misses"]}
+    if section_enabled("SHOW_GENRE_INTEL"):
+        m["genre_intel"]
+    genre_cache = m["genre_cache"]
+
+    labels = ("24h", "7d", "30d")
+    totals = {label: {"ms": 0, "timed": 0, "plays": windows[label]["count"]} for label in labels}
+    window_7d = windows["7d"]
+    hour_ms = [0] * 24
+    daily_ms = [0] * len(window_7d["daily"])
+    artist_ms = Counter()
+    genre_ms = Counter()
+    for entry in history_30d:
+        ms = event_listened_ms(entry, duration_cache)
+        if not ms:
+            continue
+        epoch = event_epoch(entry) or 0
+        for label in labels:
+            if epoch >= windows[label]["cutoff_ts"]:
+                totals[label]["ms"] += ms
+                totals[label]["timed"] += 1
+        if epoch < window_7d["cutoff_ts"]:
+            continue
+        hour_ms[entry["local_hour"]] += ms
+        offset = entry["local_day"] - window_7d["daily_start"]
+        if 0 <= offset < len(daily_ms):
+            daily_ms[offset] += ms
+        artist_ms[entry.get("artist") or "Unknown artist"] += ms
+        # A play counts once per genre, however many of its artists carry it.
+        genres = dict.fromkeys(
+            genre.strip().lower()
+            for aid in entry.get("artist_ids") or []
+            for genre in get_artist_genres(aid, genre_cache, now_epoch)
+            if genre and genre.strip()
+        )
+        for genre in genres:
+            genre_ms[genre] += ms
+    return {
+        "totals": totals,
+        "hour_ms": hour_ms,
+        "daily_ms": daily_ms,
+        "artist_ms": artist_ms,
+        "genre_ms": genre_ms,
+        "lookups": lookups,
+    }
+
+
+@report_metric("rollups")
+def metric_rollups(m):
+    # Daily rollups: fold this run's new plays in, then refresh genre counts
+    # of the touched days from the genre cache (resolved first when genre
+    # intel is enabled). Raw-event retention runs on save, not here.
+    history_store = m.ctx["history_store"]
+    if section_enabled("SHOW_GENRE_INTEL"):
+        m["genre_intel"]
+    rollups, rebuilt = rollups_for_history(history_store)
+    touched_days = (
+        set((rollups.get("days") or {}).keys())
+        if rebuilt
+        else rollup_add_events(rollups, history_store.get("_new_events") or [])
+    )
+    rollup_refresh_genres(rollups, touched_days, m["genre_cache"])
+    return rollups
+
+
+@report_metric("session_log")
+def metric_session_log(m):
+    log, rebuilt = session_log_for_history(m.ctx["history_store"])
+    if rebuilt:
+        dlog(f"session log rebuilt: {len(log['sessions'])} closed sessions from {log['events']} events")
+    return close_stale_session(log, m.ctx["now"])
+
+
+@report_metric("session_stats")
+def metric_session_stats(m):
+    return {
+        label: session_summary(m["session_log"], seconds, m.ctx["now"])
+        for label, seconds in (("7d", 7 * 86400), ("30d", 30 * 86400))
+    }
+
+
+@report_metric("poll_schedule")
+def metric_poll_schedule(m):
+    # Next poll from the hour-of-week histogram of the last POLL_HISTORY_DAYS
+    # and, while a session is in progress, the current play rate.
+    now = m.ctx["now"]
+    history = m["history"]
+    recent = filter_history_window(history, now - timedelta(days=POLL_HISTORY_DAYS))
+    oldest = event_epoch(recent[-1]) if recent else None
+    weeks = (now.timestamp() - oldest) / (7 * 86400) if oldest is not None else 0.0
+    recent_cutoff = now.timestamp() - POLL_RECENT_HOURS * 3600
+    recent_plays = sum(1 for e in recent if (event_epoch(e) or 0) >= recent_cutoff)
+    last_epoch = event_epoch(history[0]) if history else None
+    session_active = m.ctx["status"] == "PLAYING" or (
+        last_epoch is not None and now.timestamp() - last_epoch <= SESSION_GAP_MINUTES * 60
+    )
+    return plan_next_poll(
+        weekly_hour_matrix_from_history(recent),
+        weeks,
+        now,
+        local_tz(),
+        recent_rate=recent_plays / POLL_RECENT_HOURS,
+        session_active=session_active,
+    )
+
+
+@report_metric("long_horizon")
+def metric_long_horizon(m):
+    return {
+        label: rollup_summary(m["rollups"], days, m.ctx["now"])
+        for label, days in (("30d", 30), ("90d", 90), ("365d", 365), ("all", None))
+    }
+
+
+@report_metric("behaviour")
+def metric_behaviour(m):
+    return window_behaviour(m["windows"]["7d"])
+
+
+@report_metric("temporal")
+def metric_temporal(m):
+    window_7d = m["windows"]["7d"]
+    mean_gap, median_gap, longest_gap = window_gap_stats(window_7d)
+    sample_first = window_7d["first_dt"]
+    sample_last = window_7d["last_dt"]
+    observed_span = (sample_last - sample_first).total_seconds() if sample_first and sample_last else None
+    intensity = None
+    if observed_span and observed_span > 0:
+        intensity = window_7d["count"] / (observed_span / 3600.0)
+    return {
+        "mean_gap": mean_gap,
+        "median_gap": median_gap,
+        "longest_gap": longest_gap,
+        "sample_first": sample_first,
+        "sample_last": sample_last,
+        "observed_span": observed_span,
+        "intensity": intensity,
+    }
+
+
+@report_metric("daypart")
+def metric_daypart(m):
+    _, daypart_pct, dominant_daypart = window_daypart(m["windows"]["7d"])
+    return {"pct": daypart_pct, "dominant": dominant_daypart}
+
+
+@report_metric("activity_30d")
+def metric_activity_30d(m):
+    return rollup_daily_series(m["rollups"], 30, m.ctx["now"])
+
+
+@report_metric("playlist_history")
+def metric_playlist_history(m):
+    return playlist_history_from_events(m["history"], PLAYLIST_HISTORY_LIMIT)
+
+
+@report_metric("api")
+def metric_api(m):
+    c = m.ctx
+    api_ok = (c["player_http"] in (200, 204)) and c["api_ok_current"] and c["recent_ok"]
+    api_http = c["api_http"]
+    if api_http == 200:
+        api_class = "200 OK"
+    elif api_http == 204:
         api_class = "204 NO CONTENT"
     elif api_http == -1:
         api_class = "NETWORK/EXCEPTION"
     else:
         api_class = f"{api_http} ERROR"
+    integrity = "OK" if (api_ok and c["last_track_name"] != "-") else "DEGRADED"
+    return {
+        "api_ok": api_ok,
+        "api_class": api_class,
+        "sitrep": classify_sitrep(c["status"], c["playback_state"], api_ok),
+        "integrity": integrity,
+        "confidence": "HIGH" if integrity == "OK" else "MEDIUM",
+    }
 
-    integrity = "OK" if (api_ok and last_track_name != "-") else "DEGRADED"
-    confidence = "HIGH" if integrity == "OK" else "MEDIUM"
 
-    if not has_active_session or status != "PLAYING":
-        vol_str = "N/A"
-        vol_bar = "-"
-        vol_tel = "NO ACTIVE SESSION"
-    else:
-        if volume_percent is None:
-            vol_str = "N/A"
-            vol_bar = "-"
-            vol_tel = "NOT EXPOSED BY DEVICE"
-        else:
-            vol_str = f"{int(volume_percent)}%"
-            vol_bar = volume_bar(int(volume_percent)) if SHOW_VOLUME_BAR else "-"
-            vol_tel = "OK"
-
-    # -------------------------------------------------------------------------
-    # Historical analytics from the persistent journal
-    # -------------------------------------------------------------------------
-    analytics_history = history_7d
-    behaviour = behavioural_metrics(analytics_history)
+@report_metric("endpoint_latency")
+def metric_endpoint_latency(m):
+    # Rolling p50/p95 over the run log plus this run, per live endpoint.
+    samples = {name: [ms] for name, ms in m.ctx["endpoint_timings_ms"].items()}
+    runs = load_run_log()["runs"][-RUN_LOG_MAX_RUNS:]
+    for run in runs:
+        for name, ms in (run.get("endpoint_ms") or {}).items():
+            if isinstance(ms, (int, float)) and name in samples:
+                samples[name].append(ms)
+    return {
+        "runs": len(runs) + 1,
+        "endpoints": {
+            name: (percentile(values, 50), percentile(values, 95))
+            for name, values in samples.items()
+        },
+    }
 
-    analytics_dts = [
-        parse_iso_z(e.get("played_at_utc") or "")
-        for e in analytics_history
-    ]
-    analytics_dts = [dt for dt in analytics_dts if dt]
-    mean_gap, median_gap, longest_gap = gap_stats(analytics_dts)
 
-    sample_first = min(analytics_dts) if analytics_dts else None
-    sample_last = max(analytics_dts) if analytics_dts else None
-    observed_span = (sample_last - sample_first).total_seconds() if sample_first and sample_last else None
-    intensity = None
-    if observed_span and observed_span > 0:
-        intensity = len(analytics_dts) / (observed_span / 3600.0)
+@report_metric("historical_snapshot")
+def metric_historical_snapshot(m):
+    c = m.ctx
+    levels = m["activity_levels"]
+    windows = m["windows"]
+    hour_hist_24h = windows["24h"]["hour_hist"]
+    hour_hist_7d = windows["7d"]["hour_hist"]
+    # Sessions and genres are only part of the snapshot when their sections
+    # are enabled, exactly as before lazy evaluation.
+    sessions = m["sessions"] if section_enabled("SHOW_SESSION_ESTIMATES") else {}
+    genre_intel = m["genre_intel"] if section_enabled("SHOW_GENRE_INTEL") else {}
+    return {
+        "captured_utc": c["now_s"],
+        "week_window_utc": f"{utc_iso(levels['week_window_start'])} → {c['now_s']}",
+        "tracks_24h": levels["daily_tracks"],
+        "tracks_7d": levels["weekly_total"],
+        "dominant_artist_24h": levels["dominant_artist_24h"] or "N/A",
+        "dominant_artist_7d": levels["dominant_artist_week"] or "N/A",
+        "listening_pattern_24h": levels["daily_pattern"],
+        "activity_status_24h": levels["daily_status"],
+        "cadence_7d": levels["cadence"],
+        "local_timezone": LOCAL_TIMEZONE,
+        "peak_hour_24h": peak_hour(hour_hist_24h),
+        "peak_hour_7d": peak_hour(hour_hist_7d),
+        "heatmap_24h": heatmap_line(hour_hist_24h),
+        "heatmap_7d": heatmap_line(hour_hist_7d),
+        "sessions_24h": sessions.get("sessions_24h") or "N/A",
+        "sessions_7d": sessions.get("sessions_7d") or "N/A",
+        "avg_inter_play_gap_7d": sessions.get("avg_gap_7d", "N/A"),
+        "top_genres_24h": fmt_rank(genre_intel.get("top_24h")),
+        "top_genres_7d": fmt_rank(genre_intel.get("top_7d")),
+    }
 
-    _, daypart_pct, dominant_daypart = daypart_distribution(analytics_dts)
 
-    week_activity = week_activity_from_history(history_7d)
-    week_matrix = weekly_hour_matrix_from_history(history_7d)
-    activity_30d = daily_activity_series(history_30d, 30, now)
+@report_section("SHOW_HEADER_META")
+def render_header_meta(m, out):
+    out.append("Telemetry source          : Spotify Developer Platform — Playback Telemetry ©")
+    out.append("Acquisition mode          : OAuth2 / automated workflow")
+    out.append("Snapshot type             : Historical playback telemetry + live signal")
+    out.append(f"Observation window        : {fmt_hms(OBS_WINDOW_SECONDS)}")
+    out.append("------------------------------------------------------------")
 
-    history_total = len(all_history)
-    history_oldest_dt = None
-    history_newest_dt = None
-    if all_history:
-        history_newest_dt = parse_iso_z(all_history[0].get("played_at_utc") or "")
-        history_oldest_dt = parse_iso_z(all_history[-1].get("played_at_utc") or "")
 
-    out = []
-    out.append("SPOTIFY TELEMETRY — CLI FEED (Spotify ©)")
+@report_section("SHOW_LAST_PLAYED_SONG", needs=("windows", "long_horizon"))
+def render_last_played_song(m, out):
+    recent_history = m.ctx["recent_history"]
+    # Track plays over the widest analytics window (the span the run reads);
+    # artist plays over 365d from the daily rollups.
+    widest_label = analytics_windows()[-1][0]
+    widest = m["windows"][widest_label]
+    out.append("LAST PLAYED SONG")
     out.append("------------------------------------------------------------")
+    if recent_history:
+        first = recent_history[0]
+        previous = recent_history[1] if len(recent_history) > 1 else None
+
+        first_epoch = event_epoch(first)
+        previous_epoch = event_epoch(previous) if previous else None
+        gap_from_previous = (
+            first_epoch - previous_epoch
+            if first_epoch is not None and previous_epoch is not None else None
+        )
 
-    if SHOW_HEADER_META:
-        out.append("Telemetry source          : Spotify Developer Platform — Playback Telemetry ©")
-        out.append("Acquisition mode          : OAuth2 / automated workflow")
-        out.append("Snapshot type             : Historical playback telemetry + live signal")
-        out.append(f"Observation window        : {fmt_hms(OBS_WINDOW_SECONDS)}")
-        out.append("------------------------------------------------------------")
+        local_hour = first.get("local_hour")
+        try:
+            local_hour = int(local_hour)
+        except (TypeError, ValueError):
+            local_hour = None
 
-    if SHOW_LAST_PLAYED_SONG:
-        out.append("LAST PLAYED SONG")
-        out.append("------------------------------------------------------------")
-        if recent_history:
-            first = recent_history[0]
-            previous = recent_history[1] if len(recent_history) > 1 else None
-
-            first_dt = parse_iso_z(first.get("played_at_utc") or "")
-            previous_dt = (
-                parse_iso_z(previous.get("played_at_utc") or "")
-                if previous else None
-            )
-            gap_from_previous = (
-                (first_dt - previous_dt).total_seconds()
-                if first_dt and previous_dt else None
-            )
+        daypart = (
+            daypart_for_hour(local_hour)
+            if local_hour is not None else "N/A"
+        )
 
-            local_hour = first.get("local_hour")
-            try:
-                local_hour = int(local_hour)
-            except (TypeError, ValueError):
-                local_hour = (
-                    first_dt.astimezone(local_tz()).hour
-                    if first_dt else None
-                )
-
-            daypart = (
-                daypart_for_hour(local_hour)
-                if local_hour is not None else "N/A"
+        track_uri = first.get("uri") or "N/A"
+        track_url = first.get("url") or "N/A"
+        artist_name = first.get("artist") or "N/A"
+        title_name = first.get("title") or "N/A"
+        album_name = first.get("album") or "N/A"
+
+        same_artist_as_previous = "N/A"
+        same_track_as_previous = "N/A"
+        previous_track_name = "N/A"
+        if previous:
+            previous_track_name = previous.get("track") or "N/A"
+            same_artist_as_previous = (
+                "YES"
+                if (previous.get("artist") or "") == (first.get("artist") or "")
+                else "NO"
             )
-
-            track_uri = first.get("uri") or "N/A"
-            track_url = first.get("url") or "N/A"
-            artist_name = first.get("artist") or "N/A"
-            title_name = first.get("title") or "N/A"
-            album_name = first.get("album") or "N/A"
-
-            same_artist_as_previous = "N/A"
-            same_track_as_previous = "N/A"
-            previous_track_name = "N/A"
-            if previous:
-                previous_track_name = previous.get("track") or "N/A"
-                same_artist_as_previous = (
-                    "YES"
-                    if (previous.get("artist") or "") == (first.get("artist") or "")
-                    else "NO"
-                )
-                same_track_as_previous = (
-                    "YES"
-                    if (previous.get("uri") or previous.get("track"))
-                    == (first.get("uri") or first.get("track"))
-                    else "NO"
-                )
-
-            retained_track_plays = sum(
-                1
-                for entry in all_history
-                if (entry.get("uri") or entry.get("track"))
+            same_track_as_previous = (
+                "YES"
+                if (previous.get("uri") or previous.get("track"))
                 == (first.get("uri") or first.get("track"))
+                else "NO"
             )
-            retained_artist_plays = sum(
-                1
-                for entry in all_history
-                if (entry.get("artist") or "") == artist_name
-            )
-
-            out.append(f"Track                     : {first.get('track', 'N/A')}")
-            out.append(f"Artist                    : {artist_name}")
-            out.append(f"Title                     : {title_name}")
-            out.append(f"Album                     : {album_name}")
-            out.append(f"Spotify URI               : {track_uri}")
-            out.append(f"Spotify URL               : {track_url}")
-            out.append("------------------------------------------------------------")
-            out.append(f"Played at (UTC)           : {first.get('played_at_utc', 'N/A')}")
-            out.append(f"Played at (local)         : {first.get('played_at_local', 'N/A')}")
-            out.append(f"Local hour                : {f'{local_hour:02d}:00' if local_hour is not None else 'N/A'}")
-            out.append(f"Daypart                   : {daypart}")
-            out.append(f"Time since play           : {time_since_last_play}")
-            out.append(f"Gap from previous play    : {fmt_hms(gap_from_previous) if gap_from_previous is not None else 'N/A'}")
-            out.append("------------------------------------------------------------")
-            out.append(f"Previous song             : {previous_track_name}")
-            out.append(f"Same artist as previous   : {same_artist_as_previous}")
-            out.append(f"Same track as previous    : {same_track_as_previous}")
-            out.append(f"Track plays (retained)    : {retained_track_plays}")
-            out.append(f"Artist plays (retained)   : {retained_artist_plays}")
-            out.append("Historical source         : Spotify recently-played + persistent journal")
-        else:
-            out.append("Track                     : N/A")
-            out.append("Played at (UTC)           : N/A")
-            out.append("Played at (local)         : N/A")
-            out.append("Time since play           : N/A")
-        out.append("------------------------------------------------------------")
 
-    if SHOW_RECENT_HISTORY:
-        out.append("RECENT PLAYBACK HISTORY")
+        window_track_plays = sum(
+            1
+            for entry in widest["events"]
+            if (entry.get("uri") or entry.get("track"))
+            == (first.get("uri") or first.get("track"))
+        )
+        year_artist_plays = m["long_horizon"]["365d"]["artists"].get(first.get("artist") or "Unknown artist", 0)
+
+        out.append(f"Track                     : {first.get('track', 'N/A')}")
+        out.append(f"Artist                    : {artist_name}")
+        out.append(f"Title                     : {title_name}")
+        out.append(f"Album                     : {album_name}")
+        out.append(f"Spotify URI               : {track_uri}")
+        out.append(f"Spotify URL               : {track_url}")
         out.append("------------------------------------------------------------")
-        for index in range(1, RECENT_HISTORY_LIMIT):
-            if index < len(recent_history):
-                entry = recent_history[index]
-                value = f"{entry.get('track', 'N/A')} | {entry.get('played_at_local', 'N/A')}"
-            else:
-                value = "N/A"
-            out.append(f"Previous track #{index:<2}        : {value}")
+        out.append(f"Played at (UTC)           : {first.get('played_at_utc', 'N/A')}")
+        out.append(f"Played at (local)         : {first.get('played_at_local', 'N/A')}")
+        out.append(f"Local hour                : {f'{local_hour:02d}:00' if local_hour is not None else 'N/A'}")
+        out.append(f"Daypart                   : {daypart}")
+        out.append(f"Time since play           : {m.ctx['time_since_last_play']}")
+        out.append(f"Gap from previous play    : {fmt_hms(gap_from_previous) if gap_from_previous is not None else 'N/A'}")
         out.append("------------------------------------------------------------")
+        out.append(f"Previous song             : {previous_track_name}")
+        out.append(f"Same artist as previous   : {same_artist_as_previous}")
+        out.append(f"Same track as previous    : {same_track_as_previous}")
+        out.append(f"{f'Track plays ({widest_label})':<26}: {window_track_plays}")
+        out.append(f"Artist plays (365d)       : {year_artist_plays}")
+        out.append("Historical source         : Spotify recently-played + persistent journal")
+    else:
+        out.append("Track                     : N/A")
+        out.append("Played at (UTC)           : N/A")
+        out.append("Played at (local)         : N/A")
+        out.append("Time since play           : N/A")
+    out.append("------------------------------------------------------------")
 
-    if SHOW_PLAYLIST_HISTORY:
-        out.append("LAST KNOWN PLAYLISTS")
-        out.append("------------------------------------------------------------")
-        if playlist_history:
-            latest_playlist = playlist_history[0]
-            out.append(f"Last playlist             : {latest_playlist.get('name', 'N/A')}")
-            out.append(f"Context observed (local)  : {latest_playlist.get('observed_local', 'N/A')}")
-            out.append(f"Track observed in context : {latest_playlist.get('track', 'N/A')}")
-            if latest_playlist.get("uri"):
-                out.append(f"Spotify playlist URI      : {latest_playlist.get('uri')}")
-            if latest_playlist.get("url"):
-                out.append(f"Spotify playlist URL      : {latest_playlist.get('url')}")
-            out.append("------------------------------------------------------------")
-            for index, playlist in enumerate(playlist_history[1:], start=1):
-                value = (
-                    f"{playlist.get('name', 'N/A')} | "
-                    f"{playlist.get('observed_local', 'N/A')}"
-                )
-                out.append(f"Previous playlist #{index:<2}     : {value}")
+
+@report_section("SHOW_RECENT_HISTORY")
+def render_recent_history(m, out):
+    recent_history = m.ctx["recent_history"]
+    out.append("RECENT PLAYBACK HISTORY")
+    out.append("------------------------------------------------------------")
+    for index in range(1, RECENT_HISTORY_LIMIT):
+        if index < len(recent_history):
+            entry = recent_history[index]
+            value = f"{entry.get('track', 'N/A')} | {entry.get('played_at_local', 'N/A')}"
         else:
-            out.append("Last playlist             : N/A")
-            out.append("Historical context        : No playlist context retained yet")
-        out.append("------------------------------------------------------------")
+            value = "N/A"
+        out.append(f"Previous track #{index:<2}        : {value}")
+    out.append("------------------------------------------------------------")
 
-    if SHOW_DEVICE_BLOCK:
-        display_volume = (
-            f"{int(last_known_volume_percent)}%"
-            if last_known_volume_percent is not None else "N/A"
-        )
-        display_volume_bar = (
-            volume_bar(int(last_known_volume_percent))
-            if SHOW_VOLUME_BAR and last_known_volume_percent is not None
-            else "-"
-        )
-        out.append("LAST KNOWN PLAYBACK CONTEXT")
-        out.append("------------------------------------------------------------")
-        out.append(f"Last known device type    : {last_known_device_type or 'N/A'}")
-        if SHOW_DEVICE_NAME:
-            out.append(f"Last known device name    : {last_known_device_name or 'N/A'}")
-        out.append(f"Last known volume         : {display_volume}")
-        out.append(f"Volume telemetry          : {last_known_volume_telemetry}")
-        if SHOW_VOLUME_BAR and display_volume_bar and display_volume_bar != "-":
-            out.append(f"Volume bar                : {display_volume_bar}")
-        out.append(f"Context observed (UTC)    : {last_known_device_captured_utc}")
-        out.append("------------------------------------------------------------")
 
-    if SHOW_BEHAVIOUR_ANALYTICS:
-        out.append("PLAYBACK BEHAVIOUR ANALYTICS (7d history)")
+@report_section("SHOW_PLAYLIST_HISTORY", needs=("playlist_history",))
+def render_playlist_history(m, out):
+    playlist_history = m["playlist_history"]
+    out.append("LAST KNOWN PLAYLISTS")
+    out.append("------------------------------------------------------------")
+    if playlist_history:
+        latest_playlist = playlist_history[0]
+        out.append(f"Last playlist             : {latest_playlist.get('name', 'N/A')}")
+        out.append(f"Context observed (local)  : {latest_playlist.get('observed_local', 'N/A')}")
+        out.append(f"Track observed in context : {latest_playlist.get('track', 'N/A')}")
+        if latest_playlist.get("uri"):
+            out.append(f"Spotify playlist URI      : {latest_playlist.get('uri')}")
+        if latest_playlist.get("url"):
+            out.append(f"Spotify playlist URL      : {latest_playlist.get('url')}")
         out.append("------------------------------------------------------------")
-        out.append(f"Observed events           : {behaviour['observed']}")
-        out.append(f"Unique tracks             : {behaviour['unique_tracks']}")
-        out.append(f"Unique artists            : {behaviour['unique_artists']}")
-        out.append(f"Replay ratio              : {ratio_bar(behaviour['replay_ratio'])}  {fmt_pct(behaviour['replay_ratio'])}")
-        out.append(f"Artist diversity          : {ratio_bar(behaviour['artist_diversity'])}  {fmt_pct(behaviour['artist_diversity'])}")
-        out.append(f"Dominant artist           : {behaviour['dominant_artist']}")
-        out.append(f"Dominant artist share     : {ratio_bar(behaviour['dominant_artist_share'])}  {fmt_pct(behaviour['dominant_artist_share'])}")
-        out.append(f"Artist switch ratio       : {ratio_bar(behaviour['switch_ratio'])}  {fmt_pct(behaviour['switch_ratio'])}")
+        for index, playlist in enumerate(playlist_history[1:], start=1):
+            value = (
+                f"{playlist.get('name', 'N/A')} | "
+                f"{playlist.get('observed_local', 'N/A')}"
+            )
+            out.append(f"Previous playlist #{index:<2}     : {value}")
+    else:
+        out.append("Last playlist             : N/A")
+        out.append("Historical context        : No playlist context retained yet")
+    out.append("------------------------------------------------------------")
+
+
+@report_section("SHOW_DEVICE_BLOCK")
+def render_device_block(m, out):
+    c = m.ctx
+    last_known_volume_percent = c["last_known_volume_percent"]
+    display_volume = (
+        f"{int(last_known_volume_percent)}%"
+        if last_known_volume_percent is not None else "N/A"
+    )
+    display_volume_bar = (
+        volume_bar(int(last_known_volume_percent))
+        if SHOW_VOLUME_BAR and last_known_volume_percent is not None
+        else "-"
+    )
+    out.append("LAST KNOWN PLAYBACK CONTEXT")
+    out.append("------------------------------------------------------------")
+    out.append(f"Last known device type    : {c['last_known_device_type'] or 'N/A'}")
+    if SHOW_DEVICE_NAME:
+        out.append(f"Last known device name    : {c['last_known_device_name'] or 'N/A'}")
+    out.append(f"Last known volume         : {display_volume}")
+    out.append(f"Volume telemetry          : {c['last_known_volume_telemetry']}")
+    if SHOW_VOLUME_BAR and display_volume_bar and display_volume_bar != "-":
+        out.append(f"Volume bar                : {display_volume_bar}")
+    out.append(f"Context observed (UTC)    : {c['last_known_device_captured_utc']}")
+    out.append("------------------------------------------------------------")
+
+
+@report_section("SHOW_BEHAVIOUR_ANALYTICS", needs=("behaviour",))
+def render_behaviour_analytics(m, out):
+    behaviour = m["behaviour"]
+    out.append("PLAYBACK BEHAVIOUR ANALYTICS (7d history)")
+    out.append("------------------------------------------------------------")
+    out.append(f"Observed events           : {behaviour['observed']}")
+    out.append(f"Unique tracks             : {behaviour['unique_tracks']}")
+    out.append(f"Unique artists            : {behaviour['unique_artists']}")
+    out.append(f"Replay ratio              : {ratio_bar(behaviour['replay_ratio'])}  {fmt_pct(behaviour['replay_ratio'])}")
+    out.append(f"Artist diversity          : {ratio_bar(behaviour['artist_diversity'])}  {fmt_pct(behaviour['artist_diversity'])}")
+    out.append(f"Dominant artist           : {behaviour['dominant_artist']}")
+    out.append(f"Dominant artist share     : {ratio_bar(behaviour['dominant_artist_share'])}  {fmt_pct(behaviour['dominant_artist_share'])}")
+    out.append(f"Artist switch ratio       : {ratio_bar(behaviour['switch_ratio'])}  {fmt_pct(behaviour['switch_ratio'])}")
+    out.append(
+        f"Longest artist streak     : {behaviour['longest_artist_streak_artist']} × {behaviour['longest_artist_streak_count']}"
+        if behaviour['longest_artist_streak_count']
+        else "Longest artist streak     : N/A"
+    )
+    out.append("------------------------------------------------------------")
+
+
+@report_section("SHOW_DAYPART_ANALYTICS", needs=("daypart",))
+def render_daypart_analytics(m, out):
+    daypart = m["daypart"]
+    out.append("DAYPART DISTRIBUTION (7d history)")
+    out.append("------------------------------------------------------------")
+    for key, label in [
+        ("NIGHT", "Night      00–06"),
+        ("MORNING", "Morning    06–12"),
+        ("AFTERNOON", "Afternoon  12–18"),
+        ("EVENING", "Evening    18–24"),
+    ]:
+        pct = daypart["pct"].get(key, 0.0)
+        out.append(f"{label:<27}: {ratio_bar(pct)}  {pct:5.1f}%")
+    out.append(f"Dominant period           : {daypart['dominant']}")
+    out.append("------------------------------------------------------------")
+
+
+@report_section("SHOW_TEMPORAL_ANALYTICS", needs=("temporal",))
+def render_temporal_analytics(m, out):
+    t = m["temporal"]
+    out.append("TEMPORAL PLAYBACK ANALYSIS (7d history)")
+    out.append("------------------------------------------------------------")
+    out.append(f"History first play (7d)   : {utc_iso(t['sample_first']) if t['sample_first'] else 'N/A'}")
+    out.append(f"History last play (7d)    : {utc_iso(t['sample_last']) if t['sample_last'] else 'N/A'}")
+    out.append(f"Observed time span        : {fmt_hms(t['observed_span']) if t['observed_span'] is not None else 'N/A'}")
+    out.append(f"Mean inter-play gap       : {fmt_hms(t['mean_gap']) if t['mean_gap'] is not None else 'N/A'}")
+    out.append(f"Median inter-play gap     : {fmt_hms(t['median_gap']) if t['median_gap'] is not None else 'N/A'}")
+    out.append(f"Longest inactivity gap    : {fmt_hms(t['longest_gap']) if t['longest_gap'] is not None else 'N/A'}")
+    out.append(f"Listening intensity       : {t['intensity']:.2f} tracks/hour" if t['intensity'] is not None else "Listening intensity       : N/A")
+    out.append("------------------------------------------------------------")
+
+
+@report_section("SHOW_HOURLY_HEATMAP", needs=("windows",))
+def render_hourly_heatmap(m, out):
+    hour_hist_24h = m["windows"]["24h"]["hour_hist"]
+    hour_hist_7d = m["windows"]["7d"]["hour_hist"]
+    out.append("LISTENING HOURS (local time)")
+    out.append("------------------------------------------------------------")
+    out.append(f"Local timezone            : {LOCAL_TIMEZONE}")
+    out.append(f"Peak hour (24h)           : {peak_hour(hour_hist_24h)}")
+    out.append(f"Peak hour (7d)            : {peak_hour(hour_hist_7d)}")
+    out.append(f"Heatmap (24h)             : {heatmap_line(hour_hist_24h)}")
+    out.append(f"Heatmap (7d)              : {heatmap_line(hour_hist_7d)}")
+    out.append("------------------------------------------------------------")
+
+
+@report_section("SHOW_WEEK_ACTIVITY", needs=("windows", "activity_30d"))
+def render_week_activity(m, out):
+    out.append("WEEK ACTIVITY (7d history)")
+    out.append("------------------------------------------------------------")
+    out.append(f"Activity (Mon→Sun)        : {heatmap_line(m['windows']['7d']['week_activity'])}")
+    out.append("Day order                 : Mon Tue Wed Thu Fri Sat Sun")
+    out.append("Activity trend (30d)      : " + heatmap_line(m["activity_30d"]))
+    out.append("Trend order               : oldest → newest")
+    out.append("------------------------------------------------------------")
+
+
+@report_section("SHOW_WEEKLY_HOUR_MATRIX", needs=("windows",))
+def render_weekly_hour_matrix(m, out):
+    week_matrix = m["windows"]["7d"]["week_matrix"]
+    out.append("WEEKLY HOUR MATRIX (7d history)")
+    out.append("------------------------------------------------------------")
+    for idx, day in enumerate(["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]):
+        out.append(f"{day}                       : {matrix_heatmap_row(week_matrix[idx])}")
+    out.append("Hour axis                 : 00      06      12      18     23")
+    out.append("------------------------------------------------------------")
+
+
+@report_section("SHOW_LONG_HORIZON", needs=("long_horizon",))
+def render_long_horizon(m, out):
+    long_horizon = m["long_horizon"]
+    out.append("LONG-HORIZON LISTENING (daily rollups)")
+    out.append("------------------------------------------------------------")
+    for label in ("30d", "90d", "365d", "all"):
+        summary = long_horizon[label]
+        name = "all-time" if label == "all" else label
         out.append(
-            f"Longest artist streak     : {behaviour['longest_artist_streak_artist']} × {behaviour['longest_artist_streak_count']}"
-            if behaviour['longest_artist_streak_count']
-            else "Longest artist streak     : N/A"
+            f"{f'Plays ({name})':<26}: {summary['plays']} "
+            f"over {summary['active_days']} active days"
         )
-        out.append("------------------------------------------------------------")
+    out.append("Top artists (90d)         : " + fmt_rank(long_horizon["90d"]["artists"].most_common(3)))
+    out.append("Top genres (365d)         : " + fmt_rank(long_horizon["365d"]["genres"].most_common(4)))
+    out.append(f"Peak hour (365d)          : {peak_hour(long_horizon['365d']['hour_hist'])}")
+    out.append(f"Heatmap (365d)            : {heatmap_line(long_horizon['365d']['hour_hist'])}")
+    out.append(f"Rollups since             : {long_horizon['all']['first_day'] or 'N/A'}")
+    out.append("------------------------------------------------------------")
 
-    if SHOW_DAYPART_ANALYTICS:
-        out.append("DAYPART DISTRIBUTION (7d history)")
-        out.append("------------------------------------------------------------")
-        for key, label in [
-            ("NIGHT", "Night      00–06"),
-            ("MORNING", "Morning    06–12"),
-            ("AFTERNOON", "Afternoon  12–18"),
-            ("EVENING", "Evening    18–24"),
-        ]:
-            pct = daypart_pct.get(key, 0.0)
-            out.append(f"{label:<27}: {ratio_bar(pct)}  {pct:5.1f}%")
-        out.append(f"Dominant period           : {dominant_daypart}")
-        out.append("------------------------------------------------------------")
 
-    if SHOW_TEMPORAL_ANALYTICS:
-        out.append("TEMPORAL PLAYBACK ANALYSIS (7d history)")
-        out.append("------------------------------------------------------------")
-        out.append(f"History first play (7d)   : {utc_iso(sample_first) if sample_first else 'N/A'}")
-        out.append(f"History last play (7d)    : {utc_iso(sample_last) if sample_last else 'N/A'}")
-        out.append(f"Observed time span        : {fmt_hms(observed_span) if observed_span is not None else 'N/A'}")
-        out.append(f"Mean inter-play gap       : {fmt_hms(mean_gap) if mean_gap is not None else 'N/A'}")
-        out.append(f"Median inter-play gap     : {fmt_hms(median_gap) if median_gap is not None else 'N/A'}")
-        out.append(f"Longest inactivity gap    : {fmt_hms(longest_gap) if longest_gap is not None else 'N/A'}")
-        out.append(f"Listening intensity       : {intensity:.2f} tracks/hour" if intensity is not None else "Listening intensity       : N/A")
-        out.append("------------------------------------------------------------")
+@report_section("SHOW_DAILY_SITREP", needs=("activity_levels",))
+def render_daily_sitrep(m, out):
+    levels = m["activity_levels"]
+    daily_tracks = levels["daily_tracks"]
+    out.append("DAILY SPOTIFY SITREP")
+    out.append("------------------------------------------------------------")
+    out.append(f"Tracks played (last 24h)  : {daily_tracks if daily_tracks is not None else 'N/A'}")
+    out.append(f"Dominant artist           : {levels['dominant_artist_24h'] or 'N/A'}")
+    out.append(f"Listening pattern         : {levels['daily_pattern'] or 'N/A'}")
+    out.append(f"Daily activity status     : {levels['daily_status'] or 'N/A'}")
+    out.append("------------------------------------------------------------")
 
-    if SHOW_HOURLY_HEATMAP:
-        out.append("LISTENING HOURS (local time)")
-        out.append("------------------------------------------------------------")
-        out.append(f"Local timezone            : {LOCAL_TIMEZONE}")
-        out.append(f"Peak hour (24h)           : {peak_hour(hour_hist_24h)}")
-        out.append(f"Peak hour (7d)            : {peak_hour(hour_hist_7d)}")
-        out.append(f"Heatmap (24h)             : {heatmap_line(hour_hist_24h)}")
-        out.append(f"Heatmap (7d)              : {heatmap_line(hour_hist_7d)}")
-        out.append("------------------------------------------------------------")
 
-    if SHOW_WEEK_ACTIVITY:
-        out.append("WEEK ACTIVITY (7d history)")
-        out.append("------------------------------------------------------------")
-        out.append(f"Activity (Mon→Sun)        : {heatmap_line(week_activity)}")
-        out.append("Day order                 : Mon Tue Wed Thu Fri Sat Sun")
-        out.append("Activity trend (30d)      : " + heatmap_line(activity_30d))
-        out.append("Trend order               : oldest → newest")
-        out.append("------------------------------------------------------------")
+@report_section("SHOW_WEEKLY_SUMMARY", needs=("activity_levels",))
+def render_weekly_summary(m, out):
+    levels = m["activity_levels"]
+    weekly_total = levels["weekly_total"]
+    out.append("WEEKLY CADENCE SUMMARY")
+    out.append("------------------------------------------------------------")
+    out.append(f"Week window (UTC)         : {utc_iso(levels['week_window_start'])} → {m.ctx['now_s']}")
+    out.append(f"Tracks played (7d)        : {weekly_total if weekly_total is not None else 'N/A'}")
+    out.append(f"Dominant artist           : {levels['dominant_artist_week'] or 'N/A'}")
+    out.append(f"Cadence classification    : {levels['cadence'] or 'N/A'}")
+    out.append("------------------------------------------------------------")
 
-    if SHOW_WEEKLY_HOUR_MATRIX:
-        out.append("WEEKLY HOUR MATRIX (7d history)")
-        out.append("------------------------------------------------------------")
-        for idx, day in enumerate(["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]):
-            out.append(f"{day}                       : {matrix_heatmap_row(week_matrix[idx])}")
-        out.append("Hour axis                 : 00      06      12      18     23")
-        out.append("------------------------------------------------------------")
 
-    if SHOW_DAILY_SITREP:
-        out.append("DAILY SPOTIFY SITREP")
-        out.append("------------------------------------------------------------")
-        out.append(f"Tracks played (last 24h)  : {daily_tracks if daily_tracks is not None else 'N/A'}")
-        out.append(f"Dominant artist           : {dominant_artist_24h or 'N/A'}")
-        out.append(f"Listening pattern         : {daily_pattern or 'N/A'}")
-        out.append(f"Daily activity status     : {daily_status or 'N/A'}")
-        out.append("------------------------------------------------------------")
+@report_section("SHOW_SESSION_ESTIMATES", needs=("sessions", "session_stats"))
+def render_session_estimates(m, out):
+    sessions = m["sessions"]
+    stats_7d = m["session_stats"]["7d"]
+    stats_30d = m["session_stats"]["30d"]
+    longest = stats_30d["longest"]
+    open_session = m["session_log"].get("open")
+    out.append("SESSION ESTIMATES (inferred)")
+    out.append("------------------------------------------------------------")
+    out.append(f"Session gap threshold     : {SESSION_GAP_MINUTES} minutes")
+    out.append(f"Sessions (24h)            : {sessions['sessions_24h'] if sessions['sessions_24h'] else 'N/A'}")
+    out.append(f"Sessions (7d)             : {sessions['sessions_7d'] if sessions['sessions_7d'] else 'N/A'}")
+    out.append(f"Avg inter-play gap        : {sessions['avg_gap_7d']}")
+    out.append(
+        f"Median session (7d)       : {fmt_hms(stats_7d['median_length'])} · {stats_7d['median_tracks']:g} tracks"
+        if stats_7d["count"]
+        else "Median session (7d)       : N/A"
+    )
+    out.append(f"Sessions per day (30d)    : {stats_30d['per_day']:.2f}")
+    out.append(
+        f"Longest session (30d)     : {fmt_hms(longest['end_epoch'] - longest['start_epoch'])} · "
+        f"{longest['tracks']} tracks · {longest['artist'] or 'N/A'}"
+        if longest
+        else "Longest session (30d)     : N/A"
+    )
+    out.append(
+        f"Open session              : since {local_display_time(open_session['start_utc']) or 'N/A'} · "
+        f"{open_session['tracks']} tracks"
+        if open_session
+        else "Open session              : NONE"
+    )
+    out.append("------------------------------------------------------------")
 
-    if SHOW_WEEKLY_SUMMARY:
-        out.append("WEEKLY CADENCE SUMMARY")
-        out.append("------------------------------------------------------------")
-        out.append(f"Week window (UTC)         : {utc_iso(week_window_start)} → {now_s}")
-        out.append(f"Tracks played (7d)        : {weekly_total if weekly_total is not None else 'N/A'}")
-        out.append(f"Dominant artist           : {dominant_artist_week or 'N/A'}")
-        out.append(f"Cadence classification    : {cadence or 'N/A'}")
-        out.append("------------------------------------------------------------")
 
-    if SHOW_SESSION_ESTIMATES:
-        out.append("SESSION ESTIMATES (inferred)")
-        out.append("------------------------------------------------------------")
-        out.append(f"Session gap threshold     : {SESSION_GAP_MINUTES} minutes")
-        out.append(f"Sessions (24h)            : {sessions_24h if sessions_24h else 'N/A'}")
-        out.append(f"Sessions (7d)             : {sessions_7d if sessions_7d else 'N/A'}")
-        out.append(f"Avg inter-play gap        : {avg_session_gap_7d}")
-        out.append("------------------------------------------------------------")
+@report_section("SHOW_LISTENING_TIME", needs=("listening_time",))
+def render_listening_time(m, out):
+    listening = m["listening_time"]
+    duration_cache = m["duration_cache"]
+    lookups = listening["lookups"]
 
-    if SHOW_GENRE_INTEL:
-        out.append("GENRE INTEL (inferred)")
-        out.append("------------------------------------------------------------")
-        out.append("Top genres (24h)          : " + (" | ".join([f"{g}({c})" for g, c in genre_top_24h]) if genre_top_24h else "N/A"))
-        out.append("Top genres (7d)           : " + (" | ".join([f"{g}({c})" for g, c in genre_top_7d]) if genre_top_7d else "N/A"))
-        out.append(f"Artist lookups (this run) : {artist_lookup_counter['n']} (cached)")
-        out.append("------------------------------------------------------------")
+    def minutes_rank(counter, k):
+        return fmt_rank([(name, f"{round(ms / 60000)}m") for name, ms in counter.most_common(k)])
 
-    if SHOW_DELTAS_BLOCK:
-        out.append("CHANGE TELEMETRY")
-        out.append("------------------------------------------------------------")
-        out.append(f"Track transition          : {d_track}")
-        out.append(f"Playback timestamp Δ      : {d_last}")
-        out.append(f"State transition          : {d_stat}")
-        out.append(f"Telemetry interval        : {d_time}")
-        out.append("------------------------------------------------------------")
+    out.append("LISTENING TIME (track durations)")
+    out.append("------------------------------------------------------------")
+    for label in ("24h", "7d", "30d"):
+        total = listening["totals"][label]
+        out.append(
+            f"{f'Listening time ({label})':<26}: {fmt_hms(total['ms'] / 1000)} | "
+            f"{total['timed']}/{total['plays']} plays timed"
+        )
+    out.append(f"Minutes by hour (7d)      : {heatmap_line(listening['hour_ms'])}")
+    out.append("Daily minutes (7d)        : " + " | ".join(str(round(ms / 60000)) for ms in listening["daily_ms"]))
+    out.append("Top artists by time (7d)  : " + minutes_rank(listening["artist_ms"], 3))
+    out.append("Top genres by time (7d)   : " + minutes_rank(listening["genre_ms"], 4))
+    duration_stats = duration_cache.get("_stats") or new_genre_cache_stats()
+    out.append(
+        f"Duration lookups (run)    : {lookups['requests']} requests / "
+        f"{lookups['tracks']} tracks (batched) | cache {len(duration_cache.get('entries') or {})} entries | "
+        f"hit {duration_stats['hits']} | miss {duration_stats['misses']}"
+    )
+    out.append("------------------------------------------------------------")
+
+
+@report_section("SHOW_GENRE_INTEL", needs=("genre_intel",))
+def render_genre_intel(m, out):
+    genre_intel = m["genre_intel"]
+    genre_cache = m["genre_cache"]
+    lookups = genre_intel["lookups"]
+    out.append("GENRE INTEL (inferred)")
+    out.append("------------------------------------------------------------")
+    out.append("Top genres (24h)          : " + fmt_rank(genre_intel["top_24h"]))
+    out.append("Top genres (7d)           : " + fmt_rank(genre_intel["top_7d"]))
+    out.append(
+        f"Artist lookups (this run) : {lookups['requests']} requests / "
+        f"{lookups['artists']} artists (batched)"
+    )
+    genre_stats = genre_cache.get("_stats") or new_genre_cache_stats()
+    out.append(
+        f"Genre cache               : {len(genre_cache.get('entries') or {})} entries | "
+        f"hit {genre_stats['hits']} | miss {genre_stats['misses']} | "
+        f"evicted {genre_stats['evictions']}"
+    )
+    out.append("------------------------------------------------------------")
+
+
+@report_section("SHOW_DELTAS_BLOCK")
+def render_deltas_block(m, out):
+    c = m.ctx
+    out.append("CHANGE TELEMETRY")
+    out.append("------------------------------------------------------------")
+    out.append(f"Track transition          : {c['d_track']}")
+    out.append(f"Playback timestamp Δ      : {c['d_last']}")
+    out.append(f"State transition          : {c['d_stat']}")
+    out.append(f"Telemetry interval        : {c['d_time']}")
+    out.append("------------------------------------------------------------")
 
-    if SHOW_DATA_COVERAGE:
-        oldest_history_local = "N/A"
-        newest_history_local = "N/A"
+
+@report_section("SHOW_DATA_COVERAGE", needs=("history", "windows", "long_horizon"))
+def render_data_coverage(m, out):
+    history_store = m.ctx["history_store"]
+    all_history = m["history"]
+    totals = history_totals(history_store)
+    oldest_history_local = "N/A"
+    newest_history_local = "N/A"
+    if all_history:
+        history_newest_dt = parse_iso_z(all_history[0].get("played_at_utc") or "")
+        history_oldest_dt = parse_iso_z(totals["oldest_utc"] or "")
         if history_oldest_dt:
             oldest_history_local = history_oldest_dt.astimezone(local_tz()).strftime("%Y-%m-%d %H:%M:%S %Z")
         if history_newest_dt:
             newest_history_local = history_newest_dt.astimezone(local_tz()).strftime("%Y-%m-%d %H:%M:%S %Z")
-        out.append("HISTORICAL DATA COVERAGE")
-        out.append("------------------------------------------------------------")
-        out.append(f"Events retained           : {history_total}")
-        out.append(f"Oldest retained event     : {oldest_history_local}")
-        out.append(f"Newest retained event     : {newest_history_local}")
-        out.append(f"Events (24h)              : {len(history_24h)}")
-        out.append(f"Events (7d)               : {len(history_7d)}")
-        out.append(f"Events (30d)              : {len(history_30d)}")
-        out.append(f"Playlist contexts retained: {sum(1 for e in all_history if e.get('context_type') == 'playlist')}")
+    out.append("HISTORICAL DATA COVERAGE")
+    out.append("------------------------------------------------------------")
+    out.append(f"Events retained           : {totals['events']}")
+    out.append(f"Oldest retained event     : {oldest_history_local}")
+    out.append(f"Newest retained event     : {newest_history_local}")
+    for label, acc in m["windows"].items():
+        out.append(f"{f'Events ({label})':<26}: {acc['count']}")
+    for label in ("90d", "365d"):
+        # Daily rollups: complete even after the raw events aged out.
+        if label not in m["windows"]:
+            out.append(f"{f'Events ({label})':<26}: {m['long_horizon'][label]['plays']}")
+    out.append(f"Playlist contexts retained: {totals['playlist_events']}")
+    if journal_mode():
+        # Plays merged this run are appended on save; count their segments too.
+        journal_segments = len(
+            set((history_store.get("_journal") or {}).get("segments") or {})
+            | {journal_segment_id(e.get("played_at_utc") or "") for e in history_store.get("_new_events") or []}
+        )
+        out.append(f"Storage mode              : SEGMENTED JSONL JOURNAL ({journal_segments} segments)")
+    else:
         out.append("Storage mode              : PERSISTENT LOCAL JOURNAL")
-        out.append("Deduplication             : played_at + track URI")
-        out.append("------------------------------------------------------------")
+    out.append("Deduplication             : played_at + track URI")
+    out.append("------------------------------------------------------------")
 
-    if SHOW_API_BLOCK:
-        out.append("API / AUTHORIZATION TELEMETRY")
-        out.append("------------------------------------------------------------")
-        out.append(f"API response class        : {api_class}")
-        out.append(f"API condition             : {'NORMAL' if api_ok else 'DEGRADED'}")
-        scope_lines = fmt_scope_lines(scope)
-        if scope_lines:
-            out.append(f"Authorization scope       : {scope_lines[0]}")
-            if SCOPE_MODE != "COMPACT":
-                for ln in scope_lines[1:]:
-                    out.append(f"                           {ln}")
-        if player_http == 200:
-            out.append("Player endpoint           : 200 OK")
-        elif player_http == 204:
-            out.append("Player endpoint           : 204 NO CONTENT")
-        elif player_http == -1:
-            out.append("Player endpoint           : NETWORK/EXCEPTION")
-        else:
-            out.append(f"Player endpoint           : {player_http} ERROR")
-        out.append("------------------------------------------------------------")
 
-    if SHOW_INTEGRITY_BLOCK:
-        out.append("DATA INTEGRITY")
-        out.append("------------------------------------------------------------")
-        out.append(f"Data integrity            : {integrity}")
-        out.append(f"Confidence level          : {confidence}")
-        out.append("------------------------------------------------------------")
+@report_section("SHOW_API_BLOCK", needs=("api",))
+def render_api_block(m, out):
+    c = m.ctx
+    api = m["api"]
+    player_http = c["player_http"]
+    out.append("API / AUTHORIZATION TELEMETRY")
+    out.append("------------------------------------------------------------")
+    out.append(f"API response class        : {api['api_class']}")
+    out.append(f"API condition             : {'NORMAL' if api['api_ok'] else 'DEGRADED'}")
+    scope_lines = fmt_scope_lines(c["scope"])
+    if scope_lines:
+        out.append(f"Authorization scope       : {scope_lines[0]}")
+        if SCOPE_MODE != "COMPACT":
+            for ln in scope_lines[1:]:
+                out.append(f"                           {ln}")
+    if player_http == 200:
+        out.append("Player endpoint           : 200 OK")
+    elif player_http == 204:
+        out.append("Player endpoint           : 204 NO CONTENT")
+    elif player_http == -1:
+        out.append("Player endpoint           : NETWORK/EXCEPTION")
+    else:
+        out.append(f"Player endpoint           : {player_http} ERROR")
+    out.append(
+        "Endpoint latency (ms)     : "
+        + " | ".join(f"{name} {ms:.0f}" for name, ms in c["endpoint_timings_ms"].items())
+    )
+    if SHOW_ENDPOINT_PERCENTILES:
+        latency = m["endpoint_latency"]
+        out.append(
+            "Latency p50/p95 (ms)      : "
+            + " | ".join(f"{name} {p50:.0f}/{p95:.0f}" for name, (p50, p95) in latency["endpoints"].items())
+            + f" (n={latency['runs']})"
+        )
+    out.append("------------------------------------------------------------")
 
-    # Internal historical snapshot intentionally not rendered by default.
-    if SHOW_HISTORICAL_SNAPSHOT:
-        out.append("HISTORICAL LISTENING SNAPSHOT")
-        out.append("------------------------------------------------------------")
-        out.append(f"Snapshot captured (UTC)   : {historical_snapshot.get('captured_utc', 'N/A')}")
-        out.append(f"Week window (UTC)         : {historical_snapshot.get('week_window_utc', 'N/A')}")
-        out.append(f"Tracks played (last 24h)  : {historical_snapshot.get('tracks_24h', 'N/A')}")
-        out.append(f"Total tracks played (7d)  : {historical_snapshot.get('tracks_7d', 'N/A')}")
-        out.append("------------------------------------------------------------")
 
+@report_section("SHOW_INTEGRITY_BLOCK", needs=("api",))
+def render_integrity_block(m, out):
+    api = m["api"]
+    out.append("DATA INTEGRITY")
+    out.append("------------------------------------------------------------")
+    out.append(f"Data integrity            : {api['integrity']}")
+    out.append(f"Confidence level          : {api['confidence']}")
+    out.append("------------------------------------------------------------")
+
+
+# Internal historical snapshot intentionally not rendered by default.
+@report_section("SHOW_HISTORICAL_SNAPSHOT", needs=("historical_snapshot",))
+def render_historical_snapshot(m, out):
+    historical_snapshot = m["historical_snapshot"]
+    out.append("HISTORICAL LISTENING SNAPSHOT")
+    out.append("------------------------------------------------------------")
+    out.append(f"Snapshot captured (UTC)   : {historical_snapshot.get('captured_utc', 'N/A')}")
+    out.append(f"Week window (UTC)         : {historical_snapshot.get('week_window_utc', 'N/A')}")
+    out.append(f"Tracks played (last 24h)  : {historical_snapshot.get('tracks_24h', 'N/A')}")
+    out.append(f"Total tracks played (7d)  : {historical_snapshot.get('tracks_7d', 'N/A')}")
+    out.append("------------------------------------------------------------")
+
+
+def render_report(m: ReportMetrics):
+    out = []
+    out.append("SPOTIFY TELEMETRY — CLI FEED (Spotify ©)")
+    out.append("------------------------------------------------------------")
+    for toggle, needs, renderer in REPORT_SECTIONS:
+        if not section_enabled(toggle):
+            continue
+        for name in needs:
+            m[name]
+        renderer(m, out)
     out.append(build_auth_watch_block("PASSING", "NO", "NONE"))
-    out.append(f"Report generated (UTC)    : {now_s}")
+    out.append(f"Report generated (UTC)    : {m.ctx['now_s']}")
+    return "\n".join(out)
 
-    report = "\n".join(out)
 
-    if WRITE_STATE_FILE:
-        mutable_state.update({
-            "report_generated_utc": now_s,
+# =============================================================================
+# Main telemetry build
+# =============================================================================
+
+def build_report():
+    now = utc_now()
+    now_s = utc_iso(now)
+    reset_run_trace()
+    RUN_TRACE["run_utc"] = now_s
+
+    prev = load_state() if WRITE_STATE_FILE else {}
+    mutable_state = dict(prev)
+
+    prev_track = prev.get("last_track", "")
+    prev_last_played = prev.get("last_played_utc", "")
+    prev_status = prev.get("status", "")
+    prev_report_ts = prev.get("report_generated_utc", "")
+
+    with trace_phase("token") as phase:
+        token, scope = spotify_access_token()
+        token_refreshed = int(bool(RUN_TRACE["http"]))
+        phase["cache"] = {"hits": 1 - token_refreshed, "misses": token_refreshed}
+
+    # The store is loaded before fetching so recently-played can ask only for
+    # plays newer than the last ingested one. Only the journal segments the
+    # report windows need are read; all-time figures come from the manifest
+    # and the rollups.
+    with trace_phase("history_load") as phase:
+        history_store = load_history_store(history_load_cutoff(now))
+        phase["events"] = len(history_store.get("events") or [])
+    recent_after_ms = recent_cursor_from_history(history_store)
+    with trace_phase("fetch_live"):
+        try:
+            live = fetch_live_endpoints(token, MAX_RECENT_ITEMS, recent_after_ms)
+            rejected = 401 in (live["player"].get("http"), live["current"].get("http"))
+        except urllib.error.HTTPError as e:
+            if e.code != 401:
+                raise
+            rejected = True
+        if rejected:
+            # A cached token was revoked or expired early: refresh once and retry.
+            invalidate_token()
+            token, scope = spotify_access_token(force_refresh=True)
+            live = fetch_live_endpoints(token, MAX_RECENT_ITEMS, recent_after_ms)
+    endpoint_timings_ms = live["timings_ms"]
+    RUN_TRACE["endpoint_ms"] = endpoint_timings_ms
+
+    player = live["player"]
+    player_http = player.get("http", -1)
+    player_data = player.get("data") if isinstance(player.get("data"), dict) else None
+
+    cur = live["current"]
+    api_http = cur.get("http", -1)
+    api_ok_current = api_http in (200, 204)
+
+    cur_data = cur.get("data") if isinstance(cur.get("data"), dict) else None
+    cur_is_playing = bool(cur_data.get("is_playing")) if isinstance(cur_data, dict) else False
+
+    has_active_session = (
+        player_http == 200
+        and isinstance(player_data, dict)
+        and isinstance(player_data.get("device"), dict)
+    )
+
+    device_type = "N/A"
+    device_name = "N/A"
+    volume_percent = None
+
+    status = "UNKNOWN"
+    playback_state = "UNKNOWN"
+    last_activity_type = "UNKNOWN"
+    now_track_name = "N/A"
+    is_playing = False
+    volume_telemetry = "NO ACTIVE SESSION"
+
+    if has_active_session:
+        is_playing = cur_is_playing if api_http == 200 else bool((player_data or {}).get("is_playing"))
+        status = "PLAYING" if is_playing else "IDLE"
+        playback_state = "ONLINE (active session)" if is_playing else "ONLINE (idle session)"
+        last_activity_type = "PLAYBACK_ACTIVE" if is_playing else "PLAYBACK_INACTIVE"
+    else:
+        if api_http == 200 and cur_is_playing:
+            is_playing = True
+            status = "PLAYING"
+            playback_state = "ONLINE (active session)"
+            last_activity_type = "PLAYBACK_ACTIVE"
+        else:
+            is_playing = False
+            status = "IDLE"
+            playback_state = "OFFLINE (no active session)"
+            last_activity_type = "NO_ACTIVE_SESSION"
+
+    if player_http == 200 and isinstance(player_data, dict) and isinstance(player_data.get("device"), dict):
+        dev = player_data.get("device") or {}
+        device_type = dev.get("type") or "N/A"
+        device_name = dev.get("name") or "N/A"
+        volume_percent = dev.get("volume_percent", None)
+        if is_playing:
+            volume_telemetry = "OK" if volume_percent is not None else "NOT EXPOSED BY DEVICE"
+        else:
+            volume_telemetry = "IDLE (session present, no playback)"
+    else:
+        volume_telemetry = "PLAYING (device not available this run)" if is_playing else "NO ACTIVE SESSION"
+
+    if api_http == 200 and isinstance(cur_data, dict):
+        item = cur_data.get("item") or {}
+        now_track_obj = parse_track_item(item)
+        if cur_is_playing and now_track_obj:
+            now_track_name = f"{now_track_obj['artist']} — {now_track_obj['title']}"
+
+    dlog(
+        f"session={has_active_session} is_playing={is_playing} status={status} "
+        f"playback_state={playback_state} player_http={player_http} api_http={api_http}"
+    )
+
+    if DEBUG_ACTIONS and os.environ.get("GITHUB_ACTIONS", "").lower() == "true":
+        os.makedirs(STATE_DIR, exist_ok=True)
+        debug_obj = {
+            "ts_utc": now_s,
+            "player_http": player_http,
+            "current_http": api_http,
+            "has_active_session": has_active_session,
+            "is_playing": is_playing,
             "status": status,
-            "last_track": last_track_name,
-            "last_played_utc": last_played_utc,
-            "sitrep": sitrep,
-            RECENT_HISTORY_STATE_KEY: recent_history,
-            LAST_DEVICE_TYPE_STATE_KEY: last_known_device_type,
-            LAST_DEVICE_NAME_STATE_KEY: last_known_device_name,
-            LAST_VOLUME_STATE_KEY: last_known_volume_percent,
-            LAST_VOLUME_TELEMETRY_STATE_KEY: last_known_volume_telemetry,
-            LAST_DEVICE_CAPTURED_UTC_KEY: last_known_device_captured_utc,
-            HISTORICAL_SNAPSHOT_STATE_KEY: historical_snapshot,
-            LAST_SUCCESSFUL_REPORT_KEY: report,
-            LAST_SUCCESSFUL_REPORT_UTC_KEY: now_s,
-        })
-        save_state(mutable_state)
-        save_history_store(history_store)
+            "playback_state": playback_state,
+            "last_activity_type": last_activity_type,
+            "device_type": device_type,
+            "device_name": device_name if SHOW_DEVICE_NAME else None,
+            "volume_percent": volume_percent,
+            "endpoint_ms": endpoint_timings_ms,
+        }
+        if DEBUG_DUMP_PAYLOADS:
+            debug_obj["player_payload_keys"] = sorted(list((player_data or {}).keys())) if isinstance(player_data, dict) else None
+            debug_obj["current_payload_keys"] = sorted(list((cur_data or {}).keys())) if isinstance(cur_data, dict) else None
+        with open(DEBUG_FILE, "w", encoding="utf-8") as f:
+            json.dump(debug_obj, f, ensure_ascii=False, indent=2)
+
+    recent_code, recent_payload = live["recent"]
+    recent_ok = recent_code == 200 and isinstance(recent_payload, dict)
+
+    # -------------------------------------------------------------------------
+    # Persistent listening history
+    # Spotify exposes only a recent-playback window. Every run merges newly
+    # observed plays into our own journal so 24h/7d/30d analytics are based on
+    # retained history, not only the latest API window.
+    # -------------------------------------------------------------------------
+    with trace_phase("history_merge") as phase:
+        api_history = (
+            recent_history_from_payload(
+                recent_payload,
+                MAX_RECENT_ITEMS * RECENT_MAX_PAGES,
+                token=token,
+                history_store=history_store,
+            )
+            if recent_ok else []
+        )
+        epochs = [event_epoch(e) for e in api_history if event_epoch(e) is not None]
+        if epochs:
+            extend_history_store(history_store, datetime.fromtimestamp(min(epochs), timezone.utc))
+        all_history = merge_history_events(history_store, api_history, now_s)
+        if recent_ok:
+            advance_recent_cursor(history_store, recent_payload)
+        # Playlist metadata: one fetch per uncached playlist id, the rest hit.
+        playlist_refs = sum(1 for e in api_history if e.get("context_type") == "playlist")
+        playlist_fetches = len(history_store.get("_playlist_lookups") or {})
+        phase["events_new"] = len(history_store.get("_new_events") or [])
+        phase["cache"] = {"hits": max(0, playlist_refs - playlist_fetches), "misses": playlist_fetches}
+    # Plain dicts: these are persisted in the report state as-is.
+    recent_history = [dict(e) for e in all_history[:RECENT_HISTORY_LIMIT]]
+
+    # Keep a lightweight history of observed player/device contexts. Spotify
+    # does not provide per-track historical device/volume information.
+    context_snapshot = {
+        "captured_utc": now_s,
+        "is_playing": bool(is_playing),
+        "track": now_track_name if is_playing else None,
+        "playback_state": playback_state,
+        "device_type": device_type if has_active_session else None,
+        "device_name": device_name if has_active_session else None,
+        "volume_percent": volume_percent if has_active_session else None,
+        "volume_telemetry": volume_telemetry,
+    }
+    append_playback_context(history_store, context_snapshot, now)
+
+    last_track_name = recent_history[0].get("track", "-") if recent_history else "-"
+    last_played_utc = recent_history[0].get("played_at_utc", "") if recent_history else ""
+    last_played_local = recent_history[0].get("played_at_local", "N/A") if recent_history else "N/A"
+
+    # Last observed playback context is persisted independently from whether a
+    # live session exists at this exact run.
+    if has_active_session:
+        last_known_device_type = device_type or "N/A"
+        last_known_device_name = device_name or "N/A"
+        last_known_volume_percent = volume_percent
+        last_known_volume_telemetry = volume_telemetry
+        last_known_device_captured_utc = now_s
+    else:
+        last_known_device_type = prev.get(LAST_DEVICE_TYPE_STATE_KEY) or "N/A"
+        last_known_device_name = prev.get(LAST_DEVICE_NAME_STATE_KEY) or "N/A"
+        last_known_volume_percent = prev.get(LAST_VOLUME_STATE_KEY)
+        last_known_volume_telemetry = prev.get(LAST_VOLUME_TELEMETRY_STATE_KEY) or "N/A"
+        last_known_device_captured_utc = prev.get(LAST_DEVICE_CAPTURED_UTC_KEY) or "N/A"
+
+    time_since_last_play = "N/A"
+    telemetry_age = "N/A"
+    if last_played_utc:
+        last_dt = parse_iso_z(last_played_utc)
+        if last_dt:
+            delta = (now - last_dt).total_seconds()
+            time_since_last_play = fmt_hms(delta)
+            telemetry_age = fmt_hms(delta)
+
+    def delta_str(prev_val, new_val, first_label="N/A (first report)"):
+        if not prev_val:
+            return first_label
+        if prev_val == new_val:
+            return "NO CHANGE"
+        return f"{prev_val} → {new_val}"
+
+    d_track = delta_str(prev_track, last_track_name)
+    d_last = delta_str(prev_last_played, last_played_utc)
+    d_stat = delta_str(prev_status, status)
+
+    d_time = "N/A (first report)"
+    if prev_report_ts:
+        pdt = parse_iso_z(prev_report_ts)
+        if pdt:
+            d_time = fmt_hms((now - pdt).total_seconds())
+
+    # -------------------------------------------------------------------------
+    # Analytics are evaluated lazily by the registered sections. The window
+    # engine, the session log and the rollups always run: the persisted state
+    # and the session/rollup/retention bookkeeping need them regardless of
+    # what is rendered.
+    # -------------------------------------------------------------------------
+    metrics = ReportMetrics({
+        "now": now,
+        "now_s": now_s,
+        "token": token,
+        "scope": scope,
+        "mutable_state": mutable_state,
+        "history_store": history_store,
+        "recent_history": recent_history,
+        "status": status,
+        "playback_state": playback_state,
+        "player_http": player_http,
+        "api_http": api_http,
+        "api_ok_current": api_ok_current,
+        "recent_ok": recent_ok,
+        "endpoint_timings_ms": endpoint_timings_ms,
+        "last_track_name": last_track_name,
+        "time_since_last_play": time_since_last_play,
+        "last_known_device_type": last_known_device_type,
+        "last_known_device_name": last_known_device_name,
+        "last_known_volume_percent": last_known_volume_percent,
+        "last_known_volume_telemetry": last_known_volume_telemetry,
+        "last_known_device_captured_utc": last_known_device_captured_utc,
+        "d_track": d_track,
+        "d_last": d_last,
+        "d_stat": d_stat,
+        "d_time": d_time,
+    })
+    with trace_phase("analytics"):
+        metrics["windows"]
+        metrics["session_log"]
+        metrics["rollups"]
+
+    with trace_phase("render"):
+        report = render_report(metrics)
+    dlog("metrics computed: " + ", ".join(metrics.computed()))
+
+    if WRITE_STATE_FILE:
+        with trace_phase("save"):
+            mutable_state.update({
+                "report_generated_utc": now_s,
+                "status": status,
+                "last_track": last_track_name,
+                "last_played_utc": last_played_utc,
+                RECENT_CURSOR_KEY: history_store.get(RECENT_CURSOR_KEY),
+                "sitrep": metrics["api"]["sitrep"],
+                RECENT_HISTORY_STATE_KEY: recent_history,
+                LAST_DEVICE_TYPE_STATE_KEY: last_known_device_type,
+                LAST_DEVICE_NAME_STATE_KEY: last_known_device_name,
+                LAST_VOLUME_STATE_KEY: last_known_volume_percent,
+                LAST_VOLUME_TELEMETRY_STATE_KEY: last_known_volume_telemetry,
+                LAST_DEVICE_CAPTURED_UTC_KEY: last_known_device_captured_utc,
+                HISTORICAL_SNAPSHOT_STATE_KEY: metrics["historical_snapshot"],
+                LAST_SUCCESSFUL_REPORT_KEY: report,
+                LAST_SUCCESSFUL_REPORT_UTC_KEY: now_s,
+            })
+            save_state(mutable_state)
+            # Retention maintenance: raw events go only after the rollups
+            # that hold their days are on disk.
+            save_rollups(metrics["rollups"])
+            aged_out = age_out_history(history_store, metrics["rollups"], now)
+            if aged_out:
+                dlog(f"history retention: aged out {aged_out} raw events")
+            save_history_store(history_store)
+            save_genre_cache(metrics["genre_cache"])
+            if "duration_cache" in metrics.computed():
+                save_duration_cache(metrics["duration_cache"])
+            save_session_log(metrics["session_log"])
+            if WRITE_POLL_SCHEDULE:
+                save_poll_schedule(metrics["poll_schedule"])
 
     return report
 
 
-def main():
+def run_once(retry_transient_auth: bool = False):
+    """One full run; returns "ok" or "auth_failsafe". With
+    retry_transient_auth (watch mode) only FATAL_AUTH_REASONS produce the auth
+    fail-safe report; other auth errors are raised for the caller to retry."""
+    outcome = "error"
     try:
         report = build_report()
-        rewrite_readme_block(report)
+        with trace_phase("readme"):
+            rewrite_readme_block(report)
+        outcome = "ok"
     except SpotifyAuthError as e:
+        if retry_transient_auth and e.reason not in FATAL_AUTH_REASONS:
+            raise
+        outcome = "auth_failsafe"
         print(f"Spotify auth failsafe: {e.reason} — {e.detail}", file=sys.stderr)
         if FAIL_SAFE_DO_NOT_BREAK_README:
             report = build_auth_failsafe_report(e.reason, e.detail)
             rewrite_readme_block(report)
-            sys.exit(0)
+            return outcome
         raise
+    finally:
+        save_run_log(outcome)
+    return outcome
+
+
+def watch_poll(token_box: dict, seen: dict):
+    """One cheap poll (currently-playing, plus recently-played after the last
+    flushed play). Returns (is_playing, changed since the previous poll)."""
+    if not token_box.get("token"):
+        token_box["token"], _ = spotify_access_token()
+    cur = fetch_currently_playing(token_box["token"])
+    if cur["http"] == 401:
+        token_box["token"], _ = spotify_access_token(force_refresh=True)
+        cur = fetch_currently_playing(token_box["token"])
+    data = cur["data"] if isinstance(cur.get("data"), dict) else {}
+    playing = bool(data.get("is_playing"))
+    observed = (playing, (data.get("item") or {}).get("uri"))
+
+    new_plays = False
+    if seen.get("cursor_ms"):
+        code, payload = fetch_recently_played(token_box["token"], limit=1, after_ms=seen["cursor_ms"], max_pages=1)
+        new_plays = code == 200 and bool((payload or {}).get("items"))
+    changed = new_plays or observed != seen.get("observed")
+    seen["observed"] = observed
+    return playing, changed
+
+
+def watch():
+    """Resident mode. Polls cheaply on an adaptive interval; plays and state
+    changes are merged by one full run (history, state, README) per burst,
+    WATCH_DEBOUNCE_SECONDS after the first change, or when the poll schedule
+    is due. SIGINT/SIGTERM flush pending changes and exit cleanly."""
+    stop = threading.Event()
+
+    def request_stop(signum, frame):
+        print(f"watch: {signal.Signals(signum).name}, shutting down", file=sys.stderr)
+        stop.set()
+
+    signal.signal(signal.SIGINT, request_stop)
+    signal.signal(signal.SIGTERM, request_stop)
+    HTTP_KEEPALIVE["enabled"] = True
+    token_box = {}
+    seen = {}
+    pending_since = float("-inf")   # flush once at start-up
+    backoff = 0
+    failsafe_written = False
+
+    def flush():
+        run_once(retry_transient_auth=True)
+        # The exact (millisecond) cursor of the run: last_played_utc is cut to
+        # whole seconds and would report the last play as new on every poll.
+        cursor = load_state().get(RECENT_CURSOR_KEY)
+        seen["cursor_ms"] = cursor if isinstance(cursor, int) and cursor > 0 else None
+        token_box.clear()   # the run may have refreshed the cached token
+
+    try:
+        while not stop.is_set():
+            try:
+                playing, changed = watch_poll(token_box, seen)
+                if changed and pending_since is None:
+                    pending_since = time.monotonic()
+                debounced = pending_since is not None and time.monotonic() - pending_since >= WATCH_DEBOUNCE_SECONDS
+                heartbeat = WRITE_STATE_FILE and WRITE_POLL_SCHEDULE and poll_due(load_poll_schedule())
+                if debounced or heartbeat:
+                    flush()
+                    pending_since = None
+                backoff = 0
+                failsafe_written = False
+                delay = WATCH_ACTIVE_POLL_SECONDS if playing else WATCH_IDLE_POLL_SECONDS
+            except SpotifyAuthError as e:
+                # Broken credentials: one full run writes the auth fail-safe
+                # report, then keep polling until they are fixed. Transient
+                # token-refresh failures just back off; the pending flush stays.
+                if e.reason in FATAL_AUTH_REASONS and not failsafe_written:
+                    try:
+                        flush()
+                        failsafe_written = True
+                        pending_since = None
+                    except Exception as flush_error:
+                        print(f"watch: fail-safe run failed: {type(flush_error).__name__}: {flush_error}", file=sys.stderr)
+                backoff = min(WATCH_ERROR_BACKOFF_MAX, max(WATCH_ACTIVE_POLL_SECONDS, backoff * 2))
+                delay = backoff
+                print(f"watch: {e.reason} (retry in {delay}s)", file=sys.stderr)
+            except Exception as e:
+                backoff = min(WATCH_ERROR_BACKOFF_MAX, max(WATCH_ACTIVE_POLL_SECONDS, backoff * 2))
+                delay = backoff
+                print(f"watch: {type(e).__name__}: {e} (retry in {delay}s)", file=sys.stderr)
+            stop.wait(delay)
+        if pending_since is not None:
+            flush()
+    finally:
+        close_keepalive_connections()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Spotify telemetry README feed")
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="stay resident: adaptive polling, debounced README/state writes, clean exit on SIGINT/SIGTERM",
+    )
+    args = parser.parse_args()
+    if args.watch:
+        watch()
+    else:
+        run_once()   # an auth fail-safe run returns normally: exit 0
 
 
 if __name__ == "__main__":
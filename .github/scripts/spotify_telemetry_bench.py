@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+# .github/scripts/spotify_telemetry_bench.py
+# Offline scaling benchmark for spotify_telemetry.py.
+#
+# Generates synthetic listening histories (Zipf-popular artists, multi-artist
+# tracks, playlist contexts, session-shaped gaps) and times the hot path phase
+# by phase against a throwaway state directory. Every network call is stubbed:
+# nothing here talks to Spotify or touches the real .github/state.
+#
+# Peak memory comes from tracemalloc, which slows Python code down noticeably;
+# compare timings across commits with --no-memory.
+#
+#   python3 .github/scripts/spotify_telemetry_bench.py
+#   python3 .github/scripts/spotify_telemetry_bench.py --sizes 1000,10000 --mode FILE
+#   python3 .github/scripts/spotify_telemetry_bench.py --build --json /tmp/bench.json
+
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+
+import spotify_telemetry as st
+
+DEFAULT_SIZES = (1_000, 10_000, 100_000, 1_000_000)
+NEW_EVENTS_PER_RUN = 50
+
+PLAYLIST_SHARE    = 0.35
+MULTI_ARTIST_SHARE = 0.2
+SESSION_BREAK_SHARE = 0.06
+
+
+# =============================================================================
+# Synthetic history
+# =============================================================================
+
+def synthetic_catalog(rng: random.Random, n_events: int):
+    n_artists = max(20, int(n_events ** 0.5) * 2)
+    artists = [(f"synthartist{i:07d}", f"Artist {i}") for i in range(n_artists)]
+    # Zipf-like popularity: a few artists dominate, a long tail is rare.
+    weights = [1.0 / (rank + 1) for rank in range(n_artists)]
+    tracks = []
+    for i in range(max(50, n_events // 8)):
+        credited = [rng.choices(artists, weights)[0]]
+        if rng.random() < MULTI_ARTIST_SHARE:
+            credited.append(rng.choice(artists))
+        track_id = f"synthtrack{i:08d}"
+        tracks.append({
+            "artist": ", ".join(name for _, name in credited),
+            "title": f"Track {i}",
+            "album": f"Album {i // 12}",
+            "uri": f"spotify:track:{track_id}",
+            "url": f"https://open.spotify.com/track/{track_id}",
+            "artist_ids": [aid for aid, _ in credited],
+        })
+    playlists = [
+        {
+            "playlist_id": f"synthplaylist{i:04d}",
+            "playlist_name": f"Playlist {i}",
+            "playlist_uri": f"spotify:playlist:synthplaylist{i:04d}",
+            "playlist_url": f"https://open.spotify.com/playlist/synthplaylist{i:04d}",
+        }
+        for i in range(40)
+    ]
+    return tracks, playlists
+
+
+def synthetic_event(track: dict, played_dt: datetime, playlist: dict | None):
+    local_dt = played_dt.astimezone(st.local_tz())
+    entry = {
+        "track": f"{track['artist']} — {track['title']}",
+        "artist": track["artist"],
+        "title": track["title"],
+        "album": track["album"],
+        "uri": track["uri"],
+        "url": track["url"],
+        "artist_ids": list(track["artist_ids"]),
+        "played_at_utc": st.utc_iso(played_dt),
+        "played_at_local": local_dt.strftime("%Y-%m-%d %H:%M:%S %Z"),
+        **st.event_time_fields(played_dt),
+    }
+    if playlist:
+        entry.update({
+            "context_type": "playlist",
+            "context_uri": playlist["playlist_uri"],
+            "context_url": playlist["playlist_url"],
+            **playlist,
+        })
+    return entry
+
+
+def synthetic_history(n_events: int, newest: datetime, seed: int):
+    """Newest-first events ending at `newest`, shaped like real sessions."""
+    rng = random.Random(seed)
+    tracks, playlists = synthetic_catalog(rng, n_events)
+    events = []
+    played_dt = newest
+    for _ in range(n_events):
+        if rng.random() < SESSION_BREAK_SHARE:
+            played_dt -= timedelta(minutes=rng.randint(40, 14 * 60))
+        else:
+            played_dt -= timedelta(seconds=rng.randint(120, 300))
+        playlist = rng.choice(playlists) if rng.random() < PLAYLIST_SHARE else None
+        events.append(synthetic_event(rng.choice(tracks), played_dt, playlist))
+    return events, tracks, playlists
+
+
+def synthetic_recent_items(tracks: list[dict], newest: datetime, count: int, seed: int):
+    """Recently-played API items strictly newer than the synthetic history."""
+    rng = random.Random(seed + 1)
+    items = []
+    for i in range(count):
+        track = rng.choice(tracks)
+        played_dt = newest + timedelta(minutes=3 * (count - i))
+        items.append({
+            "played_at": played_dt.strftime("%Y-%m-%dT%H:%M:%S.000Z"),
+            "track": {
+                "name": track["title"],
+                "uri": track["uri"],
+                "external_urls": {"spotify": track["url"]},
+                "album": {"name": track["album"]},
+                "duration_ms": 150000 + rng.randrange(150000),
+                "artists": [
+                    {"id": aid, "name": name}
+                    for aid, name in zip(track["artist_ids"], track["artist"].split(", "))
+                ],
+            },
+            "context": None,
+        })
+    return items
+
+
+# =============================================================================
+# Offline stubs
+# =============================================================================
+
+def install_offline_stubs(recent_items: list[dict], calls: list):
+    def fake_http_json(url, headers=None, data=None, timeout=25):
+        calls.append(url)
+        if url.startswith(st.AUTH_URL):
+            return 200, {}, {"access_token": "bench", "scope": "user-read-recently-played", "expires_in": 3600}
+        if "recently-played" in url:
+            return 200, {}, {"items": recent_items, "next": None}
+        if "/v1/artists" in url:
+            ids = url.split("ids=", 1)[-1].split(",") if "ids=" in url else []
+            return 200, {}, {"artists": [{"id": i, "genres": ["synth-pop"]} for i in ids]}
+        if "/v1/tracks" in url:
+            ids = url.split("ids=", 1)[-1].split(",")
+            return 200, {}, {"tracks": [{"id": i, "duration_ms": 210000} for i in ids]}
+        return 404, {}, None
+
+    def fake_endpoint(url, token, timeout=15):
+        calls.append(url)
+        if url == st.CURRENT_URL:
+            return {"http": 200, "data": {"is_playing": True, "item": recent_items[0]["track"]}}
+        return {"http": 200, "data": {"is_playing": True, "device": {"type": "Computer", "name": "bench", "volume_percent": 50}}}
+
+    st.http_json = fake_http_json
+    st.fetch_json_endpoint = fake_endpoint
+    st.spotify_access_token = lambda force_refresh=False: ("bench", "user-read-recently-played")
+    st.DEBUG_ACTIONS = False
+
+
+# =============================================================================
+# Measurement
+# =============================================================================
+
+def measure(results: list, name: str, fn, track_memory: bool):
+    if track_memory:
+        tracemalloc.reset_peak()
+        base, _ = tracemalloc.get_traced_memory()
+    t0 = time.perf_counter()
+    value = fn()
+    elapsed_ms = (time.perf_counter() - t0) * 1000.0
+    peak_mib = None
+    if track_memory:
+        _, peak = tracemalloc.get_traced_memory()
+        peak_mib = max(0, peak - base) / (1024 * 1024)
+    results.append({"phase": name, "ms": elapsed_ms, "peak_mib": peak_mib})
+    return value
+
+
+def bench_size(n_events: int, args, workdir: str):
+    state_dir = os.path.join(workdir, ".github", "state")
+    shutil.rmtree(os.path.join(workdir, ".github"), ignore_errors=True)
+    os.makedirs(state_dir)
+
+    now = datetime.now(timezone.utc).replace(microsecond=0)
+    newest = now - timedelta(minutes=3 * NEW_EVENTS_PER_RUN + 1)
+    results = []
+    track_memory = not args.no_memory
+
+    events, tracks, _ = measure(
+        results, "generate", lambda: synthetic_history(n_events, newest, args.seed), track_memory,
+    )
+    with open(st.HISTORY_FILE, "w", encoding="utf-8") as f:
+        json.dump({"schema_version": st.HISTORY_SCHEMA_VERSION, "events": events}, f, ensure_ascii=False)
+    history_bytes = os.path.getsize(st.HISTORY_FILE)
+    del events
+
+    if st.journal_mode():
+        # First load migrates the legacy file into monthly segments; saving
+        # strips the events from the legacy file, as a real run would.
+        migrated = measure(results, "load_history_store (migrate)", st.load_history_store, track_memory)
+        st.save_history_store(migrated)
+        del migrated
+    store = measure(results, "load_history_store", st.load_history_store, track_memory)
+
+    recent_items = synthetic_recent_items(tracks, newest, NEW_EVENTS_PER_RUN, args.seed)
+    incoming = st.recent_history_from_payload({"items": recent_items}, limit=NEW_EVENTS_PER_RUN)
+    measure(
+        results, "merge_history_events",
+        lambda: st.merge_history_events(store, incoming, st.utc_iso(now)), track_memory,
+    )
+    history = store["events"]
+
+    windows = {}
+    for label, delta in (("24h", timedelta(hours=24)), ("7d", timedelta(days=7)), ("30d", timedelta(days=30))):
+        windows[label] = measure(
+            results, f"filter_history_window {label}",
+            lambda delta=delta: st.filter_history_window(history, now - delta), track_memory,
+        )
+    measure(results, "behavioural_metrics 7d", lambda: st.behavioural_metrics(windows["7d"]), track_memory)
+    measure(results, "hour_hist_from_history 7d", lambda: st.hour_hist_from_history(windows["7d"]), track_memory)
+    measure(results, "week_activity_from_history 7d", lambda: st.week_activity_from_history(windows["7d"]), track_memory)
+    measure(results, "weekly_hour_matrix 7d", lambda: st.weekly_hour_matrix_from_history(windows["7d"]), track_memory)
+    measure(results, "daily_activity_series 30d", lambda: st.daily_activity_series(history, 30, now), track_memory)
+    measure(results, "aggregate_history_windows", lambda: st.aggregate_history_windows(history, now), track_memory)
+    if st.np is not None:
+        measure(
+            results, "aggregate_history_windows (numpy)",
+            lambda: st.aggregate_history_windows_columnar(history, now), track_memory,
+        )
+    measure(results, "rollups rebuild", lambda: st.rollups_for_history(store), track_memory)
+    measure(results, "save_history_store", lambda: st.save_history_store(store), track_memory)
+
+    calls = []
+    if args.build:
+        install_offline_stubs(recent_items, calls)
+        measure(results, "build_report (offline)", st.build_report, track_memory)
+
+    return {
+        "events": n_events,
+        "mode": st.HISTORY_STORAGE_MODE,
+        "legacy_history_bytes": history_bytes,
+        "stubbed_calls": len(calls),
+        "phases": results,
+    }
+
+
+def print_size_report(report: dict):
+    print(
+        f"\n== {report['events']:,} events | {report['mode']} | "
+        f"legacy file {report['legacy_history_bytes'] / (1024 * 1024):.1f} MiB =="
+    )
+    for row in report["phases"]:
+        peak = f"{row['peak_mib']:9.1f} MiB" if row["peak_mib"] is not None else ""
+        print(f"  {row['phase']:<32} {row['ms']:11.1f} ms {peak}")
+
+
+SIZE_SUFFIXES = {"k": 1_000, "m": 1_000_000}
+
+
+def parse_size(raw: str) -> int:
+    # "1000", "10_000", "10k", "1M"
+    s = raw.strip().replace("_", "").lower()
+    mult = SIZE_SUFFIXES.get(s[-1:], 1)
+    if mult != 1:
+        s = s[:-1]
+    return int(s) * mult
+
+
+def parse_sizes(raw: str):
+    return [parse_size(s) for s in raw.split(",") if s.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline scaling benchmark for spotify_telemetry.py")
+    parser.add_argument("--sizes", default=",".join(str(n) for n in DEFAULT_SIZES),
+                        help="comma-separated history sizes, k/M suffixes allowed (default: 1k,10k,100k,1M)")
+    parser.add_argument("--mode", choices=("JOURNAL", "FILE"), default=st.HISTORY_STORAGE_MODE,
+                        help="history storage mode to benchmark")
+    parser.add_argument("--seed", type=int, default=1337)
+    parser.add_argument("--build", action="store_true",
+                        help="also time a full build_report() with stubbed Spotify endpoints")
+    parser.add_argument("--no-memory", action="store_true",
+                        help="skip tracemalloc (faster, timings without tracing overhead)")
+    parser.add_argument("--json", dest="json_path", default="",
+                        help="write machine-readable results to this file")
+    args = parser.parse_args()
+
+    st.HISTORY_STORAGE_MODE = args.mode
+    st.DEBUG_ACTIONS = False
+    if not args.no_memory:
+        tracemalloc.start()
+
+    reports = []
+    workdir = tempfile.mkdtemp(prefix="spotify-bench-")
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        for n_events in parse_sizes(args.sizes):
+            report = bench_size(n_events, args, workdir)
+            print_size_report(report)
+            reports.append(report)
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "generated_utc": st.utc_iso(datetime.now(timezone.utc)),
+                "python": sys.version.split()[0],
+                "results": reports,
+            }, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
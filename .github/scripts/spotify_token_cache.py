@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# .github/scripts/spotify_token_cache.py
+# Shared Spotify access-token cache for every script in .github/scripts.
+#
+# Access tokens are valid for ~1 hour. Instead of exchanging the refresh token
+# on every start, entry points ask this module for a token and only pay the
+# accounts.spotify.com round trip when the cached one is missing, issued for
+# another client/refresh token, close to expiry, or rejected with a 401
+# (callers raise TokenRejected / check the status, call invalidate_token() and
+# retry once with force_refresh=True).
+#
+# The cache file holds a live bearer token: it is written 0600, atomically,
+# and is git-ignored. It must never be committed. For the same reason it is
+# not carried between GitHub Actions runs (each starts from a fresh checkout),
+# so a workflow run still does one exchange; the saving is for scripts run in
+# the same job, local runs and the resident --watch process.
+
+import hashlib
+import json
+import os
+import time
+
+TOKEN_CACHE_FILE = os.environ.get(
+    "SPOTIFY_TOKEN_CACHE_FILE",
+    os.path.join(".github", "state", "spotify_token_cache.json"),
+).strip()
+
+# Refresh this many seconds before the reported expiry.
+EXPIRY_MARGIN_SECONDS = 300
+DEFAULT_EXPIRES_IN    = 3600
+
+
+class TokenRejected(RuntimeError):
+    """An API call answered 401: the access token was revoked or expired early."""
+
+
+def credential_fingerprint(client_id: str, refresh_token: str) -> str:
+    # Binds the cached token to the credentials that produced it, so rotating
+    # SPOTIFY_REFRESH_TOKEN or the client invalidates the cache. Only a hash
+    # is stored, never the refresh token itself.
+    raw = f"{client_id}:{refresh_token}".encode("utf-8")
+    return hashlib.sha256(raw).hexdigest()[:24]
+
+
+def load_cached_token(client_id: str, refresh_token: str, now: float | None = None):
+    now = time.time() if now is None else now
+    try:
+        with open(TOKEN_CACHE_FILE, "r", encoding="utf-8") as f:
+            obj = json.load(f)
+    except Exception:
+        return None
+    if not isinstance(obj, dict) or not obj.get("access_token"):
+        return None
+    if obj.get("fingerprint") != credential_fingerprint(client_id, refresh_token):
+        return None
+    if float(obj.get("expires_epoch") or 0) - EXPIRY_MARGIN_SECONDS <= now:
+        return None
+    return obj
+
+
+def store_token(
+    client_id: str,
+    refresh_token: str,
+    access_token: str,
+    expires_in: int | None = None,
+    scope: str = "",
+    now: float | None = None,
+):
+    now = time.time() if now is None else now
+    obj = {
+        "access_token": access_token,
+        "scope": scope or "",
+        "expires_epoch": int(now + int(expires_in or DEFAULT_EXPIRES_IN)),
+        "fingerprint": credential_fingerprint(client_id, refresh_token),
+    }
+    directory = os.path.dirname(TOKEN_CACHE_FILE)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp = f"{TOKEN_CACHE_FILE}.{os.getpid()}.tmp"
+    try:
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(obj, f)
+        os.chmod(tmp, 0o600)
+        os.replace(tmp, TOKEN_CACHE_FILE)
+    except OSError:
+        # A read-only checkout must not break token acquisition.
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+    return obj
+
+
+def invalidate_token():
+    try:
+        os.remove(TOKEN_CACHE_FILE)
+    except OSError:
+        pass
+
+
+def cached_access_token(client_id: str, refresh_token: str, refresh_fn, force_refresh: bool = False):
+    """Return (access_token, scope), refreshing only when needed.
+
+    refresh_fn() performs the real exchange and returns
+    (access_token, scope, expires_in). Its exceptions propagate unchanged so
+    each caller keeps its own failure handling.
+    """
+    if not force_refresh:
+        cached = load_cached_token(client_id, refresh_token)
+        if cached:
+            return cached["access_token"], cached.get("scope") or ""
+    access_token, scope, expires_in = refresh_fn()
+    if access_token:
+        store_token(client_id, refresh_token, access_token, expires_in, scope)
+    return access_token, scope or ""
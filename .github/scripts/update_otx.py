@@ -1,6 +1,11 @@
 import requests
 import datetime
 import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "scripts"))
+
+from readme_blocks import ReadmeBlocks
 
 API_KEY = os.getenv("OTX_API_KEY")
 HEADERS = {"X-OTX-API-KEY": API_KEY}
@@ -18,9 +23,6 @@ def fetch_latest_pulse():
     }
 
 def update_readme(pulse):
-    with open("README.md", "r", encoding="utf-8") as file:
-        content = file.read()
-
     new_block = f"""\
 **Threat Type**: {pulse['type'].title()}  
 **Indicator**: {pulse['indicator']}  
@@ -32,11 +34,9 @@ def update_readme(pulse):
 
     start_tag = "<!-- OTX-START -->"
     end_tag = "<!-- OTX-END -->"
-    updated = f"{start_tag}\n{new_block}\n{end_tag}"
-    final_content = content.split(start_tag)[0] + updated + content.split(end_tag)[-1]
-
-    with open("README.md", "w", encoding="utf-8") as file:
-        file.write(final_content)
+    readme = ReadmeBlocks("README.md")
+    readme.set(start_tag, end_tag, f"\n{new_block}\n", name="otx")
+    readme.write()
 
 if __name__ == "__main__":
     pulse = fetch_latest_pulse()
@@ -5,14 +5,12 @@ from GoodreadsUtils import (
     ensure_dir,
     html_escape,
     read_json,
-    read_text,
-    replace_between_markers,
     sha256_json,
     truncate,
     utc_now_iso,
     write_json,
-    write_text_if_changed,
 )
+from readme_blocks import ReadmeBlocks
 
 
 SECTION_ORDER = [
@@ -539,44 +537,31 @@ def main() -> int:
     if snapshot is None:
         snapshot = build_empty_snapshot()
 
-    readme = read_text(config.README_PATH)
-
     render_visual = getattr(config, "OPTION1_COVERS_ONLY_ENABLED", True) or getattr(config, "OPTION2_CARD_TABLE_ENABLED", False)
     render_cli = getattr(config, "OPTION3_CLI_ENABLED", True)
+    preserve_unused = getattr(config, "PRESERVE_UNUSED_BLOCKS", True)
 
-    if render_visual:
-        visual_block = render_visual_block(snapshot)
-        readme = replace_between_markers(
-            readme,
-            config.README_MARKER_VISUAL_START,
-            config.README_MARKER_VISUAL_END,
-            visual_block,
-        )
-    elif not getattr(config, "PRESERVE_UNUSED_BLOCKS", True):
-        readme = replace_between_markers(
-            readme,
+    readme = ReadmeBlocks(config.README_PATH)
+
+    if render_visual or not preserve_unused:
+        visual_block = render_visual_block(snapshot) if render_visual else ""
+        readme.set(
             config.README_MARKER_VISUAL_START,
             config.README_MARKER_VISUAL_END,
-            "",
+            f"\n{visual_block.rstrip()}\n",
+            name="visual",
         )
 
-    if render_cli:
-        cli_block = render_cli_block(snapshot)
-        readme = replace_between_markers(
-            readme,
-            config.README_MARKER_CLI_START,
-            config.README_MARKER_CLI_END,
-            cli_block,
-        )
-    elif not getattr(config, "PRESERVE_UNUSED_BLOCKS", True):
-        readme = replace_between_markers(
-            readme,
+    if render_cli or not preserve_unused:
+        cli_block = render_cli_block(snapshot) if render_cli else ""
+        readme.set(
             config.README_MARKER_CLI_START,
             config.README_MARKER_CLI_END,
-            "",
+            f"\n{cli_block.rstrip()}\n",
+            name="cli",
         )
 
-    changed = write_text_if_changed(config.README_PATH, readme)
+    changed = bool(readme.write())
     write_render_metadata(snapshot, changed, render_visual, render_cli)
 
     print(f"Goodreads render completed. README changed: {changed}")
@@ -2,6 +2,8 @@ import urllib.request
 import time
 from pathlib import Path
 
+from readme_blocks import ReadmeBlocks
+
 ENDPOINT = "https://spotify-github-profile.kittinanx.com/api/view?uid=12133266428&cover_image=true&theme=natemoo-re&show_offline=false&background_color=000000&interchange=false&bar_color=53b14f&bar_color_cover=true"
 
 BLANK = "https://raw.githubusercontent.com/felipealfonsog/felipealfonsog/master/images/blank.svg"
@@ -65,28 +67,21 @@ def endpoint_alive():
     return False
 
 
-def replace_widget(content, widget):
-    start_index = content.index(START) + len(START)
-    end_index = content.index(END)
-
-    return content[:start_index] + "\n" + widget + "\n" + content[end_index:]
-
-
 def main():
-    text = README.read_text(encoding="utf-8")
-
     alive = endpoint_alive()
 
     if alive:
         print("Endpoint OK")
-        new_text = replace_widget(text, LIVE_WIDGET)
+        widget = LIVE_WIDGET
     else:
         print("Endpoint DOWN")
-        new_text = replace_widget(text, BLANK_WIDGET)
+        widget = BLANK_WIDGET
+
+    readme = ReadmeBlocks(README)
+    readme.set(START, END, "\n" + widget + "\n", name="spotify-widget")
 
-    if new_text != text:
+    if readme.write():
         print("Updating README")
-        README.write_text(new_text, encoding="utf-8")
     else:
         print("No changes needed")
 
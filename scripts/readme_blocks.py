@@ -0,0 +1,151 @@
+"""
+Shared README block engine.
+
+Every widget script owns one or more marker-delimited blocks of README.md
+(<!-- NAME:START --> ... <!-- NAME:END -->). Instead of each script running
+its own regex over the whole file and rewriting it unconditionally, they all
+go through ReadmeBlocks:
+
+    doc = ReadmeBlocks("README.md")
+    doc.set("<!-- OTX-START -->", "<!-- OTX-END -->", f"\\n{body}\\n", name="otx")
+    changed = doc.write()          # ["otx"], or [] when nothing changed
+
+The file is read once and every HTML comment is indexed by its exact text,
+so any number of marker pairs resolve without rescanning. Pending updates
+are spliced into the segment list in one pass and the result is written
+atomically (temp file + rename), only when the bytes differ.
+"""
+
+from __future__ import annotations
+
+import bisect
+import os
+import re
+import tempfile
+from pathlib import Path
+
+COMMENT_RE = re.compile(r"<!--.*?-->", re.DOTALL)
+
+
+class ReadmeBlockError(RuntimeError):
+    pass
+
+
+class ReadmeBlocks:
+    def __init__(self, path: str | os.PathLike = "README.md", text: str | None = None):
+        self.path = Path(path)
+        if text is None:
+            self.load(self.path.read_bytes().decode("utf-8"))
+        else:
+            self.load(text)
+
+    def load(self, text: str) -> None:
+        self.text = text
+        self.original = text.encode("utf-8")
+        # Comment text -> sorted start offsets of its occurrences.
+        self.markers: dict[str, list[int]] = {}
+        for match in COMMENT_RE.finditer(text):
+            self.markers.setdefault(match.group(0), []).append(match.start())
+        # (body_start, body_end) -> (name, new body)
+        self.updates: dict[tuple[int, int], tuple[str, str]] = {}
+
+    def find(self, marker: str, pos: int = 0) -> int:
+        offsets = self.markers.get(marker)
+        if offsets:
+            i = bisect.bisect_left(offsets, pos)
+            if i < len(offsets):
+                return offsets[i]
+        # Markers that are not a whole comment (or sit inside another one).
+        return self.text.find(marker, pos)
+
+    def locate(self, start_marker: str, end_marker: str) -> tuple[int, int] | None:
+        """Body span between the first start marker and the first end marker after it."""
+        start = self.find(start_marker)
+        if start < 0:
+            return None
+        body_start = start + len(start_marker)
+        end = self.find(end_marker, body_start)
+        if end < 0:
+            return None
+        return body_start, end
+
+    def has(self, start_marker: str, end_marker: str) -> bool:
+        return self.locate(start_marker, end_marker) is not None
+
+    def get(self, start_marker: str, end_marker: str) -> str | None:
+        """Current body of a block (pending update included), or None."""
+        span = self.locate(start_marker, end_marker)
+        if span is None:
+            return None
+        if span in self.updates:
+            return self.updates[span][1]
+        return self.text[span[0]:span[1]]
+
+    def set(self, start_marker: str, end_marker: str, body: str, name: str | None = None) -> bool:
+        """Queue a new body (everything between the markers). True when it
+        differs from the current one."""
+        span = self.locate(start_marker, end_marker)
+        if span is None:
+            raise ReadmeBlockError(f"README markers not found: {start_marker} / {end_marker}")
+        for other in self.updates:
+            if other != span and other[0] < span[1] and span[0] < other[1]:
+                raise ReadmeBlockError(f"README block {start_marker} overlaps {self.updates[other][0]}")
+        self.updates[span] = (name or start_marker, body)
+        return body != self.text[span[0]:span[1]]
+
+    def changed(self) -> list[str]:
+        return [
+            name for (lo, hi), (name, body) in sorted(self.updates.items())
+            if body != self.text[lo:hi]
+        ]
+
+    def render(self) -> str:
+        segments = []
+        pos = 0
+        for (lo, hi), (_, body) in sorted(self.updates.items()):
+            segments.append(self.text[pos:lo])
+            segments.append(body)
+            pos = hi
+        segments.append(self.text[pos:])
+        return "".join(segments)
+
+    def write(self) -> list[str]:
+        """Write the README if any block changed; names of the changed blocks."""
+        changed = self.changed()
+        if not changed:
+            return []
+        text = self.render()
+        data = text.encode("utf-8")
+        if data == self.original:
+            return []
+        write_atomic(self.path, data)
+        self.load(text)
+        return changed
+
+
+def write_atomic(path: str | os.PathLike, data: bytes) -> None:
+    path = Path(path)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        try:
+            os.chmod(tmp, path.stat().st_mode & 0o777)
+        except OSError:
+            os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def update_readme_blocks(path: str | os.PathLike, updates) -> list[str]:
+    """Apply (start_marker, end_marker, body) updates in one read and at
+    most one write; names (start markers) of the blocks that changed."""
+    doc = ReadmeBlocks(path)
+    for start_marker, end_marker, body in updates:
+        doc.set(start_marker, end_marker, body)
+    return doc.write()
@@ -0,0 +1,311 @@
+"""
+Content-hash incremental build for README blocks.
+
+Each entry in BLOCKS declares the README markers of a block, the files it is
+rendered from (state/payload JSON, config modules, the renderer's own source),
+its renderer and, optionally, a "live" predicate for renders that currently
+depend on something no file captures (always rebuilt). A build hashes the
+inputs and compares them with the per-block manifest in
+data/readme_build/<block>.json; with --changed-only a block is re-rendered
+only when an input hash changed or the README no longer holds the body it
+last rendered. All rendered blocks go through one ReadmeBlocks pass, so the
+README is written at most once and only if its bytes change.
+
+    python scripts/readme_build.py build --changed-only
+    python scripts/readme_build.py build --changed-only --block list-icons1
+    python scripts/readme_build.py status
+
+Blocks whose content comes straight from a live fetch (Spotify telemetry,
+projects, top followers, OTX, Spotify widget) have no stored input to hash;
+their scripts keep rendering on every run and rely on ReadmeBlocks to skip
+no-op writes.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import importlib
+import json
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+SCRIPTS_DIR = ROOT / "scripts"
+if str(SCRIPTS_DIR) not in sys.path:
+    sys.path.insert(0, str(SCRIPTS_DIR))
+
+from readme_blocks import ReadmeBlocks, write_atomic
+
+README_PATH = ROOT / "README.md"
+MANIFEST_DIR = ROOT / "data" / "readme_build"
+MANIFEST_SCHEMA_VERSION = 1
+
+
+# ============================================================
+# RENDERERS
+# Each returns the new block body (everything between the markers), or None
+# to leave the block untouched.
+# ============================================================
+
+def render_listicons(n: int):
+    module = importlib.import_module(f"render_listicons{n}")
+    return "\n" + module.build_block() + "\n"
+
+
+def listicons_live(n: int) -> bool:
+    # Link modes blank the block while gnlz.cl is down: that health check is
+    # an input no file hash can capture.
+    module = importlib.import_module(f"render_listicons{n}")
+    mode = module.normalize_render_mode(module.cfg.RENDER_MODE)
+    return mode.startswith("links_") and bool(module.cfg.FORCE_EMPTY_IF_GNLZ_DOWN)
+
+
+def goodreads_snapshot():
+    import GoodreadsConfig as config
+    from GoodreadsRender import build_empty_snapshot
+    from GoodreadsUtils import read_json
+
+    snapshot = read_json(config.CACHE_PATH)
+    return config, (snapshot if snapshot is not None else build_empty_snapshot())
+
+
+def render_goodreads_visual():
+    from GoodreadsRender import render_visual_block
+
+    config, snapshot = goodreads_snapshot()
+    enabled = getattr(config, "OPTION1_COVERS_ONLY_ENABLED", True) or getattr(config, "OPTION2_CARD_TABLE_ENABLED", False)
+    if not enabled:
+        return None if getattr(config, "PRESERVE_UNUSED_BLOCKS", True) else "\n\n"
+    return f"\n{render_visual_block(snapshot).rstrip()}\n"
+
+
+def render_goodreads_cli():
+    from GoodreadsRender import render_cli_block
+
+    config, snapshot = goodreads_snapshot()
+    if not getattr(config, "OPTION3_CLI_ENABLED", True):
+        return None if getattr(config, "PRESERVE_UNUSED_BLOCKS", True) else "\n\n"
+    return f"\n{render_cli_block(snapshot).rstrip()}\n"
+
+
+def render_site_intel():
+    import config_site_intel as config
+    from site_intel import load_json, render_cli
+
+    snapshot = load_json(config.CACHE_PATH, {})
+    if not isinstance(snapshot, dict) or not snapshot:
+        return None
+    return f"\n```text\n{render_cli(snapshot)}\n```\n"
+
+
+def render_presence():
+    telemetry_dir = str(ROOT / "telemetry")
+    if telemetry_dir not in sys.path:
+        sys.path.insert(0, telemetry_dir)
+    from generate_presence import build_cli_block, load_last_presence
+
+    return f"\n```text\n{build_cli_block(load_last_presence())}\n```\n"
+
+
+# ============================================================
+# BUILD GRAPH
+# ============================================================
+
+def listicons_block(n: int) -> dict:
+    cfg = importlib.import_module(f"config_listicons{n}")
+    return {
+        "markers": (cfg.README_START_MARKER, cfg.README_END_MARKER),
+        "inputs": [
+            f"data/list-icons{n}-links.json",
+            f"scripts/config_listicons{n}.py",
+            f"scripts/render_listicons{n}.py",
+        ],
+        "render": lambda: render_listicons(n),
+        "live": lambda: listicons_live(n),
+    }
+
+
+GOODREADS_INPUTS = [
+    "data/GoodreadsCache.json",
+    "scripts/GoodreadsConfig.py",
+    "scripts/GoodreadsRender.py",
+    "scripts/GoodreadsUtils.py",
+]
+
+BLOCKS = {
+    "list-icons1": listicons_block(1),
+    "list-icons2": listicons_block(2),
+    "list-icons3": listicons_block(3),
+    "list-icons4": listicons_block(4),
+    "goodreads-visual": {
+        "markers": ("<!-- GOODREADS:VISUAL_START -->", "<!-- GOODREADS:VISUAL_END -->"),
+        "inputs": GOODREADS_INPUTS,
+        "render": render_goodreads_visual,
+    },
+    "goodreads-cli": {
+        "markers": ("<!-- GOODREADS:CLI_START -->", "<!-- GOODREADS:CLI_END -->"),
+        "inputs": GOODREADS_INPUTS,
+        "render": render_goodreads_cli,
+    },
+    "site-intel": {
+        "markers": ("<!-- GNLZ:SITE_INTEL:START -->", "<!-- GNLZ:SITE_INTEL:END -->"),
+        "inputs": ["data/last_probe.json", "scripts/config_site_intel.py", "scripts/site_intel.py"],
+        "render": render_site_intel,
+    },
+    "telemetry-presence": {
+        "markers": ("<!-- telemetry-presence:start -->", "<!-- telemetry-presence:end -->"),
+        "inputs": ["telemetry/last_presence.json", "telemetry/generate_presence.py"],
+        "render": render_presence,
+    },
+}
+
+
+# ============================================================
+# MANIFEST
+# ============================================================
+
+def sha256_bytes(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def input_hashes(block: dict) -> dict[str, str]:
+    hashes = {}
+    for rel in block["inputs"]:
+        try:
+            hashes[rel] = sha256_bytes((ROOT / rel).read_bytes())
+        except OSError:
+            hashes[rel] = "missing"
+    return hashes
+
+
+def manifest_path(name: str) -> Path:
+    # One file per block: workflows committing different blocks never touch
+    # the same file.
+    return MANIFEST_DIR / f"{name}.json"
+
+
+def load_manifest(name: str) -> dict:
+    try:
+        obj = json.loads(manifest_path(name).read_text(encoding="utf-8"))
+        if isinstance(obj, dict) and obj.get("schema_version") == MANIFEST_SCHEMA_VERSION:
+            return obj
+    except Exception:
+        pass
+    return {}
+
+
+def save_manifest(name: str, inputs: dict[str, str], output: str) -> None:
+    MANIFEST_DIR.mkdir(parents=True, exist_ok=True)
+    obj = {
+        "schema_version": MANIFEST_SCHEMA_VERSION,
+        "block": name,
+        "inputs": inputs,
+        "output": output,
+        "built_utc": datetime.now(timezone.utc).replace(microsecond=0).isoformat(),
+    }
+    write_atomic(manifest_path(name), (json.dumps(obj, indent=2, sort_keys=True) + "\n").encode("utf-8"))
+
+
+def dirty_reason(name: str, readme: ReadmeBlocks, inputs: dict[str, str]) -> str | None:
+    """Why a block needs rendering, or None when it is up to date."""
+    live = BLOCKS[name].get("live")
+    if live is not None and live():
+        return "live input"
+    manifest = load_manifest(name)
+    if not manifest:
+        return "no manifest"
+    previous = manifest.get("inputs") or {}
+    changed = [rel for rel in inputs if previous.get(rel) != inputs[rel]]
+    if changed:
+        return "changed: " + ", ".join(changed)
+    if set(previous) != set(inputs):
+        return "input list changed"
+    current = readme.get(*BLOCKS[name]["markers"])
+    if current is None or sha256_bytes(current.encode("utf-8")) != manifest.get("output"):
+        return "README block differs from last render"
+    return None
+
+
+# ============================================================
+# COMMANDS
+# ============================================================
+
+def build(names: list[str], changed_only: bool, dry_run: bool = False, required: bool = False) -> int:
+    """Render the named blocks; non-zero when a render fails or, for blocks
+    asked for explicitly (required), when their markers are missing."""
+    readme = ReadmeBlocks(README_PATH)
+    rendered = {}
+    failed = 0
+
+    for name in names:
+        block = BLOCKS[name]
+        if not readme.has(*block["markers"]):
+            if required:
+                print(f"{name}: README markers not found or invalid", file=sys.stderr)
+                failed += 1
+            else:
+                print(f"{name}: markers not in README, skipped")
+            continue
+        inputs = input_hashes(block)
+        reason = dirty_reason(name, readme, inputs) if changed_only else "forced"
+        if reason is None:
+            print(f"{name}: clean")
+            continue
+        try:
+            body = block["render"]()
+        except Exception as exc:
+            print(f"{name}: render failed ({exc}); block left as is", file=sys.stderr)
+            failed += 1
+            continue
+        if body is None:
+            print(f"{name}: renderer skipped ({reason})")
+            continue
+        readme.set(*block["markers"], body, name=name)
+        rendered[name] = (inputs, sha256_bytes(body.encode("utf-8")))
+        print(f"{name}: rendered ({reason})")
+
+    if dry_run:
+        print(f"dry run: would change {readme.changed() or 'nothing'}")
+        return 1 if failed else 0
+
+    changed = readme.write()
+    for name, (inputs, output) in rendered.items():
+        save_manifest(name, inputs, output)
+    print(f"README {'updated: ' + ', '.join(changed) if changed else 'unchanged'}")
+    return 1 if failed else 0
+
+
+def status(names: list[str]) -> int:
+    readme = ReadmeBlocks(README_PATH)
+    for name in names:
+        block = BLOCKS[name]
+        if not readme.has(*block["markers"]):
+            print(f"{name}: markers not in README")
+            continue
+        reason = dirty_reason(name, readme, input_hashes(block))
+        print(f"{name}: {'dirty (' + reason + ')' if reason else 'clean'}")
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Incremental README block build")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build_parser = sub.add_parser("build", help="render blocks into README.md")
+    build_parser.add_argument("--changed-only", action="store_true", help="render only blocks whose inputs changed")
+    build_parser.add_argument("--dry-run", action="store_true", help="render but write nothing")
+    status_parser = sub.add_parser("status", help="show which blocks are dirty")
+    for p in (build_parser, status_parser):
+        p.add_argument("--block", action="append", choices=sorted(BLOCKS), help="limit to this block (repeatable)")
+    args = parser.parse_args()
+
+    names = args.block or list(BLOCKS)
+    if args.command == "status":
+        return status(names)
+    # Blocks named with --block must exist: their workflow fails otherwise.
+    return build(names, args.changed_only, args.dry_run, required=bool(args.block))
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -7,6 +7,7 @@ from urllib.error import HTTPError, URLError
 from urllib.request import Request, urlopen
 
 import config_listicons2 as cfg
+from readme_blocks import ReadmeBlocks
 
 
 ROOT = Path(__file__).resolve().parent.parent
@@ -137,28 +138,18 @@ def build_block() -> str:
     return ""
 
 
-def replace_between_markers(readme_text: str, new_content: str) -> str:
-    start = readme_text.find(cfg.README_START_MARKER)
-    end = readme_text.find(cfg.README_END_MARKER)
-
-    if start == -1 or end == -1 or end < start:
-        raise RuntimeError("README markers for List-icons2 not found or invalid.")
-
-    insert_at = start + len(cfg.README_START_MARKER)
-    return readme_text[:insert_at] + "\n" + new_content + "\n" + readme_text[end:]
-
-
 def main() -> int:
     if not README_PATH.exists():
         print(f"{cfg.README_PATH} not found.", file=sys.stderr)
         return 1
 
-    original = README_PATH.read_text(encoding="utf-8")
     block = build_block()
-    updated = replace_between_markers(original, block)
+    readme = ReadmeBlocks(README_PATH)
+    if not readme.has(cfg.README_START_MARKER, cfg.README_END_MARKER):
+        raise RuntimeError("README markers for List-icons2 not found or invalid.")
+    readme.set(cfg.README_START_MARKER, cfg.README_END_MARKER, "\n" + block + "\n", name="List-icons2")
 
-    if updated != original:
-        README_PATH.write_text(updated, encoding="utf-8")
+    if readme.write():
         print("README updated for List-icons2.")
     else:
         print("No changes needed for List-icons2.")
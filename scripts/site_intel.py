@@ -10,7 +10,6 @@ if str(SCRIPT_DIR) not in sys.path:
 
 import json
 import math
-import re
 import socket
 import ssl
 import time
@@ -21,6 +20,7 @@ from urllib.parse import urlparse
 import requests
 
 import config_site_intel as config
+from readme_blocks import ReadmeBlocks, write_atomic
 
 
 def now_utc_iso() -> str:
@@ -676,36 +676,26 @@ def replace_readme_block(readme_path: Path, new_block: str) -> None:
     if not readme_path.exists():
         raise RuntimeError(f"README not found: {readme_path}")
 
-    content = readme_path.read_text(encoding="utf-8")
+    readme = ReadmeBlocks(readme_path)
+    body = f"\n```text\n{new_block}\n```\n"
 
-    replacement = (
-        f"{config.README_START}\n"
-        f"```text\n"
-        f"{new_block}\n"
-        f"```\n"
-        f"{config.README_END}"
-    )
-
-    pattern = re.compile(
-        rf"{re.escape(config.README_START)}.*?{re.escape(config.README_END)}",
-        flags=re.DOTALL,
-    )
+    if readme.has(config.README_START, config.README_END):
+        readme.set(config.README_START, config.README_END, body, name="site_intel")
+        readme.write()
+        return
 
-    if pattern.search(content):
-        new_content = pattern.sub(replacement, content, count=1)
-    else:
-        if not content.endswith("\n"):
-            content += "\n"
-
-        new_content = (
-            content
-            + "\n"
-            + "## GNLZ.CL Site Operations Intelligence\n\n"
-            + replacement
-            + "\n"
-        )
+    content = readme.text
+    if not content.endswith("\n"):
+        content += "\n"
 
-    readme_path.write_text(new_content, encoding="utf-8")
+    new_content = (
+        content
+        + "\n"
+        + "## GNLZ.CL Site Operations Intelligence\n\n"
+        + f"{config.README_START}{body}{config.README_END}"
+        + "\n"
+    )
+    write_atomic(readme_path, new_content.encode("utf-8"))
 
 
 def main() -> int:
@@ -5,6 +5,8 @@ import json
 import time
 import requests
 
+from readme_blocks import ReadmeBlocks
+
 USERNAME = os.getenv("GITHUB_USERNAME", "felipealfonsog")
 README_PATH = os.getenv("README_PATH", "README.md")
 
@@ -355,23 +357,13 @@ def main():
     block = build_block(pinned, latest, recent, popular, curated)
     validate_block(block)
 
-    with open(README_PATH, "r", encoding="utf-8") as f:
-        content = f.read()
-
-    pattern = r"<!-- PROJECTS:START -->(.*?)<!-- PROJECTS:END -->"
-    if not re.search(pattern, content, flags=re.S):
+    readme = ReadmeBlocks(README_PATH)
+    if not readme.has("<!-- PROJECTS:START -->", "<!-- PROJECTS:END -->"):
         raise RuntimeError("Markers not found. Add <!-- PROJECTS:START --> and <!-- PROJECTS:END --> to README.md")
 
-    updated = re.sub(
-        pattern,
-        f"<!-- PROJECTS:START -->\n{block}\n<!-- PROJECTS:END -->",
-        content,
-        flags=re.S,
-    )
+    readme.set("<!-- PROJECTS:START -->", "<!-- PROJECTS:END -->", f"\n{block}\n", name="projects")
 
-    if updated != content:
-        with open(README_PATH, "w", encoding="utf-8") as f:
-            f.write(updated)
+    if readme.write():
         print("README updated.")
     else:
         print("No changes.")
@@ -16,8 +16,12 @@
 
 import requests
 import json
+import os
 import sys
-import re
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts"))
+
+from readme_blocks import ReadmeBlocks
 
 if __name__ == "__main__":
     assert(len(sys.argv) == 4)
@@ -122,10 +126,8 @@ query {{
 
 
 
-    with open(readmePath, "r") as readme:
-        content = readme.read()
-
-    newContent = re.sub(r"(?<=<!\-\-START_SECTION:top\-followers\-\->)[\s\S]*(?=<!\-\-END_SECTION:top\-followers\-\->)", f"\n{html}\n", content)
-
-    with open(readmePath, "w") as readme:
-        readme.write(newContent)
+    readme = ReadmeBlocks(readmePath)
+    start, end = "<!--START_SECTION:top-followers-->", "<!--END_SECTION:top-followers-->"
+    if readme.has(start, end):
+        readme.set(start, end, f"\n{html}\n", name="top-followers")
+        readme.write()
@@ -17,12 +17,19 @@ Este script:
 
 import json
 import random
+import sys
 from dataclasses import asdict, dataclass
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Dict, List, Tuple
 from zoneinfo import ZoneInfo
 
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent / "scripts"
+if str(SCRIPTS_DIR) not in sys.path:
+    sys.path.insert(0, str(SCRIPTS_DIR))
+
+from readme_blocks import ReadmeBlocks
+
 
 # ============================================================
 # RUTAS BASE
@@ -314,26 +321,13 @@ def build_cli_block(state: PresenceState, used_fallback: bool = False) -> str:
 # ============================================================
 
 def update_readme_block(readme_path: Path, cli_block: str) -> None:
-    readme = readme_path.read_text(encoding="utf-8")
-
-    start_index = readme.find(START_MARKER)
-    end_index = readme.find(END_MARKER)
+    readme = ReadmeBlocks(readme_path)
 
-    if start_index == -1 or end_index == -1:
+    if not readme.has(START_MARKER, END_MARKER):
         raise RuntimeError("No se encontraron los marcadores de telemetry presence en README.md")
 
-    end_index += len(END_MARKER)
-
-    replacement = (
-        f"{START_MARKER}\n"
-        "```text\n"
-        f"{cli_block}\n"
-        "```\n"
-        f"{END_MARKER}"
-    )
-
-    new_readme = readme[:start_index] + replacement + readme[end_index:]
-    readme_path.write_text(new_readme, encoding="utf-8")
+    readme.set(START_MARKER, END_MARKER, f"\n```text\n{cli_block}\n```\n", name="telemetry-presence")
+    readme.write()
 
 
 # ============================================================